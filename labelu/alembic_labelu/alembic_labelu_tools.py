@@ -35,6 +35,23 @@ def column_exist_in_table(table_name, column_name):
     return column_name in [column["name"] for column in columns]
 
 
+def index_exist_in_table(table_name, index_name):
+    """check index is not exist in table
+
+    Args:
+        table_name (string): the name of table
+        index_name (string): the name of index
+
+    Returns:
+        bool: true or false, whether the index_name exists in the table_name
+    """
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    indexes = inspector.get_indexes(table_name)
+
+    return index_name in [index["name"] for index in indexes]
+
+
 def get_tool_label_dict(task_config: dict) -> dict:
     """get the key value of labels in a given task_id and task_config"""
 
@@ -18,12 +18,7 @@ def run_db_migrations():
 
     script = ScriptDirectory.from_config(config)
 
-    # grab the latest revision
-    revision = None
-    for revision in script.walk_revisions():
-        revision = revision.revision
-        break
-
-    # run the upgrade function
-    if revision:
-        upgrade(config, revision)
+    # the history has more than one head, upgrade all of them, picking the
+    # first walked revision would leave the other branches unapplied
+    if script.get_heads():
+        upgrade(config, "heads")
@@ -0,0 +1,112 @@
+"""add task annotation
+
+Revision ID: 4f8a2c6d1e93
+Revises: 7b2c9d4e5f16
+Create Date: 2026-10-18 19:40:12.207315
+
+"""
+from datetime import datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+from loguru import logger
+from sqlalchemy.orm import sessionmaker
+
+from labelu.internal.common.annotation import annotation_rows, sample_result
+from labelu.alembic_labelu.alembic_labelu_tools import table_exist
+
+# revision identifiers, used by Alembic.
+revision = '4f8a2c6d1e93'
+down_revision = '7b2c9d4e5f16'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    if not table_exist('task_annotation'):
+        op.create_table(
+            'task_annotation',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, index=True),
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('task.id'), comment='task of the sample'),
+            sa.Column('sample_id', sa.Integer(), sa.ForeignKey('task_sample.id'), index=True),
+            sa.Column('object_id', sa.String(64), comment='id of the object in the sample result'),
+            sa.Column('tool', sa.String(32), comment='rectTool, polygonTool etc.'),
+            sa.Column('label', sa.String(256), comment='label value of the object'),
+            sa.Column('order', sa.Integer(), comment='order of the object in the sample'),
+            sa.Column('x', sa.Float(), comment='bounding box left, none for tags and texts'),
+            sa.Column('y', sa.Float(), comment='bounding box top'),
+            sa.Column('width', sa.Float(), comment='bounding box width'),
+            sa.Column('height', sa.Float(), comment='bounding box height'),
+            sa.Column('area', sa.Float(), comment='area of a rect or polygon'),
+            sa.Column('geometry', sa.Text(), comment='the object of the sample result, json'),
+            sa.Column('created_at', sa.DateTime(timezone=True), comment='Time the object was saved'),
+        )
+        op.create_index('idx_annotation_task_id_label', 'task_annotation', ['task_id', 'label'])
+        op.create_index('idx_annotation_task_id_tool', 'task_annotation', ['task_id', 'tool'])
+
+    # backfill from the results of the samples without objects yet, a batch
+    # of samples at a time: the table may have been created empty with the
+    # other tables before the migrations
+    annotation_table = sa.table(
+        'task_annotation',
+        *[
+            sa.column(name)
+            for name in (
+                'task_id', 'sample_id', 'object_id', 'tool', 'label', 'order',
+                'x', 'y', 'width', 'height', 'area', 'geometry', 'created_at',
+            )
+        ],
+    )
+    bind = op.get_bind()
+    Session = sessionmaker(bind=bind)
+    session = Session()
+
+    try:
+        with context.begin_transaction():
+            last_id = 0
+            inserted = 0
+            while True:
+                samples = session.execute(
+                    sa.text(
+                        'SELECT id, task_id, data FROM task_sample '
+                        'WHERE id > :last_id AND deleted_at IS NULL '
+                        'AND NOT EXISTS (SELECT 1 FROM task_annotation a WHERE a.sample_id = task_sample.id) '
+                        'ORDER BY id LIMIT :limit'
+                    ),
+                    {'last_id': last_id, 'limit': BATCH_SIZE},
+                ).fetchall()
+                if not samples:
+                    break
+
+                rows = []
+                for sample_id, task_id, data in samples:
+                    try:
+                        objects = annotation_rows(sample_result(data))
+                    except (ValueError, TypeError, AttributeError):
+                        logger.warning('skip the result of sample {}, it is not json', sample_id)
+                        continue
+                    rows.extend(
+                        {**row, 'task_id': task_id, 'sample_id': sample_id, 'created_at': datetime.now()}
+                        for row in objects
+                    )
+                if rows:
+                    session.execute(annotation_table.insert(), rows)
+                    inserted += len(rows)
+                last_id = samples[-1][0]
+
+            session.commit()
+            logger.info('backfilled {} annotation objects', inserted)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def downgrade() -> None:
+    if table_exist('task_annotation'):
+        op.drop_index('idx_annotation_task_id_tool', table_name='task_annotation')
+        op.drop_index('idx_annotation_task_id_label', table_name='task_annotation')
+        op.drop_table('task_annotation')
@@ -0,0 +1,43 @@
+"""add export job
+
+Revision ID: 5c2f7e1a9b3d
+Revises: 034c7045b540
+Create Date: 2026-10-18 10:12:31.402511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import table_exist
+
+# revision identifiers, used by Alembic.
+revision = '5c2f7e1a9b3d'
+down_revision = '034c7045b540'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not table_exist('export_job'):
+        op.create_table(
+            'export_job',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True, index=True),
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('task.id'), index=True),
+            sa.Column('export_type', sa.String(32), comment='export file type, JSON, COCO, MASK etc.'),
+            sa.Column('sample_ids', sa.Text(), comment='json list of the exported sample ids'),
+            sa.Column('status', sa.String(32), comment='PENDING is waiting for a worker, RUNNING, SUCCESS or FAILED'),
+            sa.Column('progress', sa.Integer(), comment='export progress in percent'),
+            sa.Column('file_path', sa.String(512), comment='full path of the exported file'),
+            sa.Column('error', sa.Text(), comment='error message of a failed export'),
+            sa.Column('created_by', sa.Integer(), sa.ForeignKey('user.id'), index=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), comment='Time an export job was created'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), comment='Last time an export job was updated'),
+            sa.Column('finished_at', sa.DateTime(timezone=True), comment='Time an export job finished'),
+        )
+        op.create_index('idx_export_job_task_id_status', 'export_job', ['task_id', 'status'])
+
+
+def downgrade() -> None:
+    if table_exist('export_job'):
+        op.drop_index('idx_export_job_task_id_status', table_name='export_job')
+        op.drop_table('export_job')
@@ -0,0 +1,29 @@
+"""add export job options
+
+Revision ID: 7b2c9d4e5f16
+Revises: e1f6b0c2d8a4
+Create Date: 2026-10-18 17:12:30.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = '7b2c9d4e5f16'
+down_revision = 'e1f6b0c2d8a4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('export_job', 'options'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.add_column(sa.Column('options', sa.Text(), comment='json format options of the export'))
+
+
+def downgrade() -> None:
+    if column_exist_in_table('export_job', 'options'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.drop_column('options')
@@ -0,0 +1,57 @@
+"""add task stats
+
+Revision ID: 8e3b6f1a2c57
+Revises: 4f8a2c6d1e93
+Create Date: 2026-10-18 21:05:37.418260
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from loguru import logger
+
+from labelu.alembic_labelu.alembic_labelu_tools import table_exist
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6f1a2c57'
+down_revision = '4f8a2c6d1e93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not table_exist('task_stats'):
+        op.create_table(
+            'task_stats',
+            sa.Column('task_id', sa.Integer(), sa.ForeignKey('task.id'), primary_key=True),
+            sa.Column('new', sa.Integer(), default=0, comment='count of the NEW samples'),
+            sa.Column('done', sa.Integer(), default=0, comment='count of the DONE samples'),
+            sa.Column('skipped', sa.Integer(), default=0, comment='count of the SKIPPED samples'),
+            sa.Column('total', sa.Integer(), default=0, comment='count of the samples, deleted excluded'),
+            sa.Column('annotated_count', sa.Integer(), default=0, comment='sum of the annotated count of the samples'),
+            sa.Column('updated_at', sa.DateTime(timezone=True), comment='Last time the counters were updated'),
+        )
+
+    # count the tasks without counters, the table may have been created empty
+    # with the other tables before the migrations
+    result = op.get_bind().execute(
+        sa.text(
+            'INSERT INTO task_stats (task_id, new, done, skipped, total, annotated_count, updated_at) '
+            'SELECT task.id, '
+            "COALESCE(SUM(CASE WHEN s.state = 'NEW' THEN 1 ELSE 0 END), 0), "
+            "COALESCE(SUM(CASE WHEN s.state = 'DONE' THEN 1 ELSE 0 END), 0), "
+            "COALESCE(SUM(CASE WHEN s.state = 'SKIPPED' THEN 1 ELSE 0 END), 0), "
+            'COUNT(s.id), COALESCE(SUM(s.annotated_count), 0), :now '
+            'FROM task LEFT JOIN task_sample s ON s.task_id = task.id AND s.deleted_at IS NULL '
+            'WHERE task.id NOT IN (SELECT task_id FROM task_stats) '
+            'GROUP BY task.id'
+        ),
+        {'now': datetime.now()},
+    )
+    logger.info('counted the samples of {} tasks', result.rowcount)
+
+
+def downgrade() -> None:
+    if table_exist('task_stats'):
+        op.drop_table('task_stats')
@@ -0,0 +1,42 @@
+"""add delta export
+
+Revision ID: a3e8d1c64f20
+Revises: 5c2f7e1a9b3d
+Create Date: 2026-10-18 14:40:09.218734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table, index_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'a3e8d1c64f20'
+down_revision = '5c2f7e1a9b3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('export_job', 'since'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.add_column(
+                sa.Column('since', sa.String(256), comment='export token of a previous export, only changes after it are exported'),
+            )
+            batch_op.add_column(
+                sa.Column('token', sa.String(256), comment='export token to pass as since to the next delta export'),
+            )
+
+    # changed samples are looked up by task and updated_at
+    if not index_exist_in_table('task_sample', 'idx_sample_task_id_updated_at_id'):
+        op.create_index('idx_sample_task_id_updated_at_id', 'task_sample', ['task_id', 'updated_at', 'id'])
+
+
+def downgrade() -> None:
+    if index_exist_in_table('task_sample', 'idx_sample_task_id_updated_at_id'):
+        op.drop_index('idx_sample_task_id_updated_at_id', table_name='task_sample')
+
+    if column_exist_in_table('export_job', 'since'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.drop_column('token')
+            batch_op.drop_column('since')
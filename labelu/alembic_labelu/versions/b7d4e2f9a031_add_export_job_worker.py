@@ -0,0 +1,29 @@
+"""add export job worker
+
+Revision ID: b7d4e2f9a031
+Revises: f2b9c3e7a415
+Create Date: 2026-10-19 10:03:27.551064
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'b7d4e2f9a031'
+down_revision = 'f2b9c3e7a415'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('export_job', 'worker'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.add_column(sa.Column('worker', sa.String(128), comment='host:pid of the process running the job'))
+
+
+def downgrade() -> None:
+    if column_exist_in_table('export_job', 'worker'):
+        with op.batch_alter_table('export_job') as batch_op:
+            batch_op.drop_column('worker')
@@ -0,0 +1,35 @@
+"""add sample sort indexes
+
+Revision ID: c6d2e8a4b197
+Revises: 8e3b6f1a2c57
+Create Date: 2026-10-18 22:18:51.603174
+
+"""
+from alembic import op
+
+from labelu.alembic_labelu.alembic_labelu_tools import index_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'c6d2e8a4b197'
+down_revision = '8e3b6f1a2c57'
+branch_labels = None
+depends_on = None
+
+# the samples of a task are paged by keyset on (sort key, id)
+INDEXES = {
+    'idx_sample_task_id_inner_id_id': ['task_id', 'inner_id', 'id'],
+    'idx_sample_task_id_state_id': ['task_id', 'state', 'id'],
+    'idx_sample_task_id_annotated_count_id': ['task_id', 'annotated_count', 'id'],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        if not index_exist_in_table('task_sample', name):
+            op.create_index(name, 'task_sample', columns)
+
+
+def downgrade() -> None:
+    for name in INDEXES:
+        if index_exist_in_table('task_sample', name):
+            op.drop_index(name, table_name='task_sample')
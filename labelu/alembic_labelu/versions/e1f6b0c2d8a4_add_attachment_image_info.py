@@ -0,0 +1,78 @@
+"""add attachment image info
+
+Revision ID: e1f6b0c2d8a4
+Revises: a3e8d1c64f20
+Create Date: 2026-10-18 16:05:47.530912
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from loguru import logger
+from sqlalchemy.orm import sessionmaker
+
+from labelu.internal.common.config import settings
+from labelu.internal.common.image import read_image_info
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'e1f6b0c2d8a4'
+down_revision = 'a3e8d1c64f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('task_attachment', 'width'):
+        with op.batch_alter_table('task_attachment') as batch_op:
+            batch_op.add_column(sa.Column('width', sa.Integer(), comment='image width in pixels, as stored'))
+            batch_op.add_column(sa.Column('height', sa.Integer(), comment='image height in pixels, as stored'))
+            batch_op.add_column(sa.Column('format', sa.String(16), comment='image format, JPEG, PNG etc.'))
+            batch_op.add_column(sa.Column('orientation', sa.Integer(), comment='image EXIF orientation, 1 is upright'))
+
+    # backfill the uploaded images, only their headers are read
+    bind = op.get_bind()
+    Session = sessionmaker(bind=bind)
+    session = Session()
+
+    try:
+        with context.begin_transaction():
+            attachments = session.execute(
+                sa.text('SELECT id, path FROM task_attachment WHERE width IS NULL AND deleted_at IS NULL')
+            ).fetchall()
+
+            updated = 0
+            for attachment_id, attachment_path in attachments:
+                if not attachment_path:
+                    continue
+                file_full_path = settings.MEDIA_ROOT.joinpath(attachment_path.lstrip('/'))
+                if not file_full_path.is_file():
+                    continue
+                info = read_image_info(file_full_path)
+                if not info:
+                    continue
+
+                session.execute(
+                    sa.text(
+                        'UPDATE task_attachment SET width=:width, height=:height, format=:format, '
+                        'orientation=:orientation WHERE id=:id'
+                    ),
+                    {**info, 'id': attachment_id},
+                )
+                updated += 1
+
+            session.commit()
+            logger.info('backfilled image info of {} attachments', updated)
+    except Exception as e:
+        session.rollback()
+        raise e
+    finally:
+        session.close()
+
+
+def downgrade() -> None:
+    if column_exist_in_table('task_attachment', 'width'):
+        with op.batch_alter_table('task_attachment') as batch_op:
+            batch_op.drop_column('orientation')
+            batch_op.drop_column('format')
+            batch_op.drop_column('height')
+            batch_op.drop_column('width')
@@ -0,0 +1,37 @@
+"""add sample version
+
+Revision ID: e4a7c1d9b260
+Revises: c6d2e8a4b197
+Create Date: 2026-10-18 23:32:06.851943
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7c1d9b260'
+down_revision = 'c6d2e8a4b197'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('task_sample', 'version'):
+        with op.batch_alter_table('task_sample') as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'version',
+                    sa.Integer(),
+                    nullable=False,
+                    server_default='1',
+                    comment='incremented on every update, the ETag of the sample',
+                ),
+            )
+
+
+def downgrade() -> None:
+    if column_exist_in_table('task_sample', 'version'):
+        with op.batch_alter_table('task_sample') as batch_op:
+            batch_op.drop_column('version')
@@ -0,0 +1,60 @@
+"""add sample change seq
+
+Revision ID: f2b9c3e7a415
+Revises: e4a7c1d9b260
+Create Date: 2026-10-19 09:12:44.305918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from labelu.alembic_labelu.alembic_labelu_tools import column_exist_in_table, index_exist_in_table
+
+# revision identifiers, used by Alembic.
+revision = 'f2b9c3e7a415'
+down_revision = 'e4a7c1d9b260'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not column_exist_in_table('task', 'last_change_seq'):
+        with op.batch_alter_table('task') as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'last_change_seq',
+                    sa.Integer(),
+                    nullable=False,
+                    server_default='0',
+                    comment='The last change sequence number of the samples in a task',
+                ),
+            )
+
+    if not column_exist_in_table('task_sample', 'change_seq'):
+        with op.batch_alter_table('task_sample') as batch_op:
+            batch_op.add_column(
+                sa.Column(
+                    'change_seq',
+                    sa.Integer(),
+                    nullable=False,
+                    server_default='0',
+                    comment='change sequence number of the last create, update or delete in the task',
+                ),
+            )
+
+    # changed samples are looked up by task and change sequence number
+    if not index_exist_in_table('task_sample', 'idx_sample_task_id_change_seq'):
+        op.create_index('idx_sample_task_id_change_seq', 'task_sample', ['task_id', 'change_seq'])
+
+
+def downgrade() -> None:
+    if index_exist_in_table('task_sample', 'idx_sample_task_id_change_seq'):
+        op.drop_index('idx_sample_task_id_change_seq', table_name='task_sample')
+
+    if column_exist_in_table('task_sample', 'change_seq'):
+        with op.batch_alter_table('task_sample') as batch_op:
+            batch_op.drop_column('change_seq')
+
+    if column_exist_in_table('task', 'last_change_seq'):
+        with op.batch_alter_table('task') as batch_op:
+            batch_op.drop_column('last_change_seq')
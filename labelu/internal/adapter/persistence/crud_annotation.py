@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from labelu.internal.domain.models.annotation import TaskAnnotation
+from labelu.internal.domain.models.sample import TaskSample
+
+
+def insert(db: Session, rows: List[dict]) -> None:
+    """insert the annotation objects rows, each with its task_id and sample_id"""
+    if rows:
+        db.bulk_insert_mappings(TaskAnnotation, rows)
+
+
+def replace(db: Session, task_id: int, sample_id: int, rows: List[dict]) -> None:
+    """replace the annotation objects of a sample by rows"""
+    db.query(TaskAnnotation).filter(TaskAnnotation.sample_id == sample_id).delete(
+        synchronize_session=False
+    )
+    if rows:
+        db.bulk_insert_mappings(
+            TaskAnnotation,
+            [{**row, "task_id": task_id, "sample_id": sample_id} for row in rows],
+        )
+
+
+def replace_objects(
+    db: Session, task_id: int, sample_id: int, object_ids: List[str], rows: List[dict]
+) -> None:
+    """replace the annotation objects object_ids of a sample by rows, the
+    ones without a row are deleted, the other objects are left as they are"""
+    if object_ids:
+        db.query(TaskAnnotation).filter(
+            TaskAnnotation.sample_id == sample_id, TaskAnnotation.object_id.in_(object_ids)
+        ).delete(synchronize_session=False)
+    if rows:
+        db.bulk_insert_mappings(
+            TaskAnnotation,
+            [{**row, "task_id": task_id, "sample_id": sample_id} for row in rows],
+        )
+
+
+def count_by_label(db: Session, task_id: int) -> Dict[str, int]:
+    """objects per label of the samples of a task, deleted samples and objects
+    without label excluded"""
+    rows = (
+        db.query(TaskAnnotation.label, func.count(TaskAnnotation.id))
+        .join(TaskSample, TaskSample.id == TaskAnnotation.sample_id)
+        .filter(
+            TaskAnnotation.task_id == task_id,
+            TaskAnnotation.label != None,
+            TaskSample.deleted_at == None,
+        )
+        .group_by(TaskAnnotation.label)
+        .all()
+    )
+    return {label: count for label, count in rows}
@@ -0,0 +1,65 @@
+from datetime import datetime
+from typing import Any, Dict, List, Union
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+
+from labelu.internal.domain.models.export_job import ExportJob
+from labelu.internal.domain.models.export_job import ExportJobStatus
+
+
+def create(db: Session, export_job: ExportJob) -> ExportJob:
+    db.add(export_job)
+    db.flush()
+    db.refresh(export_job)
+    return export_job
+
+
+def get(db: Session, export_job_id: int) -> ExportJob:
+    return db.query(ExportJob).filter(ExportJob.id == export_job_id).first()
+
+
+def update(db: Session, db_obj: ExportJob, obj_in: Dict[str, Any]) -> ExportJob:
+    obj_data = jsonable_encoder(obj_in)
+    for field in obj_data:
+        if field in obj_in:
+            setattr(db_obj, field, obj_in[field])
+    db.add(db_obj)
+    db.flush()
+    db.refresh(db_obj)
+    return db_obj
+
+
+def unfinished_workers(db: Session) -> List[Union[str, None]]:
+    """the workers of the pending or running jobs, None for the jobs created
+    before the workers were recorded"""
+    rows = (
+        db.query(ExportJob.worker)
+        .filter(ExportJob.status.in_([ExportJobStatus.PENDING.value, ExportJobStatus.RUNNING.value]))
+        .distinct()
+        .all()
+    )
+    return [row.worker for row in rows]
+
+
+def fail_unfinished(db: Session, error: str, workers: List[Union[str, None]]) -> int:
+    """mark the jobs left pending or running by the stopped workers as failed"""
+    worker_filter = [ExportJob.worker.in_([worker for worker in workers if worker is not None])]
+    if None in workers:
+        worker_filter.append(ExportJob.worker == None)
+    return (
+        db.query(ExportJob)
+        .filter(
+            ExportJob.status.in_([ExportJobStatus.PENDING.value, ExportJobStatus.RUNNING.value]),
+            or_(*worker_filter),
+        )
+        .update(
+            {
+                ExportJob.status: ExportJobStatus.FAILED.value,
+                ExportJob.error: error,
+                ExportJob.finished_at: datetime.now(),
+            },
+            synchronize_session=False,
+        )
+    )
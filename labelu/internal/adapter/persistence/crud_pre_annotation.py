@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Any, Dict, List, Union, Tuple
+from typing import Any, Dict, List, Set, Union, Tuple
 
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
@@ -64,6 +64,23 @@ def list_by(
         
     return results, count
 
+def pre_annotated_names(db: Session, task_id: int, sample_names: List[str]) -> Set[str]:
+    """the names among sample_names having a pre-annotation in the task, in one query
+
+    A pre-annotation is named after the sample file, with or without the
+    9 characters of the upload prefix, as in list_by.
+    """
+    candidates = {name for name in sample_names if name} | {name[9:] for name in sample_names if name and name[9:]}
+    if not candidates:
+        return set()
+
+    query_filter = [TaskPreAnnotation.deleted_at == None, TaskPreAnnotation.sample_name.in_(candidates)]
+    if task_id:
+        query_filter.append(TaskPreAnnotation.task_id == task_id)
+    found = {row.sample_name for row in db.query(TaskPreAnnotation.sample_name).filter(*query_filter).distinct()}
+
+    return {name for name in sample_names if name and (name in found or name[9:] in found)}
+
 def list_by_task_id_and_owner_id(db: Session, task_id: int) -> Dict[str, List[TaskPreAnnotation]]:
     pre_annotations = db.query(TaskPreAnnotation).filter(
         TaskPreAnnotation.task_id == task_id,
@@ -1,20 +1,64 @@
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Tuple, Union
 
 
-from sqlalchemy import case, func, text
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session, defer, selectinload
 from fastapi.encoders import jsonable_encoder
 
+from labelu.internal.common.export_token import Watermark
+from labelu.internal.domain.models.attachment import TaskAttachment
 from labelu.internal.domain.models.sample import SampleState
 from labelu.internal.domain.models.sample import TaskSample
+from labelu.internal.domain.models.task import Task
+
+
+# the columns the samples can be sorted by
+SORT_COLUMNS = {
+    TaskSample.annotated_count.key: TaskSample.annotated_count,
+    TaskSample.state.key: TaskSample.state,
+    TaskSample.inner_id.key: TaskSample.inner_id,
+    TaskSample.updated_at.key: TaskSample.updated_at,
+}
+
+
+def next_change_seq(db: Session, task_id: int) -> int:
+    """the next number of the change sequence of the samples of a task
+
+    The task row stays locked until the end of the transaction, so the numbers
+    of a task are committed in the order they are taken: an export that reads
+    the last committed number has seen every change up to it.
+    """
+    db.query(Task).filter(Task.id == task_id).update(
+        {Task.last_change_seq: Task.last_change_seq + 1, Task.updated_at: Task.updated_at},
+        synchronize_session=False,
+    )
+    return db.query(Task.last_change_seq).filter(Task.id == task_id).scalar()
 
 
 def batch(db: Session, samples: List[TaskSample]) -> List[TaskSample]:
+    for task_id in {sample.task_id for sample in samples}:
+        change_seq = next_change_seq(db=db, task_id=task_id)
+        for sample in samples:
+            if sample.task_id == task_id:
+                sample.change_seq = change_seq
     db.bulk_save_objects(samples, return_defaults=True)
     return samples
 
 
+def _list_query(db: Session, query_filter: list, with_data: bool = True):
+    # the relationships of the response are loaded with the page, a query each
+    query = db.query(TaskSample).options(
+        selectinload(TaskSample.file),
+        selectinload(TaskSample.owner),
+        selectinload(TaskSample.updaters),
+    )
+    if not with_data:
+        # the annotation result, the bulk of a sample, is not read at all
+        query = query.options(defer(TaskSample.data))
+    return query.filter(*query_filter)
+
+
 def list_by(
     db: Session,
     task_id: Union[int, None],
@@ -23,6 +67,7 @@ def list_by(
     page: Union[int, None],
     size: int,
     sorting: Union[str, None],
+    with_data: bool = True,
 ) -> List[TaskSample]:
 
     # query filter
@@ -33,29 +78,34 @@ def list_by(
         query_filter.append(TaskSample.id > after)
     if task_id:
         query_filter.append(TaskSample.task_id == task_id)
-    query = db.query(TaskSample).filter(*query_filter)
+    query = _list_query(db=db, query_filter=query_filter, with_data=with_data)
 
     # case when for state enum
     whens = {state: index for index, state in enumerate(SampleState)}
     sort_logic = case(value=TaskSample.state, whens=whens).label(TaskSample.state.key)
 
+    # ties are broken by id in the direction of the last sort key, as in
+    # list_by_cursor, so that the cursors of a page follow on from it
+    ascending = True
     if sorting:
         sort_strings = sorting.split(",")
         for item in sort_strings:
             sort_key = item.split(":")
+            ascending = sort_key[1] == "asc"
             if sort_key[0] == TaskSample.state.key:
                 if sort_key[1] == "asc":
                     query = query.order_by(sort_logic.asc())
                 else:
                     query = query.order_by(sort_logic.desc())
-            else:
-                query = query.order_by(text(f"{sort_key[0]} {sort_key[1]}"))
+            elif sort_key[0] in SORT_COLUMNS:
+                column = SORT_COLUMNS[sort_key[0]]
+                query = query.order_by(column.asc() if sort_key[1] == "asc" else column.desc())
 
     # default order by id, before need select last items
     if before:
         query = query.order_by(TaskSample.id.desc())
     else:
-        query = query.order_by(TaskSample.id.asc())
+        query = query.order_by(TaskSample.id.asc() if ascending else TaskSample.id.desc())
     results = (
         query.offset(offset=page * size if page else 0)
         .limit(limit=size)
@@ -66,6 +116,71 @@ def list_by(
     return results
 
 
+def _after(column, value: Any, sample_id: int, ascending: bool):
+    """the samples after (value, sample_id) in the (column, id) order, nulls
+    first when ascending"""
+    id_after = TaskSample.id > sample_id if ascending else TaskSample.id < sample_id
+    if value is None:
+        tie = and_(column == None, id_after)
+        return or_(tie, column != None) if ascending else tie
+    key_after = column > value if ascending else or_(column < value, column == None)
+    return or_(key_after, and_(column == value, id_after))
+
+
+def list_by_cursor(
+    db: Session,
+    task_id: int,
+    sort_key: Union[str, None],
+    ascending: bool,
+    position: Union[Tuple[Any, int], None],
+    size: int,
+    with_data: bool = True,
+) -> List[TaskSample]:
+    """size samples after position in the (sort key, id) order, the id in the
+    direction of the sort key, the id order alone without sort key
+
+    The position is the (sort key value, id) of the last sample of the
+    previous page: the page is a range scan of the (task_id, sort key, id)
+    index whatever its depth. A state sort walks the states in their enum
+    order, a range of the samples of each state on id.
+    """
+    query_filter = [TaskSample.task_id == task_id, TaskSample.deleted_at == None]
+    id_order = TaskSample.id.asc() if ascending else TaskSample.id.desc()
+
+    if sort_key == TaskSample.state.key:
+        states = [state.value for state in SampleState]
+        if not ascending:
+            states.reverse()
+        if position:
+            states = states[states.index(position[0]) :]
+        results = []
+        for state in states:
+            state_filter = [*query_filter, TaskSample.state == state]
+            if position and state == position[0]:
+                state_filter.append(
+                    TaskSample.id > position[1] if ascending else TaskSample.id < position[1]
+                )
+            results.extend(
+                _list_query(db=db, query_filter=state_filter, with_data=with_data)
+                .order_by(id_order)
+                .limit(size - len(results))
+                .all()
+            )
+            if len(results) >= size:
+                break
+        return results
+
+    query = _list_query(db=db, query_filter=query_filter, with_data=with_data)
+    if sort_key:
+        column = SORT_COLUMNS[sort_key]
+        if position:
+            query = query.filter(_after(column, position[0], position[1], ascending))
+        query = query.order_by(column.asc() if ascending else column.desc())
+    elif position:
+        query = query.filter(TaskSample.id > position[1] if ascending else TaskSample.id < position[1])
+    return query.order_by(id_order).limit(size).all()
+
+
 def get(db: Session, sample_id: int) -> TaskSample:
     return (
         db.query(TaskSample)
@@ -82,7 +197,143 @@ def get_by_ids(db: Session, sample_ids: List[int]) -> List[TaskSample]:
     )
 
 
+def _export_filter(
+    task_id: int,
+    sample_ids: Union[List[int], None],
+    since: Union[Watermark, None] = None,
+    deleted: bool = False,
+) -> list:
+    query_filter = [
+        TaskSample.task_id == task_id,
+        TaskSample.deleted_at != None if deleted else TaskSample.deleted_at == None,
+    ]
+    if sample_ids is not None:
+        query_filter.append(TaskSample.id.in_(sample_ids))
+    if since is not None:
+        query_filter.append(TaskSample.change_seq > since)
+    return query_filter
+
+
+def count_for_export(
+    db: Session,
+    task_id: int,
+    sample_ids: Union[List[int], None],
+    since: Union[Watermark, None] = None,
+) -> int:
+    return db.query(TaskSample.id).filter(*_export_filter(task_id, sample_ids, since)).count()
+
+
+def export_fingerprint(
+    db: Session,
+    task_id: int,
+    sample_ids: Union[List[int], None],
+    since: Union[Watermark, None] = None,
+) -> Tuple[int, Union[datetime, None]]:
+    """count and max updated_at of the samples to export"""
+    count, max_updated_at = (
+        db.query(func.count(TaskSample.id), func.max(TaskSample.updated_at))
+        .filter(*_export_filter(task_id, sample_ids, since))
+        .one()
+    )
+    return count, max_updated_at
+
+
+def export_watermark(
+    db: Session, task_id: int, sample_ids: Union[List[int], None]
+) -> Watermark:
+    """the last committed change sequence number of the samples, deleted ones
+    included"""
+    query_filter = [TaskSample.task_id == task_id]
+    if sample_ids is not None:
+        query_filter.append(TaskSample.id.in_(sample_ids))
+    return db.query(func.coalesce(func.max(TaskSample.change_seq), 0)).filter(*query_filter).scalar()
+
+
+def deleted_ids_for_export(
+    db: Session,
+    task_id: int,
+    sample_ids: Union[List[int], None],
+    since: Watermark,
+) -> List[int]:
+    """ids of the samples deleted after the watermark"""
+    rows = (
+        db.query(TaskSample.id)
+        .filter(*_export_filter(task_id, sample_ids, since, deleted=True))
+        .order_by(TaskSample.id.asc())
+        .all()
+    )
+    return [row.id for row in rows]
+
+
+def iter_for_export(
+    db: Session,
+    task_id: int,
+    sample_ids: Union[List[int], None],
+    since: Union[Watermark, None] = None,
+    batch_size: int = 500,
+) -> Iterator[dict]:
+    """yield the samples to export in id order, one batch of rows in memory
+
+    Only the columns used by the converters are selected, the attachment and
+    its image size stored at upload are joined in the same query. Batches are
+    fetched by keyset on the sample id, the selected ids are walked in sorted
+    chunks so that IN stays bounded.
+    Rows are plain dicts: cheap to build and to send to a worker process.
+    With since, only the samples created or updated after it are yielded.
+    """
+
+    query = db.query(
+        TaskSample.id,
+        TaskSample.state,
+        TaskSample.data,
+        TaskAttachment.filename,
+        TaskAttachment.path,
+        TaskAttachment.url,
+        TaskAttachment.width,
+        TaskAttachment.height,
+        TaskAttachment.format,
+        TaskAttachment.orientation,
+    ).outerjoin(TaskAttachment, TaskAttachment.id == TaskSample.file_id)
+
+    if sample_ids is None:
+        chunks = [None]
+    else:
+        ids = sorted(set(sample_ids))
+        chunks = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+
+    for chunk in chunks:
+        last_id = 0
+        while True:
+            rows = (
+                query.filter(*_export_filter(task_id, chunk, since), TaskSample.id > last_id)
+                .order_by(TaskSample.id.asc())
+                .limit(batch_size)
+                .all()
+            )
+            for row in rows:
+                yield {
+                    "id": row.id,
+                    "state": row.state,
+                    "data": row.data,
+                    "file": {
+                        "filename": row.filename,
+                        "path": row.path,
+                        "url": row.url,
+                        "width": row.width,
+                        "height": row.height,
+                        "format": row.format,
+                        "orientation": row.orientation,
+                    }
+                    if row.filename is not None or row.path is not None
+                    else {},
+                }
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1].id
+
+
 def update(db: Session, db_obj: TaskSample, obj_in: Dict[str, Any]) -> TaskSample:
+    db_obj.change_seq = next_change_seq(db=db, task_id=db_obj.task_id)
     obj_data = jsonable_encoder(obj_in)
     for field in obj_data:
         if field in obj_in:
@@ -94,9 +345,19 @@ def update(db: Session, db_obj: TaskSample, obj_in: Dict[str, Any]) -> TaskSampl
 
 
 def delete(db: Session, sample_ids: List[int]) -> None:
-    db.query(TaskSample).filter(TaskSample.id.in_(sample_ids)).update(
-        {TaskSample.deleted_at: datetime.now()}
-    )
+    task_ids = [
+        row.task_id
+        for row in db.query(TaskSample.task_id).filter(TaskSample.id.in_(sample_ids)).distinct()
+    ]
+    for task_id in task_ids:
+        db.query(TaskSample).filter(
+            TaskSample.id.in_(sample_ids), TaskSample.task_id == task_id
+        ).update(
+            {
+                TaskSample.deleted_at: datetime.now(),
+                TaskSample.change_seq: next_change_seq(db=db, task_id=task_id),
+            }
+        )
 
 
 def count(db: Session, task_id: int) -> int:
@@ -105,24 +366,3 @@ def count(db: Session, task_id: int) -> int:
         query_filter.append(TaskSample.task_id == task_id)
     return db.query(TaskSample).filter(*query_filter).count()
 
-
-def statics(
-    db: Session,
-    task_ids: List[int],
-) -> dict:
-    query_filter = [TaskSample.deleted_at == None]
-    if task_ids:
-        query_filter.append(TaskSample.task_id.in_(task_ids))
-
-    statics = (
-        db.query(
-            TaskSample.task_id,
-            TaskSample.state,
-            func.count(TaskSample.state).label("count"),
-        )
-        .filter(*query_filter)
-        .group_by(TaskSample.task_id, TaskSample.state)
-        .all()
-    )
-    d = {f"{s[0]}_{s[1]}": s[2] for s in statics}
-    return d
@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Dict, List, Union
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from labelu.internal.domain.models.sample import SampleState, TaskSample
+from labelu.internal.domain.models.task import Task
+from labelu.internal.domain.models.task_stats import TaskStats
+
+# the counter of each sample state
+STATE_COUNTERS = {
+    SampleState.NEW.value: TaskStats.new.key,
+    SampleState.DONE.value: TaskStats.done.key,
+    SampleState.SKIPPED.value: TaskStats.skipped.key,
+}
+COUNTERS = (*STATE_COUNTERS.values(), TaskStats.total.key, TaskStats.annotated_count.key)
+
+
+def count_from_samples(db: Session, task_ids: List[int]) -> Dict[int, TaskStats]:
+    """the counters of the tasks counted from their samples, not stored"""
+    counted = {task_id: TaskStats(task_id=task_id, **{c: 0 for c in COUNTERS}) for task_id in task_ids}
+    rows = (
+        db.query(
+            TaskSample.task_id,
+            TaskSample.state,
+            func.count(TaskSample.id),
+            func.coalesce(func.sum(TaskSample.annotated_count), 0),
+        )
+        .filter(TaskSample.task_id.in_(task_ids), TaskSample.deleted_at == None)
+        .group_by(TaskSample.task_id, TaskSample.state)
+        .all()
+    )
+    for task_id, state, count, annotated_count in rows:
+        stats = counted[task_id]
+        if state in STATE_COUNTERS:
+            setattr(stats, STATE_COUNTERS[state], getattr(stats, STATE_COUNTERS[state]) + count)
+        stats.total += count
+        stats.annotated_count += annotated_count
+    return counted
+
+
+def list_by_task_ids(db: Session, task_ids: List[int]) -> Dict[int, TaskStats]:
+    """the counters of the tasks, the ones without a row yet are counted from their samples"""
+    if not task_ids:
+        return {}
+    stats = {
+        row.task_id: row
+        for row in db.query(TaskStats).filter(TaskStats.task_id.in_(task_ids)).all()
+    }
+    missing = [task_id for task_id in task_ids if task_id not in stats]
+    if missing:
+        stats.update(count_from_samples(db=db, task_ids=missing))
+    return stats
+
+
+def create(db: Session, task_id: int) -> TaskStats:
+    """the zero counters of a new task"""
+    stats = TaskStats(task_id=task_id, **{c: 0 for c in COUNTERS})
+    db.add(stats)
+    db.flush()
+    return stats
+
+
+def get(db: Session, task_id: int) -> TaskStats:
+    return list_by_task_ids(db=db, task_ids=[task_id])[task_id]
+
+
+def apply(db: Session, task_id: int, states: Dict[str, int], annotated_count: int = 0) -> None:
+    """add the sample count delta of each state, and the annotated count delta,
+    to the counters of a task
+
+    Run it in the transaction of the sample change, after the change: a task
+    without a row yet, created before the counters, gets one counted from its
+    samples instead.
+    """
+    values = {TaskStats.updated_at: datetime.now()}
+    for state, delta in states.items():
+        if state in STATE_COUNTERS and delta:
+            column = getattr(TaskStats, STATE_COUNTERS[state])
+            values[column] = column + delta
+    total = sum(states.values())
+    if total:
+        values[TaskStats.total] = TaskStats.total + total
+    if annotated_count:
+        values[TaskStats.annotated_count] = TaskStats.annotated_count + annotated_count
+
+    query = db.query(TaskStats).filter(TaskStats.task_id == task_id)
+    if query.update(values, synchronize_session=False):
+        return
+    counted = count_from_samples(db=db, task_ids=[task_id])[task_id]
+    try:
+        with db.begin_nested():
+            db.add(counted)
+    except IntegrityError:
+        # a concurrent first change of the task stored the row first, it did
+        # not count this change
+        query.update(values, synchronize_session=False)
+
+
+def reconcile(db: Session, task_ids: Union[List[int], None] = None, batch_size: int = 500) -> List[int]:
+    """count the counters of the tasks again from their samples, all the tasks
+    by default, and store them
+
+    Returns the ids of the tasks whose stored counters were missing or wrong.
+    """
+    if task_ids is None:
+        task_ids = [row.id for row in db.query(Task.id).order_by(Task.id.asc()).all()]
+
+    drifted = []
+    for i in range(0, len(task_ids), batch_size):
+        chunk = task_ids[i : i + batch_size]
+        stored = {
+            row.task_id: row
+            for row in db.query(TaskStats).filter(TaskStats.task_id.in_(chunk)).all()
+        }
+        for task_id, counted in count_from_samples(db=db, task_ids=chunk).items():
+            row = stored.get(task_id)
+            if row is None:
+                db.add(counted)
+            elif any(getattr(row, c) != getattr(counted, c) for c in COUNTERS):
+                for c in COUNTERS:
+                    setattr(row, c, getattr(counted, c))
+            else:
+                continue
+            drifted.append(task_id)
+        db.flush()
+    return drifted
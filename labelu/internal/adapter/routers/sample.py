@@ -1,32 +1,57 @@
 from typing import List, Union
 
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, Query, status, Security
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Header, Query, Response, status, Security
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials
 
 from labelu.internal.common import db
 from labelu.internal.common.security import security
+from labelu.internal.common.converter import get_format
 from labelu.internal.common.error_code import ErrorCode
 from labelu.internal.common.error_code import LabelUException
 from labelu.internal.domain.models.user import User
 from labelu.internal.dependencies.user import get_current_user
 from labelu.internal.application.service import sample as service
+from labelu.internal.application.service import export_job as export_job_service
 from labelu.internal.application.command.sample import ExportType
 from labelu.internal.application.command.sample import PatchSampleCommand
+from labelu.internal.application.command.sample import PatchSampleObjectsCommand
+from labelu.internal.application.command.sample import SampleView
 from labelu.internal.application.command.sample import CreateSampleCommand
 from labelu.internal.application.command.sample import DeleteSampleCommand
 from labelu.internal.application.command.sample import ExportSampleCommand
 from labelu.internal.application.response.base import OkResp
-from labelu.internal.application.response.base import MetaData
+from labelu.internal.application.response.base import CursorMetaData
 from labelu.internal.application.response.base import CommonDataResp
-from labelu.internal.application.response.base import OkRespWithMeta
+from labelu.internal.application.response.base import OkRespWithCursor
 from labelu.internal.application.response.sample import SampleResponse
+from labelu.internal.application.response.sample import SampleVersionResponse
 from labelu.internal.application.response.sample import CreateSampleResponse
+from labelu.internal.application.response.export_job import ExportJobResponse
 
 
 router = APIRouter(prefix="/tasks", tags=["samples"])
 
+EXPORT_TOKEN_HEADER = "X-Export-Token"
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _if_match_version(if_match: Union[str, None]) -> Union[int, None]:
+    """the sample version an If-Match header asks for, None for any"""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise LabelUException(
+            code=ErrorCode.CODE_55005_SAMPLE_VERSION_CONFLICT,
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+
 
 @router.post(
     "/{task_id}/samples",
@@ -55,7 +80,7 @@ async def create(
 
 @router.get(
     "/{task_id}/samples",
-    response_model=OkRespWithMeta[List[SampleResponse]],
+    response_model=OkRespWithCursor[List[SampleResponse]],
     status_code=status.HTTP_200_OK,
 )
 async def list_by(
@@ -67,6 +92,12 @@ async def list_by(
     sort: Union[str, None] = Query(
         default=None, regex="(annotated_count|state|inner_id|updated_at):(desc|asc)"
     ),
+    cursor: Union[str, None] = Query(
+        default=None, description="meta_data next or prev of a previous page"
+    ),
+    view: SampleView = Query(
+        default=SampleView.FULL, description="summary leaves the data of the samples out"
+    ),
     authorization: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(db.get_db),
     current_user: User = Depends(get_current_user),
@@ -75,14 +106,14 @@ async def list_by(
     Get a annotation result.
     """
 
-    if len([i for i in (after, before, page) if i != None]) != 1:
+    if len([i for i in (after, before, page, cursor) if i != None]) != 1:
         raise LabelUException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             code=ErrorCode.CODE_55000_SAMPLE_LIST_PARAMETERS_ERROR,
         )
 
     # business logic
-    data, total = await service.list_by(
+    data, total, next_cursor, prev_cursor = await service.list_by(
         db=db,
         task_id=task_id,
         after=after,
@@ -90,11 +121,15 @@ async def list_by(
         page=page,
         size=size,
         sorting=sort,
+        cursor=cursor,
+        view=view,
     )
 
     # response
-    meta_data = MetaData(total=total, page=page, size=len(data))
-    return OkRespWithMeta[List[SampleResponse]](meta_data=meta_data, data=data)
+    meta_data = CursorMetaData(
+        total=total, page=page, size=len(data), next=next_cursor, prev=prev_cursor
+    )
+    return OkRespWithCursor[List[SampleResponse]](meta_data=meta_data, data=data)
 
 
 @router.get(
@@ -105,6 +140,7 @@ async def list_by(
 async def get(
     task_id: int,
     sample_id: int,
+    response: Response,
     authorization: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(db.get_db),
     current_user: User = Depends(get_current_user),
@@ -119,6 +155,7 @@ async def get(
     )
 
     # response
+    response.headers["ETag"] = _etag(data.version)
     return OkResp[SampleResponse](data=data)
 
 
@@ -131,23 +168,66 @@ async def update(
     task_id: int,
     sample_id: int,
     cmd: PatchSampleCommand,
+    response: Response,
+    if_match: Union[str, None] = Header(default=None),
     authorization: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(db.get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    update a annotation.
+    update a annotation, only at the version of If-Match when given.
     """
 
     # business logic
     data = await service.patch(
-        db=db, task_id=task_id, sample_id=sample_id, cmd=cmd, current_user=current_user
+        db=db,
+        task_id=task_id,
+        sample_id=sample_id,
+        cmd=cmd,
+        current_user=current_user,
+        version=_if_match_version(if_match),
     )
 
     # response
+    response.headers["ETag"] = _etag(data.version)
     return OkResp[SampleResponse](data=data)
 
 
+@router.patch(
+    "/{task_id}/samples/{sample_id}/objects",
+    response_model=OkResp[SampleVersionResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def update_objects(
+    task_id: int,
+    sample_id: int,
+    cmd: PatchSampleObjectsCommand,
+    response: Response,
+    if_match: Union[str, None] = Header(default=None),
+    authorization: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(db.get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    add, replace or remove annotation objects of a sample, only at the
+    version of If-Match when given, returns the new version.
+    """
+
+    # business logic
+    data = await service.patch_objects(
+        db=db,
+        task_id=task_id,
+        sample_id=sample_id,
+        cmd=cmd,
+        current_user=current_user,
+        version=_if_match_version(if_match),
+    )
+
+    # response
+    response.headers["ETag"] = _etag(data.version)
+    return OkResp[SampleVersionResponse](data=data)
+
+
 @router.delete(
     "/{task_id}/samples",
     response_model=OkResp[CommonDataResp],
@@ -180,25 +260,142 @@ async def export(
     task_id: int,
     export_type: ExportType,
     cmd: ExportSampleCommand,
+    since: Union[str, None] = Query(
+        default=None,
+        description="export token of a previous export, only changes after it are exported",
+    ),
+    stream: bool = Query(
+        default=False,
+        description="stream the zip archive while it is produced, streaming formats without since only",
+    ),
+    authorization: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(db.get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    export data, the X-Export-Token header is the since of the next delta export.
+    """
+
+    if stream and not since and get_format(export_type.value).streaming:
+        file_name, chunks, token = await service.export_stream(
+            db=db,
+            task_id=task_id,
+            export_type=export_type,
+            sample_ids=cmd.sample_ids,
+            options=cmd.options.dict(),
+        )
+        return StreamingResponse(
+            chunks,
+            media_type="application/zip",
+            headers={
+                "Content-Disposition": f'attachment; filename="{file_name}"',
+                EXPORT_TOKEN_HEADER: token,
+            },
+        )
+
+    # business logic
+    data, token = await service.export(
+        db=db,
+        task_id=task_id,
+        export_type=export_type,
+        sample_ids=cmd.sample_ids,
+        current_user=current_user,
+        since=since,
+        options=cmd.options.dict(),
+    )
+
+    # response
+    media_type = ".json" if data.suffix == ".json" else data.suffix.strip(".")
+    return FileResponse(
+        path=data,
+        filename=data.name,
+        media_type=f"application/{media_type}",
+        headers={EXPORT_TOKEN_HEADER: token},
+    )
+
+
+@router.post(
+    "/{task_id}/samples/export_jobs",
+    response_model=OkResp[ExportJobResponse],
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_export_job(
+    task_id: int,
+    export_type: ExportType,
+    cmd: ExportSampleCommand,
+    since: Union[str, None] = Query(
+        default=None,
+        description="export token of a previous export, only changes after it are exported",
+    ),
     authorization: HTTPAuthorizationCredentials = Security(security),
     db: Session = Depends(db.get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    export data.
+    export data in background, the progress is pushed to the task websocket.
     """
 
     # business logic
-    data = await service.export(
+    data = await export_job_service.submit(
         db=db,
         task_id=task_id,
         export_type=export_type,
         sample_ids=cmd.sample_ids,
         current_user=current_user,
+        since=since,
+        options=cmd.options.dict(),
     )
 
+    # response
+    return OkResp[ExportJobResponse](data=data)
+
+
+@router.get(
+    "/{task_id}/samples/export_jobs/{job_id}",
+    response_model=OkResp[ExportJobResponse],
+    status_code=status.HTTP_200_OK,
+)
+async def get_export_job(
+    task_id: int,
+    job_id: int,
+    authorization: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(db.get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Get an export job.
+    """
+
+    # business logic
+    data = await export_job_service.get(db=db, task_id=task_id, job_id=job_id)
+
+    # response
+    return OkResp[ExportJobResponse](data=data)
+
+
+@router.get(
+    "/{task_id}/samples/export_jobs/{job_id}/download",
+    status_code=status.HTTP_200_OK,
+)
+async def download_export_job(
+    task_id: int,
+    job_id: int,
+    authorization: HTTPAuthorizationCredentials = Security(security),
+    db: Session = Depends(db.get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Download the file of a finished export job.
+    """
+
+    # business logic
+    data, token = await export_job_service.download(db=db, task_id=task_id, job_id=job_id)
+
     # response
     media_type = ".json" if data.suffix == ".json" else data.suffix.strip(".")
     return FileResponse(
-        path=data, filename=data.name, media_type=f"application/{media_type}"
+        path=data,
+        filename=data.name,
+        media_type=f"application/{media_type}",
+        headers={EXPORT_TOKEN_HEADER: token},
     )
@@ -11,6 +11,13 @@ class TaskSampleWsPayload(BaseModel):
     user_id: int
     username: str
     sample_id: int
+
+
+class ExportJobWsPayload(BaseModel):
+    job_id: int
+    task_id: int
+    status: str
+    progress: int
     
 def get_task_sample_connection_payloads(conns: ConnectionData):
     if not conns:
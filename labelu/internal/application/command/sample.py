@@ -1,6 +1,6 @@
 from enum import Enum
-from typing import List, Union
-from pydantic import BaseModel, Field
+from typing import Dict, List, Union
+from pydantic import BaseModel, Field, validator
 
 from labelu.internal.domain.models.sample import SampleState
 
@@ -11,6 +11,7 @@ class ExportType(str, Enum):
     """
 
     JSON = "JSON"
+    JSONL = "JSONL"
     MASK = "MASK"
     COCO = "COCO"
     YOLO = "YOLO"
@@ -19,6 +20,62 @@ class ExportType(str, Enum):
     LABEL_ME = "LABEL_ME"
     TF_RECORD = "TF_RECORD"
     PASCAL_VOC = "PASCAL_VOC"
+    PARQUET = "PARQUET"
+
+
+class ImageDataMode(str, Enum):
+    """
+    how a LabelMe export carries the images
+    """
+
+    EMBED = "EMBED"
+    REFERENCE = "REFERENCE"
+
+
+class MaskMode(str, Enum):
+    """
+    what the pixels of a MASK export hold
+    """
+
+    INSTANCE = "INSTANCE"
+    SEMANTIC = "SEMANTIC"
+
+
+class SampleView(str, Enum):
+    """
+    how much of the samples a list returns, summary leaves their data out
+    """
+
+    FULL = "full"
+    SUMMARY = "summary"
+
+
+class CocoSegmentation(str, Enum):
+    """
+    how a COCO export writes the polygons
+    """
+
+    POLYGON = "POLYGON"
+    RLE = "RLE"
+
+
+class ExportOptions(BaseModel):
+    image_data: ImageDataMode = Field(
+        default=ImageDataMode.EMBED,
+        description="description: LabelMe only, EMBED writes the image in base64 to imageData, REFERENCE leaves imageData null and only keeps a relative imagePath",
+    )
+    bundle_images: bool = Field(
+        default=False,
+        description="description: LabelMe only, add the images to the archive under images/",
+    )
+    mask_mode: MaskMode = Field(
+        default=MaskMode.INSTANCE,
+        description="description: MASK only, INSTANCE numbers the polygons of every image, SEMANTIC writes palette PNGs of the class ids of the task labels with a classes.json",
+    )
+    coco_segmentation: CocoSegmentation = Field(
+        default=CocoSegmentation.POLYGON,
+        description="description: COCO only, POLYGON lists the points of the polygons, RLE run-length encodes their masks",
+    )
 
 
 class CreateSampleCommand(BaseModel):
@@ -52,9 +109,34 @@ class PatchSampleCommand(BaseModel):
     )
 
 
+class PatchSampleObjectsCommand(BaseModel):
+    upserts: Dict[str, List[dict]] = Field(
+        default_factory=dict,
+        description="description: annotation objects by tool, an object replaces the one of the same id or is added",
+    )
+    deletes: List[str] = Field(
+        default_factory=list, description="description: ids of the annotation objects to remove"
+    )
+    annotated_count: Union[int, None] = Field(
+        default=None,
+        description="description: annotate result count, the count of the objects of the result when None",
+    )
+
+    @validator("upserts")
+    def objects_have_id(cls, upserts):
+        for items in upserts.values():
+            if any(item.get("id") is None for item in items):
+                raise ValueError("every upserted object needs an id")
+        return upserts
+
+
 class ExportSampleCommand(BaseModel):
     sample_ids: Union[List[int], None] = Field(
         min_items=1,
         gt=0,
         description="description: sample id",
     )
+    options: ExportOptions = Field(
+        default_factory=ExportOptions,
+        description="description: format specific export options",
+    )
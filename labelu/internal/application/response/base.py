@@ -30,3 +30,13 @@ class OkResp(GenericModel, Generic[DataT]):
 class OkRespWithMeta(GenericModel, Generic[DataT]):
     meta_data: Union[MetaData, None] = None
     data: DataT
+
+
+class CursorMetaData(MetaData):
+    next: Union[str, None] = None
+    prev: Union[str, None] = None
+
+
+class OkRespWithCursor(GenericModel, Generic[DataT]):
+    meta_data: Union[CursorMetaData, None] = None
+    data: DataT
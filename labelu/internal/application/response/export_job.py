@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from typing import Union
+from pydantic import BaseModel, Field
+
+
+class ExportJobResponse(BaseModel):
+    id: Union[int, None] = Field(default=None, description="description: export job id")
+    task_id: Union[int, None] = Field(default=None, description="description: task id")
+    export_type: Union[str, None] = Field(
+        default=None, description="description: export file type"
+    )
+    since: Union[str, None] = Field(
+        default=None, description="description: export token the delta export started from"
+    )
+    token: Union[str, None] = Field(
+        default=None,
+        description="description: export token to pass as since to the next delta export",
+    )
+    status: Union[str, None] = Field(
+        default=None,
+        description="description: export job status: PENDING, RUNNING, SUCCESS, FAILED",
+    )
+    progress: Union[int, None] = Field(
+        default=0, description="description: export progress in percent"
+    )
+    error: Union[str, None] = Field(
+        default=None, description="description: error message of a failed export"
+    )
+    created_at: Union[datetime, None] = Field(
+        default=None, description="description: export job created at time"
+    )
+    finished_at: Union[datetime, None] = Field(
+        default=None, description="description: export job finished at time"
+    )
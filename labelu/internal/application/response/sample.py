@@ -12,6 +12,13 @@ class CreateSampleResponse(BaseModel):
     )
 
 
+class SampleVersionResponse(BaseModel):
+    id: Union[int, None] = Field(default=None, description="description: annotation id")
+    version: Union[int, None] = Field(
+        default=None, description="description: version of the sample after the update, its ETag"
+    )
+
+
 class SampleResponse(BaseModel):
     id: Union[int, None] = Field(default=None, description="description: annotation id")
     inner_id: Union[int, None] = Field(default=None, description="description: inner id of a sample in task")
@@ -32,6 +39,9 @@ class SampleResponse(BaseModel):
     annotated_count: Union[int, None] = Field(
         default=0, description="description: annotate result count"
     )
+    version: Union[int, None] = Field(
+        default=None, description="description: version of the sample, its ETag"
+    )
     created_at: Union[datetime, None] = Field(
         default=None, description="description: task created at time"
     )
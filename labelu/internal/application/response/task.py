@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from typing import Union
+from typing import Dict, Union
 from pydantic import BaseModel, EmailStr, Field
 
 from labelu.internal.application.response.base import UserResp
@@ -41,6 +41,9 @@ class TaskStatics(BaseModel):
     skipped: Union[int, None] = Field(
         default=0, description="description: count for task data skipped"
     )
+    labels: Union[Dict[str, int], None] = Field(
+        default=None, description="description: count of the annotation objects per label, task detail only"
+    )
 
 
 class TaskResponseWithStatics(TaskResponse):
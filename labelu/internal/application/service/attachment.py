@@ -9,6 +9,7 @@ from fastapi import status
 from sqlalchemy.orm import Session
 
 from labelu.internal.common.config import settings
+from labelu.internal.common.image import image_info
 from labelu.internal.common.error_code import ErrorCode
 from labelu.internal.common.error_code import LabelUException
 from labelu.internal.domain.models.user import User
@@ -89,12 +90,15 @@ async def create(
         )
 
     # create thumbnail for image
+    attachment_image_info = {}
     if cmd.file.content_type.startswith("image/"):
         tumbnail_full_path = Path(
             f"{attachment_full_path.parent}/{attachment_full_path.stem}-thumbnail{attachment_full_path.suffix}"
         )
         logger.info(tumbnail_full_path)
         image = Image.open(attachment_full_path)
+        # kept for the exports, so that they do not decode the image again
+        attachment_image_info = image_info(image)
         image.thumbnail(
             (
                 round(image.width / image.height * settings.THUMBNAIL_HEIGH_PIXEL),
@@ -133,6 +137,7 @@ async def create(
                 created_by=current_user.id,
                 updated_by=current_user.id,
                 task_id=task_id,
+                **attachment_image_info,
             ),
         )
 
@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from loguru import logger
+from fastapi import status
+from sqlalchemy.orm import Session, sessionmaker
+
+from labelu.internal.common.error_code import ErrorCode
+from labelu.internal.common.error_code import LabelUException
+from labelu.internal.common.export_token import decode_export_token
+from labelu.internal.common.websocket import Message, MessageType
+from labelu.internal.adapter.persistence import crud_export_job, crud_task
+from labelu.internal.adapter.ws.sample import ExportJobWsPayload
+from labelu.internal.domain.models.user import User
+from labelu.internal.domain.models.export_job import ExportJob
+from labelu.internal.domain.models.export_job import ExportJobStatus
+from labelu.internal.application.command.sample import ExportType
+from labelu.internal.application.response.export_job import ExportJobResponse
+from labelu.internal.application.service import sample as sample_service
+from labelu.internal.clients.export import exportWorkerPool
+from labelu.internal.clients.ws import sampleConnectionManager
+
+
+def _worker() -> str:
+    """the process running the jobs it submits, as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _is_stale(worker: Union[str, None]) -> bool:
+    """whether the worker of an unfinished job is gone, checked at startup, the
+    workers on other hosts are left to their own restart"""
+    if worker is None:
+        return True
+    host, _, pid = worker.rpartition(":")
+    if host != socket.gethostname():
+        return False
+    if not pid.isdigit() or int(pid) == os.getpid():
+        # an earlier process with the same pid, this one has not submitted any job yet
+        return True
+    if os.name != "posix":
+        # no cheap liveness check, a single server process per host is assumed
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _to_response(job: ExportJob) -> ExportJobResponse:
+    return ExportJobResponse(
+        id=job.id,
+        task_id=job.task_id,
+        export_type=job.export_type,
+        since=job.since,
+        token=job.token,
+        status=job.status,
+        progress=job.progress,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+async def submit(
+    db: Session,
+    task_id: int,
+    export_type: ExportType,
+    sample_ids: List[int],
+    current_user: User,
+    since: Union[str, None] = None,
+    options: Union[dict, None] = None,
+) -> ExportJobResponse:
+
+    task = crud_task.get(db=db, task_id=task_id)
+    if not task:
+        logger.error("cannot find task:{}", task_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_50002_TASK_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    if since:
+        # reject a bad token now rather than in the failed job
+        decode_export_token(since, task_id)
+
+    with db.begin():
+        job = crud_export_job.create(
+            db=db,
+            export_job=ExportJob(
+                task_id=task_id,
+                export_type=export_type.value,
+                sample_ids=json.dumps(sample_ids),
+                since=since,
+                options=json.dumps(options or {}),
+                status=ExportJobStatus.PENDING.value,
+                progress=0,
+                worker=_worker(),
+                created_by=current_user.id,
+            ),
+        )
+
+    # the job runs in a worker thread with its own session on the same database
+    session_factory = sessionmaker(autocommit=True, autoflush=False, bind=db.get_bind())
+    future = exportWorkerPool.submit(
+        _run,
+        session_factory=session_factory,
+        loop=asyncio.get_running_loop(),
+        job_id=job.id,
+    )
+    if future is None:
+        with db.begin():
+            job = crud_export_job.update(
+                db=db,
+                db_obj=job,
+                obj_in={
+                    ExportJob.status.key: ExportJobStatus.FAILED.value,
+                    ExportJob.error.key: ErrorCode.CODE_61003_EXPORT_JOB_QUEUE_FULL.value[1],
+                    ExportJob.finished_at.key: datetime.now(),
+                },
+            )
+        raise LabelUException(
+            code=ErrorCode.CODE_61003_EXPORT_JOB_QUEUE_FULL,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    # response
+    return _to_response(job)
+
+
+def _get_job(db: Session, task_id: int, job_id: int) -> ExportJob:
+    job = crud_export_job.get(db=db, export_job_id=job_id)
+    if not job or job.task_id != task_id:
+        logger.error("cannot find export job:{}", job_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_61001_EXPORT_JOB_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    return job
+
+
+async def get(db: Session, task_id: int, job_id: int) -> ExportJobResponse:
+    return _to_response(_get_job(db=db, task_id=task_id, job_id=job_id))
+
+
+async def download(db: Session, task_id: int, job_id: int) -> Tuple[Path, str]:
+    job = _get_job(db=db, task_id=task_id, job_id=job_id)
+    if job.status != ExportJobStatus.SUCCESS.value:
+        logger.error("export job:{} is not finished, status:{}", job_id, job.status)
+        raise LabelUException(
+            code=ErrorCode.CODE_61002_EXPORT_JOB_NOT_FINISHED,
+            status_code=status.HTTP_409_CONFLICT,
+        )
+
+    file_full_path = Path(job.file_path)
+    if not file_full_path.exists():
+        # the export cache evicted the file since the job finished
+        logger.error("exported file of export job:{} expired:{}", job_id, file_full_path)
+        raise LabelUException(
+            code=ErrorCode.CODE_61006_EXPORT_JOB_EXPIRED,
+            status_code=status.HTTP_410_GONE,
+        )
+
+    return file_full_path, job.token
+
+
+def recover(db: Session) -> None:
+    """fail the jobs interrupted by a restart, their worker threads are gone
+
+    Only the jobs of the processes gone from this host are failed, the jobs of
+    the other live server processes keep running.
+    """
+    with db.begin():
+        workers = [worker for worker in crud_export_job.unfinished_workers(db=db) if _is_stale(worker)]
+        count = (
+            crud_export_job.fail_unfinished(db=db, error="Interrupted by a server restart", workers=workers)
+            if workers
+            else 0
+        )
+    if count:
+        logger.warning("{} unfinished export jobs marked as failed", count)
+
+
+def _notify(loop: asyncio.AbstractEventLoop, job: ExportJob) -> None:
+    # tell the clients in the task page how the export goes
+    message = Message(
+        type=MessageType.EXPORT,
+        data=ExportJobWsPayload(
+            job_id=job.id,
+            task_id=job.task_id,
+            status=job.status,
+            progress=job.progress,
+        ),
+    )
+    try:
+        asyncio.run_coroutine_threadsafe(
+            sampleConnectionManager.send_message(client_id=f"task_{job.task_id}", message=message),
+            loop,
+        )
+    except RuntimeError as e:
+        logger.warning("cannot notify export job:{} progress: {}", job.id, e)
+
+
+def _run(session_factory: sessionmaker, loop: asyncio.AbstractEventLoop, job_id: int) -> None:
+    # job updates commit in their own session, a commit would expire the
+    # samples the converter is still reading in the export session
+    db = session_factory()
+    export_db = session_factory()
+    try:
+        job = crud_export_job.get(db=db, export_job_id=job_id)
+        with db.begin():
+            job = crud_export_job.update(
+                db=db, db_obj=job, obj_in={ExportJob.status.key: ExportJobStatus.RUNNING.value}
+            )
+        _notify(loop, job)
+
+        def on_progress(converted: int, total: int) -> None:
+            nonlocal job
+            progress = converted * 100 // total if total else 100
+            # the exported file is not written yet when every sample is converted
+            progress = min(progress, 99)
+            if progress == job.progress:
+                return
+            with db.begin():
+                job = crud_export_job.update(
+                    db=db, db_obj=job, obj_in={ExportJob.progress.key: progress}
+                )
+            _notify(loop, job)
+
+        try:
+            file_full_path, token = sample_service.export_file(
+                db=export_db,
+                task_id=job.task_id,
+                export_type=ExportType(job.export_type),
+                sample_ids=json.loads(job.sample_ids),
+                on_progress=on_progress,
+                since=job.since,
+                options=json.loads(job.options or "{}"),
+            )
+            obj_in = {
+                ExportJob.status.key: ExportJobStatus.SUCCESS.value,
+                ExportJob.progress.key: 100,
+                ExportJob.file_path.key: str(file_full_path),
+                ExportJob.token.key: token,
+            }
+        except Exception as e:
+            logger.exception("export job:{} failed", job_id)
+            obj_in = {
+                ExportJob.status.key: ExportJobStatus.FAILED.value,
+                ExportJob.error.key: e.msg if isinstance(e, LabelUException) else str(e),
+            }
+
+        obj_in[ExportJob.finished_at.key] = datetime.now()
+        with db.begin():
+            job = crud_export_job.update(db=db, db_obj=job, obj_in=obj_in)
+        _notify(loop, job)
+    finally:
+        export_db.close()
+        db.close()
@@ -1,4 +1,3 @@
-import json
 import os
 from pathlib import Path
 from typing import List, Tuple, Optional
@@ -7,6 +6,7 @@ from loguru import logger
 from fastapi import status
 from sqlalchemy.orm import Session
 
+from labelu.internal.common import json_codec
 from labelu.internal.common.config import settings
 from labelu.internal.common.error_code import ErrorCode
 from labelu.internal.common.error_code import LabelUException
@@ -35,16 +35,16 @@ def read_pre_annotation_file(attachment: TaskAttachment) -> List[dict]:
         return []
 
     try:
+        # read as bytes, the codec parses utf-8 without decoding it first
         if attachment.filename.endswith('.jsonl'):
-            with open(file_full_path, "r", encoding="utf-8") as f:
-                data = f.readlines()
-                return [json.loads(line) for line in data]
+            with open(file_full_path, "rb") as f:
+                return [json_codec.loads(line) for line in f]
         else:
-            with open(file_full_path, "r", encoding="utf-8") as f:    
+            with open(file_full_path, "rb") as f:
                 # parse result
-                parsed_data = json.load(f)
+                parsed_data = json_codec.loads(f.read())
                 
-                return [{**item, "result": json.loads(item["result"])} for item in parsed_data]
+                return [{**item, "result": json_codec.loads(item["result"])} for item in parsed_data]
     
     except FileNotFoundError:
         raise LabelUException(status_code=404, code=ErrorCode.CODE_51001_TASK_ATTACHMENT_NOT_FOUND)
@@ -82,7 +82,7 @@ async def create(
                         task_id=task_id,
                         file_id=pre_annotation.file_id,
                         sample_name=sample_name,
-                        data=json.dumps(_item, ensure_ascii=False),
+                        data=json_codec.dumps(_item),
                         created_by=current_user.id,
                         updated_by=current_user.id,
                     )
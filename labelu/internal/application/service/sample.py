@@ -1,21 +1,33 @@
-import json
 import os
+import shutil
 import uuid
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Tuple, Union
+from typing import Callable, Iterable, Iterator, List, Tuple, Union
 
 from pathlib import Path
 from loguru import logger
 from fastapi import status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
 
+from labelu.internal.common.annotation import annotation_rows, apply_object_changes, count_objects, sample_result
+from labelu.internal.common import json_codec
 from labelu.internal.common.config import settings
-from labelu.internal.common.converter import converter
+from labelu.internal.common.converter import converter, zip_file_name
+from labelu.internal.common.export_cache import export_cache_key
+from labelu.internal.common.export_token import decode_export_token
+from labelu.internal.common.export_token import encode_export_token
+from labelu.internal.common.sample_cursor import decode_sample_cursor, encode_sample_cursor, sort_order
+from labelu.internal.common.task_config_index import TaskConfigIndex
+from labelu.internal.common.zip_stream import ChunkStream, StreamCancelled, TeeStream, ZipStream
 from labelu.internal.common.error_code import ErrorCode
 from labelu.internal.common.error_code import LabelUException
 from labelu.internal.adapter.persistence import crud_attachment, crud_pre_annotation, crud_task
 from labelu.internal.adapter.persistence import crud_sample
-from labelu.internal.domain.models.pre_annotation import TaskPreAnnotation
+from labelu.internal.adapter.persistence import crud_annotation
+from labelu.internal.adapter.persistence import crud_task_stats
 from labelu.internal.domain.models.user import User
 from labelu.internal.domain.models.task import Task
 from labelu.internal.domain.models.task import TaskStatus
@@ -23,28 +35,59 @@ from labelu.internal.domain.models.sample import TaskSample
 from labelu.internal.domain.models.sample import SampleState
 from labelu.internal.application.command.sample import ExportType
 from labelu.internal.application.command.sample import PatchSampleCommand
+from labelu.internal.application.command.sample import PatchSampleObjectsCommand
+from labelu.internal.application.command.sample import SampleView
 from labelu.internal.application.command.sample import CreateSampleCommand
 from labelu.internal.application.response.base import UserResp
 from labelu.internal.application.response.base import CommonDataResp
 from labelu.internal.application.response.sample import CreateSampleResponse
 from labelu.internal.application.response.sample import SampleResponse
+from labelu.internal.application.response.sample import SampleVersionResponse
 from labelu.internal.application.response.attachment import AttachmentResponse
 from labelu.internal.clients.ws import sampleConnectionManager
+from labelu.internal.clients.export import exportCache, exportStreamPool, taskConfigIndexCache
 from labelu.internal.common.websocket import Message, MessageType
 from labelu.internal.adapter.ws.sample import TaskSampleWsPayload
 
-def is_sample_pre_annotated(db: Session, task_id: int, sample_name: str | None = None) -> Tuple[List[TaskPreAnnotation], int]:
+def is_sample_pre_annotated(db: Session, task_id: int, sample_name: str | None = None) -> bool:
     if sample_name is None:
         return False
-    
-    _, total = crud_pre_annotation.list_by(
-        db=db,
-        task_id=task_id,
-        sample_name=sample_name,
-        size=1,
+
+    return sample_name in crud_pre_annotation.pre_annotated_names(
+        db=db, task_id=task_id, sample_names=[sample_name]
     )
-    
-    return total > 0
+
+def _check_version(sample: TaskSample, version: Union[int, None]) -> None:
+    if version is not None and sample.version != version:
+        logger.error("sample:{} is at version:{}, not:{}", sample.id, sample.version, version)
+        raise LabelUException(
+            code=ErrorCode.CODE_55005_SAMPLE_VERSION_CONFLICT,
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+
+
+@contextmanager
+def _version_conflict(sample_id: int):
+    # the sample was updated by someone else between its read and its update
+    try:
+        yield
+    except StaleDataError:
+        logger.error("sample:{} was updated concurrently", sample_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_55005_SAMPLE_VERSION_CONFLICT,
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+        )
+
+
+def _annotation_rows(data: Union[dict, None]) -> List[dict]:
+    """the task_annotation rows of the data of a sample, none for a result
+    that is not json: it is saved as it is, as before"""
+    try:
+        return annotation_rows(sample_result(data))
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.warning("cannot read the annotation objects of a sample result: {}", e)
+        return []
+
 
 async def create(
     db: Session, task_id: int, cmd: List[CreateSampleCommand], current_user: User
@@ -67,7 +110,7 @@ async def create(
                 file_id=sample.file_id,
                 created_by=current_user.id,
                 updated_by=current_user.id,
-                data=json.dumps(sample.data, ensure_ascii=False),
+                data=json_codec.dumps(sample.data),
             )
             for i, sample in enumerate(cmd)
         ]
@@ -76,6 +119,16 @@ async def create(
             obj_in[Task.status.key] = TaskStatus.IMPORTED
         crud_task.update(db=db, db_obj=task, obj_in=obj_in)
         new_samples = crud_sample.batch(db=db, samples=samples)
+        # new samples have no annotation rows yet, all of them are inserted at once
+        crud_annotation.insert(
+            db=db,
+            rows=[
+                {**row, "task_id": task_id, "sample_id": new_sample.id}
+                for sample, new_sample in zip(cmd, new_samples)
+                for row in _annotation_rows(sample.data)
+            ],
+        )
+        crud_task_stats.apply(db=db, task_id=task_id, states={SampleState.NEW.value: len(new_samples)})
 
     # response
     ids = [s.id for s in new_samples]
@@ -90,28 +143,90 @@ async def list_by(
     page: Union[int, None],
     size: int,
     sorting: Union[str, None],
-) -> Tuple[List[SampleResponse], int]:
-    samples = crud_sample.list_by(
+    cursor: Union[str, None] = None,
+    view: SampleView = SampleView.FULL,
+) -> Tuple[List[SampleResponse], int, Union[str, None], Union[str, None]]:
+    """a page of samples with the cursors of the next and previous pages
+
+    The cursors are set on the pages of page and cursor whenever the sorting
+    can be walked by a cursor, a cursor page costs the same whatever its
+    depth. The summary view neither
+    reads nor returns the data of the samples.
+    """
+    with_data = view == SampleView.FULL
+    if task_id:
+        total = crud_task_stats.get(db=db, task_id=task_id).total
+    else:
+        total = crud_sample.count(db=db, task_id=task_id)
+
+    if cursor is not None:
+        sample_cursor = decode_sample_cursor(cursor, task_id=task_id, sorting=sorting)
+        sorting = sample_cursor.sorting
+        sort_key, ascending = sort_order(sorting)
+        samples = crud_sample.list_by_cursor(
+            db=db,
+            task_id=task_id,
+            sort_key=sort_key,
+            ascending=ascending != sample_cursor.backward,
+            position=(sample_cursor.value, sample_cursor.sample_id),
+            size=size + 1,
+            with_data=with_data,
+        )
+        has_more = len(samples) > size
+        samples = samples[:size]
+        if sample_cursor.backward:
+            samples.reverse()
+        has_next = has_more or sample_cursor.backward
+        has_prev = has_more or not sample_cursor.backward
+    else:
+        samples = crud_sample.list_by(
+            db=db,
+            task_id=task_id,
+            after=after,
+            before=before,
+            page=page,
+            size=size,
+            sorting=sorting,
+            with_data=with_data,
+        )
+        if page is not None:
+            has_next = page * size + len(samples) < total
+            has_prev = page > 0
+        else:
+            # after and before page on the id alone, not in the cursor order
+            has_next = has_prev = False
+
+    next_cursor = prev_cursor = None
+    order = sort_order(sorting)
+    if task_id and samples and order:
+        sort_key = order[0]
+        if has_next:
+            last = samples[-1]
+            next_cursor = encode_sample_cursor(
+                task_id, sorting, getattr(last, sort_key) if sort_key else None, last.id, backward=False
+            )
+        if has_prev:
+            first = samples[0]
+            prev_cursor = encode_sample_cursor(
+                task_id, sorting, getattr(first, sort_key) if sort_key else None, first.id, backward=True
+            )
+
+    pre_annotated = crud_pre_annotation.pre_annotated_names(
         db=db,
         task_id=task_id,
-        after=after,
-        before=before,
-        page=page,
-        size=size,
-        sorting=sorting,
+        sample_names=[sample.file.filename for sample in samples if sample.file],
     )
 
-    total = crud_sample.count(db=db, task_id=task_id)
-
     # response
     return [
         SampleResponse(
             id=sample.id,
             inner_id=sample.inner_id,
             state=sample.state,
-            data=json.loads(sample.data),
+            data=json_codec.loads(sample.data) if with_data else None,
             annotated_count=sample.annotated_count,
-            is_pre_annotated=is_sample_pre_annotated(db=db, task_id=task_id, sample_name=sample.file.filename if sample.file else None),
+            version=sample.version,
+            is_pre_annotated=bool(sample.file) and sample.file.filename in pre_annotated,
             file=AttachmentResponse(id=sample.file.id, filename=sample.file.filename, url=sample.file.url) if sample.file else None,
             created_at=sample.created_at,
             created_by=UserResp(
@@ -125,7 +240,7 @@ async def list_by(
             ) for updater in sample.updaters],
         )
         for sample in samples
-    ], total
+    ], total, next_cursor, prev_cursor
 
 
 async def get(
@@ -148,10 +263,11 @@ async def get(
         id=sample.id,
         inner_id=sample.inner_id,
         state=sample.state,
-        data=json.loads(sample.data),
+        data=json_codec.loads(sample.data),
         is_pre_annotated=is_sample_pre_annotated(db=db, task_id=task_id, sample_name=sample.file.filename if sample.file else None),
         file=AttachmentResponse(id=sample.file.id, filename=sample.file.filename, url=sample.file.url) if sample.file else None,
         annotated_count=sample.annotated_count,
+        version=sample.version,
         created_at=sample.created_at,
         created_by=UserResp(
             id=sample.owner.id,
@@ -171,6 +287,7 @@ async def patch(
     sample_id: int,
     cmd: PatchSampleCommand,
     current_user: User,
+    version: Union[int, None] = None,
 ) -> SampleResponse:
 
     # check task exist
@@ -191,27 +308,33 @@ async def patch(
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
+    _check_version(sample=sample, version=version)
+
     # update
     sample_obj_in = {}
     if cmd.state == SampleState.SKIPPED.value:
         sample_obj_in[TaskSample.state.key] = SampleState.SKIPPED.value
     elif cmd.state == SampleState.NEW.value:
-        sample_obj_in[TaskSample.data.key] = json.dumps(cmd.data, ensure_ascii=False)
+        sample_obj_in[TaskSample.data.key] = json_codec.dumps(cmd.data)
         sample_obj_in[TaskSample.annotated_count.key] = cmd.annotated_count
         sample_obj_in[TaskSample.state.key] = SampleState.NEW.value
     else:  # can be None, or DONE
-        sample_obj_in[TaskSample.data.key] = json.dumps(cmd.data, ensure_ascii=False)
+        sample_obj_in[TaskSample.data.key] = json_codec.dumps(cmd.data)
         sample_obj_in[TaskSample.annotated_count.key] = cmd.annotated_count
         sample_obj_in[TaskSample.state.key] = SampleState.DONE.value
 
-    with db.begin():
+    # the counters move from the current state of the sample to the new one
+    states = Counter({sample.state: -1})
+    states[sample_obj_in[TaskSample.state.key]] += 1
+    annotated_count_delta = (
+        sample_obj_in.get(TaskSample.annotated_count.key, sample.annotated_count) or 0
+    ) - (sample.annotated_count or 0)
+
+    with _version_conflict(sample_id=sample_id), db.begin():
         # update task status
         if task.status != TaskStatus.FINISHED.value:
-            statics = crud_sample.statics(
-                db=db, task_ids=[task_id]
-            )
             task_obj_in = {Task.status.key: TaskStatus.INPROGRESS.value}
-            new_sample_cnt = statics.get(f"{task.id}_{SampleState.NEW.value}", 0)
+            new_sample_cnt = crud_task_stats.get(db=db, task_id=task_id).new
             if new_sample_cnt == 0 or (
                 new_sample_cnt == 1 and sample.state == SampleState.NEW.value
             ):
@@ -223,6 +346,14 @@ async def patch(
             sample.updaters.append(current_user)
         # update task sample result
         updated_sample = crud_sample.update(db=db, db_obj=sample, obj_in=sample_obj_in)
+        # one row per annotation object, in the same transaction
+        if TaskSample.data.key in sample_obj_in:
+            crud_annotation.replace(
+                db=db, task_id=task_id, sample_id=sample_id, rows=_annotation_rows(cmd.data)
+            )
+        crud_task_stats.apply(
+            db=db, task_id=task_id, states=states, annotated_count=annotated_count_delta
+        )
     
     # tell other clients in the same sample page to refresh data
     await sampleConnectionManager.send_message(
@@ -243,9 +374,10 @@ async def patch(
         id=updated_sample.id,
         inner_id=updated_sample.inner_id,
         state=updated_sample.state,
-        data=json.loads(updated_sample.data),
+        data=json_codec.loads(updated_sample.data),
         is_pre_annotated=is_sample_pre_annotated(db=db, task_id=task_id, sample_name=sample.file.filename if sample.file else None),
         annotated_count=updated_sample.annotated_count,
+        version=updated_sample.version,
         created_at=updated_sample.created_at,
         created_by=UserResp(
             id=updated_sample.owner.id,
@@ -259,6 +391,96 @@ async def patch(
     )
 
 
+async def patch_objects(
+    db: Session,
+    task_id: int,
+    sample_id: int,
+    cmd: PatchSampleObjectsCommand,
+    current_user: User,
+    version: Union[int, None] = None,
+) -> SampleVersionResponse:
+    """apply the object changes of cmd to the result of a sample
+
+    Only the changed objects are sent and their rows in task_annotation
+    rewritten, the state of the sample and the status of the task are left
+    to the full patch.
+    """
+
+    # check task exist
+    task = crud_task.get(db=db, task_id=task_id)
+    if not task:
+        logger.error("cannot find task:{}", task_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_50002_TASK_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    # get sample
+    sample = crud_sample.get(db=db, sample_id=sample_id)
+    if not sample:
+        logger.error("cannot find sample:{}", sample_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_55001_SAMPLE_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+    _check_version(sample=sample, version=version)
+
+    # apply the changes to the stored result
+    try:
+        data = json_codec.loads(sample.data) if sample.data else {}
+        result = apply_object_changes(sample_result(data), cmd.upserts, cmd.deletes)
+    except (ValueError, TypeError, AttributeError) as e:
+        logger.error("cannot apply object changes to the result of sample:{}: {}", sample_id, e)
+        raise LabelUException(
+            code=ErrorCode.CODE_55002_SAMPLE_FORMAT_ERROR,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+    data["result"] = json_codec.dumps(result)
+    annotated_count = count_objects(result) if cmd.annotated_count is None else cmd.annotated_count
+    annotated_count_delta = annotated_count - (sample.annotated_count or 0)
+    changed_ids = [
+        *cmd.deletes,
+        *(str(item["id"]) for items in cmd.upserts.values() for item in items),
+    ]
+
+    with _version_conflict(sample_id=sample_id), db.begin():
+        if current_user not in sample.updaters:
+            sample.updaters.append(current_user)
+        updated_sample = crud_sample.update(
+            db=db,
+            db_obj=sample,
+            obj_in={
+                TaskSample.data.key: json_codec.dumps(data),
+                TaskSample.annotated_count.key: annotated_count,
+            },
+        )
+        crud_annotation.replace_objects(
+            db=db,
+            task_id=task_id,
+            sample_id=sample_id,
+            object_ids=changed_ids,
+            rows=annotation_rows({tool: {"result": items} for tool, items in cmd.upserts.items()}),
+        )
+        crud_task_stats.apply(db=db, task_id=task_id, states={}, annotated_count=annotated_count_delta)
+
+    # tell other clients in the same sample page to refresh data
+    await sampleConnectionManager.send_message(
+        client_id=f"task_{task_id}",
+        message=Message(
+            type=MessageType.UPDATE,
+            data=TaskSampleWsPayload(
+                task_id=task_id,
+                user_id=current_user.id,
+                username=current_user.username,
+                sample_id=sample_id,
+            )
+        )
+    )
+
+    # response
+    return SampleVersionResponse(id=updated_sample.id, version=updated_sample.version)
+
+
 async def delete(
     db: Session, sample_ids: List[int], current_user: User
 ) -> CommonDataResp:
@@ -277,6 +499,19 @@ async def delete(
             os.remove(file_full_path)
         
         crud_sample.delete(db=db, sample_ids=sample_ids)
+
+        # the deleted samples leave the counters of their tasks
+        for task_id in {sample.task_id for sample in samples}:
+            task_samples = [sample for sample in samples if sample.task_id == task_id]
+            states = Counter()
+            for sample in task_samples:
+                states[sample.state] -= 1
+            crud_task_stats.apply(
+                db=db,
+                task_id=task_id,
+                states=states,
+                annotated_count=-sum(sample.annotated_count or 0 for sample in task_samples),
+            )
     # response
     return CommonDataResp(ok=True)
 
@@ -287,18 +522,95 @@ async def export(
     export_type: ExportType,
     sample_ids: List[int],
     current_user: User,
-) -> str:
+    since: Union[str, None] = None,
+    options: Union[dict, None] = None,
+) -> Tuple[Path, str]:
+
+    # response
+    return export_file(
+        db=db,
+        task_id=task_id,
+        export_type=export_type,
+        sample_ids=sample_ids,
+        since=since,
+        options=options,
+    )
+
+
+def export_file(
+    db: Session,
+    task_id: int,
+    export_type: ExportType,
+    sample_ids: List[int],
+    on_progress: Union[Callable[[int, int], None], None] = None,
+    since: Union[str, None] = None,
+    options: Union[dict, None] = None,
+) -> Tuple[Path, str]:
+    """convert the samples to export_type, return the exported file path and
+    the export token to pass as since to the next export
+
+    Args:
+        on_progress (Callable, optional): called with (converted, total) as the
+            converter consumes the samples
+        since (str, optional): export token of a previous export, only the
+            samples created, updated or deleted after it are exported, the
+            export is then packed with a deleted.json tombstone list
+        options (dict, optional): format options passed to the converter
+    """
 
     task = crud_task.get(db=db, task_id=task_id)
-    samples = crud_sample.get_by_ids(db=db, sample_ids=sample_ids)
-    data = []
-    for sample in samples:
-       data_dict = sample.__dict__.get('data')
-       if data_dict is None:
-           data_dict = {}
-       file_dict = sample.file.__dict__ if hasattr(sample.file, '__dict__') else {}
-       data.append({ **sample.__dict__, 'file': file_dict})
-       
+    if not task:
+        logger.error("cannot find task:{}", task_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_50002_TASK_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    since_watermark = decode_export_token(since, task_id) if since else None
+    # taken before reading the samples, a change committed during the export
+    # is exported again next time rather than missed, and a change not
+    # committed yet gets a greater change sequence number than the watermark
+    token = encode_export_token(
+        task_id, crud_sample.export_watermark(db=db, task_id=task_id, sample_ids=sample_ids)
+    )
+
+    # reuse the archive of an unchanged export
+    cache_key = None
+    if settings.EXPORT_CACHE_ENABLED:
+        total, max_updated_at = crud_sample.export_fingerprint(
+            db=db, task_id=task_id, sample_ids=sample_ids, since=since_watermark
+        )
+        cache_key = export_cache_key(
+            task_id=task_id,
+            export_type=export_type.value,
+            config=task.config,
+            sample_ids=sample_ids,
+            sample_count=total,
+            max_updated_at=max_updated_at,
+            since=since,
+            watermark=token,
+            options=options,
+        )
+        cached_file = exportCache.get(cache_key)
+        if cached_file:
+            if on_progress:
+                on_progress(total, total)
+            return cached_file, token
+    elif on_progress:
+        total = crud_sample.count_for_export(
+            db=db, task_id=task_id, sample_ids=sample_ids, since=since_watermark
+        )
+
+    # converters consume samples one by one, do not build the whole list
+    data = crud_sample.iter_for_export(
+        db=db,
+        task_id=task_id,
+        sample_ids=sample_ids,
+        since=since_watermark,
+        batch_size=settings.EXPORT_QUERY_BATCH_SIZE,
+    )
+    if on_progress:
+        data = _track_progress(data, total=total, on_progress=on_progress)
 
     # output data path
     out_data_dir = Path(settings.MEDIA_ROOT).joinpath(
@@ -308,12 +620,195 @@ async def export(
 
     # converter to export_type
     file_full_path = converter.convert(
-        config=json.loads(task.config),
+        config=json_codec.loads(task.config),
         input_data=data,
         out_data_dir=out_data_dir,
         out_data_file_name_prefix=task_id,
         format=export_type.value,
+        options=options,
+        index=taskConfigIndexCache.get(task_id, task.config),
     )
+    if since_watermark is not None:
+        file_full_path = _pack_delta(
+            file_full_path=Path(file_full_path),
+            export_type=export_type,
+            task_id=task_id,
+            since=since,
+            token=token,
+            deleted=crud_sample.deleted_ids_for_export(
+                db=db, task_id=task_id, sample_ids=sample_ids, since=since_watermark
+            ),
+        )
+    if not cache_key:
+        return file_full_path, token
 
-    # response
-    return file_full_path
\ No newline at end of file
+    # keep the archive only, the intermediate files are not needed anymore
+    file_full_path = exportCache.put(cache_key, Path(file_full_path))
+    shutil.rmtree(out_data_dir, ignore_errors=True)
+    return file_full_path, token
+
+
+async def export_stream(
+    db: Session,
+    task_id: int,
+    export_type: ExportType,
+    sample_ids: List[int],
+    options: Union[dict, None] = None,
+) -> Tuple[str, Iterator[bytes], str]:
+    """stream the zip archive of a zip format while it is being produced
+
+    Returns the archive file name, the chunks of the archive and the export
+    token. A cached archive is read back instead of converting again, and the
+    archive streamed is copied to the export cache as it is produced, so the
+    next stream of the same export is served from the cache.
+    """
+
+    task = crud_task.get(db=db, task_id=task_id)
+    if not task:
+        logger.error("cannot find task:{}", task_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_50002_TASK_NOT_FOUND,
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
+
+    token = encode_export_token(
+        task_id, crud_sample.export_watermark(db=db, task_id=task_id, sample_ids=sample_ids)
+    )
+    file_name = zip_file_name(export_type.value, task_id)
+
+    cache_key = None
+    if settings.EXPORT_CACHE_ENABLED:
+        total, max_updated_at = crud_sample.export_fingerprint(
+            db=db, task_id=task_id, sample_ids=sample_ids
+        )
+        cache_key = export_cache_key(
+            task_id=task_id,
+            export_type=export_type.value,
+            config=task.config,
+            sample_ids=sample_ids,
+            sample_count=total,
+            max_updated_at=max_updated_at,
+            watermark=token,
+            options=options,
+        )
+        cached_file = exportCache.get(cache_key)
+        if cached_file:
+            return file_name, _read_chunks(cached_file), token
+
+    sink = ChunkStream()
+    # the archive is produced in a worker thread with its own session
+    session_factory = sessionmaker(autocommit=True, autoflush=False, bind=db.get_bind())
+    future = exportStreamPool.submit(
+        _produce_stream,
+        session_factory=session_factory,
+        sink=sink,
+        file_name=file_name,
+        cache_key=cache_key,
+        task_id=task_id,
+        config=json_codec.loads(task.config),
+        index=taskConfigIndexCache.get(task_id, task.config),
+        export_type=export_type,
+        sample_ids=sample_ids,
+        options=options,
+    )
+    if future is None:
+        raise LabelUException(
+            code=ErrorCode.CODE_61003_EXPORT_JOB_QUEUE_FULL,
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    return file_name, iter(sink), token
+
+
+def _produce_stream(
+    session_factory: sessionmaker,
+    sink: ChunkStream,
+    file_name: str,
+    cache_key: Union[str, None],
+    task_id: int,
+    config: dict,
+    index: TaskConfigIndex,
+    export_type: ExportType,
+    sample_ids: List[int],
+    options: Union[dict, None] = None,
+) -> None:
+    db = session_factory()
+    # the archive is copied to a file put in the export cache once complete
+    out_data_dir = Path(settings.MEDIA_ROOT).joinpath(
+        settings.EXPORT_DIR, f"stream-{task_id}-{str(uuid.uuid4())[0:8]}"
+    )
+    cache_file = None
+    try:
+        if cache_key:
+            out_data_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = out_data_dir.joinpath(file_name).open("wb")
+        converter.convert(
+            config=config,
+            input_data=crud_sample.iter_for_export(
+                db=db,
+                task_id=task_id,
+                sample_ids=sample_ids,
+                batch_size=settings.EXPORT_QUERY_BATCH_SIZE,
+            ),
+            out_data_dir=Path(settings.MEDIA_ROOT).joinpath(settings.EXPORT_DIR),
+            out_data_file_name_prefix=task_id,
+            format=export_type.value,
+            sink=TeeStream(sink, cache_file) if cache_file else sink,
+            options=options,
+            index=index,
+        )
+        if cache_file:
+            cache_file.close()
+            try:
+                exportCache.put(cache_key, out_data_dir.joinpath(file_name))
+            except OSError as e:
+                # the client has the whole archive already
+                logger.warning("cannot cache the export stream of task:{}: {}", task_id, e)
+    except StreamCancelled:
+        logger.info("export stream of task:{} cancelled by the client", task_id)
+    except Exception as e:
+        logger.exception("export stream of task:{} failed", task_id)
+        sink.fail(e)
+    finally:
+        sink.close()
+        db.close()
+        if cache_file:
+            cache_file.close()
+        shutil.rmtree(out_data_dir, ignore_errors=True)
+
+
+def _read_chunks(file_full_path: Path, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with file_full_path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def _pack_delta(
+    file_full_path: Path,
+    export_type: ExportType,
+    task_id: int,
+    since: str,
+    token: str,
+    deleted: List[int],
+) -> Path:
+    """zip the export of the changed samples with the ids of the deleted ones"""
+
+    delta = {"since": since, "token": token, "deleted": deleted}
+    file_full_path_zip = file_full_path.parent.joinpath(
+        f"task-{task_id}-{export_type.value.lower()}-delta.zip"
+    )
+    with file_full_path_zip.open("wb") as outfile:
+        with ZipStream(outfile) as zipf:
+            zipf.write_file(file_full_path.name, file_full_path)
+            zipf.write("deleted.json", json_codec.dumps(delta))
+    return file_full_path_zip
+
+
+def _track_progress(
+    samples: Iterable[dict], total: int, on_progress: Callable[[int, int], None]
+) -> Iterator[dict]:
+    converted = 0
+    for sample in samples:
+        yield sample
+        converted += 1
+        on_progress(converted, total)
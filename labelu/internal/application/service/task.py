@@ -12,9 +12,9 @@ from labelu.internal.common.error_code import LabelUException
 from labelu.internal.domain.models.user import User
 from labelu.internal.domain.models.task import Task
 from labelu.internal.domain.models.task import TaskStatus
-from labelu.internal.domain.models.sample import SampleState
 from labelu.internal.adapter.persistence import crud_task, crud_user
-from labelu.internal.adapter.persistence import crud_sample
+from labelu.internal.adapter.persistence import crud_annotation
+from labelu.internal.adapter.persistence import crud_task_stats
 from labelu.internal.application.command.task import BasicConfigCommand
 from labelu.internal.application.command.task import UpdateCommand
 from labelu.internal.application.response.base import UserResp
@@ -22,6 +22,7 @@ from labelu.internal.application.response.base import CommonDataResp
 from labelu.internal.application.response.task import TaskStatics
 from labelu.internal.application.response.task import TaskResponse
 from labelu.internal.application.response.task import TaskResponseWithStatics
+from labelu.internal.clients.export import taskConfigIndexCache
 
 
 async def create(
@@ -42,6 +43,7 @@ async def create(
                 updated_by=current_user.id,
             ),
         )
+        crud_task_stats.create(db=db, task_id=new_task.id)
 
     # response
     return TaskResponse(
@@ -70,7 +72,7 @@ async def list_by(
 
     # get progress
     task_ids = [task.id for task in tasks]
-    statics = crud_sample.statics(db=db, task_ids=task_ids)
+    statics = crud_task_stats.list_by_task_ids(db=db, task_ids=task_ids)
 
     # response
     tasks_with_statics = [
@@ -88,9 +90,9 @@ async def list_by(
                 username=task.owner.username,
             ),
             stats=TaskStatics(
-                new=statics.get(f"{task.id}_{SampleState.NEW.value}", 0),
-                done=statics.get(f"{task.id}_{SampleState.DONE.value}", 0),
-                skipped=statics.get(f"{task.id}_{SampleState.SKIPPED.value}", 0),
+                new=statics[task.id].new,
+                done=statics[task.id].done,
+                skipped=statics[task.id].skipped,
             ),
         )
         for task in tasks
@@ -123,10 +125,7 @@ async def get(db: Session, task_id: int, current_user: User) -> TaskResponseWith
         )
 
     # get progress
-    statics = crud_sample.statics(
-        db=db,
-        task_ids=[task.id],
-    )
+    statics = crud_task_stats.get(db=db, task_id=task.id)
 
     # response
     return TaskResponseWithStatics(
@@ -143,9 +142,10 @@ async def get(db: Session, task_id: int, current_user: User) -> TaskResponseWith
             username=task.owner.username,
         ),
         stats=TaskStatics(
-            new=statics.get(f"{task.id}_{SampleState.NEW.value}", 0),
-            done=statics.get(f"{task.id}_{SampleState.DONE.value}", 0),
-            skipped=statics.get(f"{task.id}_{SampleState.SKIPPED.value}", 0),
+            new=statics.new,
+            done=statics.done,
+            skipped=statics.skipped,
+            labels=crud_annotation.count_by_label(db=db, task_id=task.id),
         ),
     )
 
@@ -329,6 +329,8 @@ async def update(db: Session, task_id: int, cmd: UpdateCommand) -> TaskResponse:
         obj_in[Task.config.key] = None
     with db.begin():
         updated_task = crud_task.update(db=db, db_obj=task, obj_in=obj_in)
+    # the exports compile the new config
+    taskConfigIndexCache.invalidate(task_id)
 
     # response
     return TaskResponse(
@@ -372,6 +374,7 @@ async def delete(db: Session, task_id: int, current_user: User) -> CommonDataRes
     # delete
     with db.begin():
         crud_task.delete(db=db, db_obj=task)
+    taskConfigIndexCache.invalidate(task_id)
 
     # delete media
     try:
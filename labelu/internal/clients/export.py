@@ -0,0 +1,29 @@
+from labelu.internal.common.config import settings
+from labelu.internal.common.export_cache import ExportCache
+from labelu.internal.common.task_config_index import TaskConfigIndexCache
+from labelu.internal.common.worker_pool import BoundedWorkerPool
+
+
+exportWorkerPool = BoundedWorkerPool(
+    max_workers=settings.EXPORT_JOB_WORKERS,
+    max_queue=settings.EXPORT_JOB_QUEUE_SIZE,
+    thread_name_prefix="export",
+)
+
+
+# streamed exports wait for their clients, they do not take the slots of the jobs
+exportStreamPool = BoundedWorkerPool(
+    max_workers=settings.EXPORT_STREAM_WORKERS,
+    max_queue=settings.EXPORT_STREAM_QUEUE_SIZE,
+    thread_name_prefix="export-stream",
+)
+
+
+exportCache = ExportCache(
+    root=settings.MEDIA_ROOT.joinpath(settings.EXPORT_DIR, settings.EXPORT_CACHE_DIR),
+    max_bytes=settings.EXPORT_CACHE_MAX_BYTES,
+    max_age=settings.EXPORT_CACHE_MAX_AGE,
+)
+
+
+taskConfigIndexCache = TaskConfigIndexCache(max_entries=settings.TASK_CONFIG_INDEX_CACHE_SIZE)
@@ -0,0 +1,119 @@
+from typing import Dict, List, Tuple, Union
+
+from . import json_codec
+
+# tools whose objects are outlined by points, and the ones with an area
+POINTS_TOOLS = ("polygonTool", "lineTool")
+AREA_TOOLS = ("rectTool", "polygonTool")
+
+
+def sample_result(data: Union[str, dict, None]) -> dict:
+    """the annotation result of the data of a sample, parsed once"""
+    if isinstance(data, str):
+        data = json_codec.loads(data) if data else {}
+    result = (data or {}).get("result")
+    if isinstance(result, str):
+        result = json_codec.loads(result) if result else {}
+    return result or {}
+
+
+def _points(tool: str, item: dict) -> List[List[float]]:
+    if tool in POINTS_TOOLS:
+        return [[p.get("x", 0), p.get("y", 0)] for p in item.get("points") or []]
+    if tool == "cuboidTool":
+        return [
+            [p.get("x", 0), p.get("y", 0)]
+            for face in (item.get("front") or {}, item.get("back") or {})
+            for p in face.values()
+            if isinstance(p, dict)
+        ]
+    if tool == "rectTool":
+        x, y = item.get("x", 0), item.get("y", 0)
+        return [[x, y], [x + item.get("width", 0), y + item.get("height", 0)]]
+    if tool == "pointTool" and "x" in item:
+        return [[item.get("x", 0), item.get("y", 0)]]
+    return []
+
+
+def _box_and_area(points: List[List[float]]) -> Tuple[List[float], float]:
+    """bbox [x, y, width, height] and shoelace area of the points of one
+    object, in plain python to keep numpy off the sample write path"""
+    if not points:
+        return [], 0.0
+    xs = [float(p[0]) for p in points]
+    ys = [float(p[1]) for p in points]
+    min_x, min_y = min(xs), min(ys)
+    cross = sum(xs[i - 1] * ys[i] - xs[i] * ys[i - 1] for i in range(len(points)))
+    return [min_x, min_y, max(xs) - min_x, max(ys) - min_y], abs(cross) / 2.0
+
+
+def annotation_rows(result: dict) -> List[dict]:
+    """one row per annotation object of a result, as stored in task_annotation
+
+    The row keeps the tool, label and order of the object with its bounding
+    box [x, y, width, height] and area, the object itself is the geometry
+    json. Objects without points, tags and texts, have no box.
+    """
+    objects = [
+        (tool, item)
+        for tool, tool_result in result.items()
+        if tool.endswith("Tool") and isinstance(tool_result, dict)
+        for item in tool_result.get("result") or []
+        if isinstance(item, dict)
+    ]
+
+    rows = []
+    for tool, item in objects:
+        bbox, area = _box_and_area(_points(tool, item))
+        order = item.get("order")
+        rows.append(
+            {
+                "object_id": str(item["id"]) if item.get("id") is not None else None,
+                "tool": tool,
+                "label": item.get("label"),
+                "order": order if isinstance(order, int) else None,
+                "x": bbox[0] if bbox else None,
+                "y": bbox[1] if bbox else None,
+                "width": bbox[2] if bbox else None,
+                "height": bbox[3] if bbox else None,
+                "area": (bbox[2] * bbox[3] if tool == "rectTool" else area) if bbox and tool in AREA_TOOLS else None,
+                "geometry": json_codec.dumps(item),
+            }
+        )
+    return rows
+
+
+def apply_object_changes(result: dict, upserts: Dict[str, List[dict]], deletes: List[str]) -> dict:
+    """the result with the deleted objects removed then the upserted ones put
+    in their tool, in place of the object of the same id or at the end"""
+    upserted = {str(item["id"]): (tool, item) for tool, items in upserts.items() for item in items}
+    removed = {str(object_id) for object_id in deletes}
+
+    for tool, tool_result in result.items():
+        if not tool.endswith("Tool") or not isinstance(tool_result, dict):
+            continue
+        items = []
+        for item in tool_result.get("result") or []:
+            object_id = str(item["id"]) if isinstance(item, dict) and item.get("id") is not None else None
+            if object_id in removed:
+                continue
+            if object_id in upserted:
+                # replaced where it is, or moved to the tool it is upserted in
+                if upserted[object_id][0] == tool:
+                    items.append(upserted.pop(object_id)[1])
+                continue
+            items.append(item)
+        tool_result["result"] = items
+
+    for tool, item in upserted.values():
+        tool_result = result.setdefault(tool, {"toolName": tool, "result": []})
+        tool_result.setdefault("result", []).append(item)
+    return result
+
+
+def count_objects(result: dict) -> int:
+    return sum(
+        len(tool_result.get("result") or [])
+        for tool, tool_result in result.items()
+        if tool.endswith("Tool") and isinstance(tool_result, dict)
+    )
@@ -18,6 +18,30 @@ class Settings(BaseSettings):
     MEDIA_ROOT: Path = Path(BASE_DATA_DIR).joinpath("media")
     UPLOAD_DIR: str = "upload"
     EXPORT_DIR: str = "export"
+    # processes used by per-sample export formats, 1 disables the process pool
+    EXPORT_WORKERS: int = os.cpu_count() or 1
+    # samples sent to a worker process at a time
+    EXPORT_CHUNK_SIZE: int = 64
+    # samples fetched from the database per query when exporting
+    EXPORT_QUERY_BATCH_SIZE: int = 500
+    # files a TFRecord export is split into, balanced by size
+    EXPORT_TF_RECORD_SHARDS: int = 4
+    # annotation rows per parquet row group
+    EXPORT_PARQUET_ROW_GROUP_SIZE: int = 10000
+    # export jobs running at the same time, and waiting for a free worker
+    EXPORT_JOB_WORKERS: int = 2
+    EXPORT_JOB_QUEUE_SIZE: int = 32
+    # streamed exports running at the same time, and waiting for a free worker,
+    # a stream holds its worker as long as the client takes to download it
+    EXPORT_STREAM_WORKERS: int = 4
+    EXPORT_STREAM_QUEUE_SIZE: int = 8
+    # exported archives reused while the task and its samples are unchanged
+    EXPORT_CACHE_ENABLED: bool = True
+    EXPORT_CACHE_DIR: str = "cache"
+    EXPORT_CACHE_MAX_BYTES: int = 2_000_000_000  # ~2GB
+    EXPORT_CACHE_MAX_AGE: int = 7 * 24 * 3600  # seconds
+    # compiled label lookups of the task configs kept in memory, one per task
+    TASK_CONFIG_INDEX_CACHE_SIZE: int = 128
     os.makedirs(MEDIA_ROOT, exist_ok=True)
     logger.info("Database and media directory: {}", BASE_DATA_DIR)
     UPLOAD_FILE_MAX_SIZE: int = 200_000_000  # ~200MB
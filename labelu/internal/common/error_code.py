@@ -95,7 +95,7 @@ class ErrorCode(Enum):
     # task sample error code
     CODE_55000_SAMPLE_LIST_PARAMETERS_ERROR = (
         TASK_INIT_CODE + 5000,
-        "Paramenters error: 'after', 'before', 'page' only one must be Ture, page can be 0",
+        "Paramenters error: 'after', 'before', 'page', 'cursor' only one must be Ture, page can be 0",
     )
     CODE_55001_SAMPLE_NOT_FOUND = (TASK_INIT_CODE + 5001, "Sample not found")
     CODE_55002_SAMPLE_FORMAT_ERROR = (
@@ -106,10 +106,42 @@ class ErrorCode(Enum):
         TASK_INIT_CODE + 5003,
         "Sample name exists",
     )
+    CODE_55004_SAMPLE_CURSOR_INVALID = (
+        TASK_INIT_CODE + 5004,
+        "Sample cursor is invalid",
+    )
+    CODE_55005_SAMPLE_VERSION_CONFLICT = (
+        TASK_INIT_CODE + 5005,
+        "Sample was updated since the given version",
+    )
     CODE_61000_NO_DATA = (
         EXPORT_INIT_CODE + 1000,
         "No data",
     )
+    CODE_61001_EXPORT_JOB_NOT_FOUND = (
+        EXPORT_INIT_CODE + 1001,
+        "Export job not found",
+    )
+    CODE_61002_EXPORT_JOB_NOT_FINISHED = (
+        EXPORT_INIT_CODE + 1002,
+        "Export job is not finished",
+    )
+    CODE_61003_EXPORT_JOB_QUEUE_FULL = (
+        EXPORT_INIT_CODE + 1003,
+        "Too many export jobs, please try again later",
+    )
+    CODE_61004_EXPORT_TOKEN_INVALID = (
+        EXPORT_INIT_CODE + 1004,
+        "Export token is invalid",
+    )
+    CODE_61005_EXPORT_FORMAT_UNAVAILABLE = (
+        EXPORT_INIT_CODE + 1005,
+        "Export format needs an optional dependency that is not installed",
+    )
+    CODE_61006_EXPORT_JOB_EXPIRED = (
+        EXPORT_INIT_CODE + 1006,
+        "Exported file has expired, please export again",
+    )
 
 
 class LabelUException(HTTPException):
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Union
+
+from loguru import logger
+
+
+def export_cache_key(
+    task_id: int,
+    export_type: str,
+    config: str,
+    sample_ids: Union[List[int], None],
+    sample_count: int,
+    max_updated_at: Union[datetime, None],
+    since: Union[str, None] = None,
+    watermark: Union[str, None] = None,
+    options: Union[dict, None] = None,
+) -> str:
+    """fingerprint of everything an export depends on
+
+    The count of samples is part of the key because deleting a sample does
+    not move the max updated_at of the remaining ones. A delta export also
+    depends on its since token and on the watermark, which moves with the
+    deleted samples listed in the tombstones. Format options change the
+    content of the archive too.
+    """
+
+    content = json.dumps(
+        [
+            task_id,
+            export_type,
+            hashlib.sha256((config or "").encode("utf-8")).hexdigest(),
+            sorted(set(sample_ids)) if sample_ids is not None else None,
+            sample_count,
+            max_updated_at.isoformat() if max_updated_at else None,
+            since,
+            watermark,
+            options or None,
+        ],
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class ExportCache:
+    """Export archives kept on disk by fingerprint, evicted least recently used.
+
+    Every entry is a directory named by its key holding the single exported
+    file, the directory mtime is bumped on every hit. Entries older than
+    max_age seconds are dropped, then the least recently used ones until the
+    cache fits in max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int, max_age: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Union[Path, None]:
+        entry = self.root.joinpath(key)
+        files = [f for f in entry.iterdir() if f.is_file()] if entry.is_dir() else []
+        with self._lock:
+            if len(files) != 1:
+                self.misses += 1
+                logger.info("export cache miss: {}, hits: {}, misses: {}", key, self.hits, self.misses)
+                return None
+
+            self.hits += 1
+            logger.info("export cache hit: {}, hits: {}, misses: {}", key, self.hits, self.misses)
+        os.utime(entry)
+        return files[0]
+
+    def put(self, key: str, file_path: Path) -> Path:
+        """move the exported file into the cache and return its new path"""
+
+        entry = self.root.joinpath(key)
+        staging = self.root.joinpath(f".{key}-{os.getpid()}-{threading.get_ident()}")
+        staging.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(file_path), staging.joinpath(file_path.name))
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # the same export finished first in another job, keep that one
+            shutil.rmtree(staging, ignore_errors=True)
+            cached = self.get(key)
+            if cached:
+                return cached
+            raise
+
+        self.evict(keep=key)
+        return entry.joinpath(file_path.name)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def evict(self, keep: Union[str, None] = None) -> None:
+        if not self.root.is_dir():
+            return
+
+        with self._lock:
+            now = time.time()
+            entries = []
+            total = 0
+            for entry in self.root.iterdir():
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+                total += size
+                if entry.name != keep:
+                    entries.append((entry.stat().st_mtime, size, entry))
+
+            # least recently used first
+            entries.sort(key=lambda e: e[0])
+            for last_used, size, entry in entries:
+                if now - last_used <= self.max_age and total <= self.max_bytes:
+                    continue
+                logger.info("evict export cache: {}, size: {}", entry.name, size)
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
@@ -0,0 +1,38 @@
+import base64
+import json
+
+from fastapi import status
+from loguru import logger
+
+from labelu.internal.common.error_code import ErrorCode, LabelUException
+
+
+# the last change sequence number of the samples of a task an export has seen
+Watermark = int
+
+
+def encode_export_token(task_id: int, watermark: Watermark) -> str:
+    content = json.dumps({"t": task_id, "c": watermark}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(content.encode("utf-8")).decode("ascii")
+
+
+def decode_export_token(token: str, task_id: int) -> Watermark:
+    try:
+        content = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        watermark = int(content["c"])
+        token_task_id = content["t"]
+    except Exception:
+        logger.error("invalid export token: {}", token)
+        raise LabelUException(
+            code=ErrorCode.CODE_61004_EXPORT_TOKEN_INVALID,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if token_task_id != task_id:
+        logger.error("export token of task:{} used for task:{}", token_task_id, task_id)
+        raise LabelUException(
+            code=ErrorCode.CODE_61004_EXPORT_TOKEN_INVALID,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return watermark
@@ -0,0 +1,5 @@
+"""The export formats, one module per format family.
+
+A format module is only imported the first time the format is exported, see
+the registry in labelu.internal.common.converter.
+"""
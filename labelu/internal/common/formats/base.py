@@ -0,0 +1,29 @@
+"""helpers shared by the export formats"""
+import io
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Union
+
+from PIL import Image
+
+from ..zip_stream import ZipStream
+
+
+@contextmanager
+def zip_archive(file_full_path_zip: Path, sink: Union[BinaryIO, None]) -> Iterator[ZipStream]:
+    """a zip archive written to sink, or to file_full_path_zip without sink"""
+    if sink is not None:
+        with ZipStream(sink) as zipf:
+            yield zipf
+        return
+
+    file_full_path_zip.parent.mkdir(parents=True, exist_ok=True)
+    with file_full_path_zip.open("wb") as outfile:
+        with ZipStream(outfile) as zipf:
+            yield zipf
+
+
+def png_bytes(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
@@ -0,0 +1,138 @@
+import shutil
+import tempfile
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Tuple, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..converter import COCO_SEGMENTATION_POLYGON, COCO_SEGMENTATION_RLE
+from ..json_writer import JsonArrayWriter
+from ..mask import polygon_rle
+from ..parallel import map_samples
+from ..polygon import polygon_stats
+from ..task_config_index import TaskConfigIndex
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    """COCO json, the images and annotations arrays are written as the
+    samples are converted, with the polygons as RLE with segmentation RLE"""
+
+    # result output file
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath("result.json")
+
+    # annotation index
+    annotation_id = 0
+
+    # the annotations are staged next to the result while the images
+    # array is written, then appended to it
+    with tempfile.TemporaryFile("w+", dir=out_data_dir) as annotations_file:
+        with file_full_path.open("w") as outfile:
+            outfile.write('{"images": ')
+            with JsonArrayWriter(outfile, default=str) as images, JsonArrayWriter(
+                annotations_file, default=str
+            ) as annotations:
+                for image, sample_annotations in map_samples(
+                    partial(
+                        _coco_sample,
+                        category_name_map_id=index.category_ids,
+                        rle=options.get("coco_segmentation", COCO_SEGMENTATION_POLYGON) == COCO_SEGMENTATION_RLE,
+                    ),
+                    input_data,
+                ):
+                    images.write(image)
+                    for annotation in sample_annotations:
+                        annotation["id"] = annotation_id
+                        annotation_id += 1
+                        annotations.write(annotation)
+
+            outfile.write(', "annotations": ')
+            annotations_file.seek(0)
+            shutil.copyfileobj(annotations_file, outfile, 1024 * 1024)
+            outfile.write(', "categories": ')
+            outfile.write(json_codec.dumps(index.categories, default=str))
+            outfile.write("}")
+    logger.info("Export file path: {}", file_full_path)
+    return file_full_path
+
+
+def _coco_sample(
+    sample: dict, category_name_map_id: dict, rle: bool
+) -> Tuple[dict, List[dict]]:
+    """the COCO image of a sample and its annotations, without their id"""
+    annotation_data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # annotation result
+    annotation_result = json_codec.loads(annotation_data.get("result", {}))
+
+    # coco image
+    image = {
+        "id": sample.get("id"),
+        "fileName": file.get("filename", ""),
+        "width": annotation_result.get("width", 0),
+        "height": annotation_result.get("height", 0),
+        "valid": False
+        if sample.get("state", "") == "SKIPPED"
+        else annotation_result.get("valid", True),
+        "rotate": annotation_result.get("rotate", 0),
+    }
+
+    annotations = []
+    polygon_results = (annotation_result.get("polygonTool") or {}).get("result", [])
+    rect_results = (annotation_result.get("rectTool") or {}).get("result", [])
+
+    # bbox and area of all the polygons of the image at once
+    polygons = [
+        [(point.get("x"), point.get("y")) for point in tool_result.get("points", [])]
+        for tool_result in polygon_results
+    ]
+    bboxes, areas = polygon_stats(polygons)
+    width, height = image["width"], image["height"]
+    for tool_result, polygon, bbox, area in zip(polygon_results, polygons, bboxes, areas):
+        segmentation = [c for point in polygon for c in point]
+        if rle and polygon and width and height:
+            segmentation = polygon_rle(segmentation, width, height)
+        annotations.append(_coco_annotation(sample, tool_result, category_name_map_id, segmentation, bbox, area))
+
+    for tool_result in rect_results:
+        bbox = []
+        x = tool_result.get("x")
+        y = tool_result.get("y")
+        width = tool_result.get("width")
+        height = tool_result.get("height")
+        if x is not None and y is not None and width is not None and height is not None:
+            bbox.extend([x, y, width, height])
+        area = tool_result.get("width", 0) * tool_result.get("height", 0)
+        annotations.append(_coco_annotation(sample, tool_result, category_name_map_id, [], bbox, area))
+
+    return image, annotations
+
+
+def _coco_annotation(
+    sample: dict,
+    tool_result: dict,
+    category_name_map_id: dict,
+    segmentation: Union[list, dict],
+    bbox: list,
+    area: float,
+) -> dict:
+    return {
+        "image_id": sample.get("id"),
+        "iscrowd": tool_result.get("iscrowd", 0),
+        "segmentation": segmentation,
+        "area": area,
+        "bbox": bbox,
+        "category_id": category_name_map_id.get(tool_result.get("label", ""), -1),
+        "order": tool_result.get("order", 0),
+    }
@@ -0,0 +1,145 @@
+import csv
+import io
+import os
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, Tuple, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..converter import Format, zip_file_name
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from .base import zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    file_relative_path_zip = zip_file_name(Format.CSV.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        for member in map_samples(
+            partial(_csv_sample, index=index), input_data
+        ):
+            if member:
+                zipf.write(*member)
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def _csv_sample(sample: dict, index: TaskConfigIndex) -> Union[Tuple[str, bytes], None]:
+    def get_attributes(attributes: dict):
+        result = []
+
+        for value in attributes.values():
+            result.append(", ".join(value) if isinstance(value, list) else value)
+
+        return ", ".join(result)
+
+    def get_points(direction: dict):
+        return [
+            (
+                direction.get("tl").get("x"),
+                direction.get("tl").get("y"),
+            ),
+            (
+                direction.get("tr").get("x"),
+                direction.get("tr").get("y"),
+            ),
+            (
+                direction.get("br").get("x"),
+                direction.get("br").get("y"),
+            ),
+            (
+                direction.get("bl").get("x"),
+                direction.get("bl").get("y"),
+            ),
+        ]
+
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+    # tool_name, label, x, y, width, height etc.
+    rows = []
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    if sample.get("state") == "SKIPPED" or not annotated_result:
+        return None
+
+    for tool in annotated_result.copy().keys():
+        if tool == 'rectTool':
+            tool_results = annotated_result.pop(tool)
+            rows.append(["tool_name", "label", "label_text", "x", "y", "width", "height", "attributes", "order"])
+            for tool_result in tool_results.get("result", []):
+                x = tool_result.get("x", 0)
+                y = tool_result.get("y", 0)
+                width = tool_result.get("width", 0)
+                height = tool_result.get("height", 0)
+                label = tool_result.get("label", "")
+                order = tool_result.get("order", 0)
+                label_text = index.label(tool, label)
+                rows.append([tool, label, label_text, x, y, width, height, get_attributes(tool_result.get('attributes', {})), order])
+
+        if tool == 'lineTool':
+            tool_results = annotated_result.pop(tool)
+            rows.append(["tool_name", "label", "label_text", "points", "control_points", "attributes", "order"])
+            for tool_result in tool_results.get("result", []):
+                points = tool_result.get("points", [])
+                control_points = tool_result.get("controlPoints", [])
+                label = tool_result.get("label", "")
+                order = tool_result.get("order", 0)
+                label_text = index.label(tool, label)
+                rows.append([tool, label, label_text, points, control_points, get_attributes(tool_result.get('attributes', {})), order])
+
+        if tool == 'pointTool':
+            tool_results = annotated_result.pop(tool)
+            rows.append(["tool_name", "label", "label_text", "x", "y", "order"])
+            for tool_result in tool_results.get("result", []):
+                x = tool_result.get("x", 0)
+                y = tool_result.get("y", 0)
+                label = tool_result.get("label", "")
+                order = tool_result.get("order", 0)
+                label_text = index.label(tool, label)
+                rows.append([tool, label, label_text, x, y, order])
+
+        if tool == 'polygonTool':
+            tool_results = annotated_result.pop(tool)
+            rows.append(["tool_name", "label", "label_text", "points", "attributes", "order"])
+            for tool_result in tool_results.get("result", []):
+                points = tool_result.get("points", [])
+                control_points = tool_result.get("controlPoints", [])
+                label = tool_result.get("label", "")
+                order = tool_result.get("order", 0)
+                label_text = index.label(tool, label)
+                rows.append([tool, label, label_text, points, control_points, get_attributes(tool_result.get('attributes', {})), order])
+
+        if tool == 'cuboidTool':
+            tool_results = annotated_result.pop(tool)
+            rows.append(["tool_name", "label", "label_text", "direction", "front", "back", "attributes", "order"])
+            for tool_result in tool_results.get("result", []):
+                direction = tool_result.get("direction")
+                # [[x,y], ...]
+                front = get_points(tool_result.get("front"))
+                back = get_points(tool_result.get("back"))
+                width = tool_result.get("width", 0)
+                height = tool_result.get("height", 0)
+                label = tool_result.get("label", "")
+                order = tool_result.get("order", 0)
+                label_text = index.label(tool, label)
+                rows.append([tool, label, label_text, direction, front, back, get_attributes(tool_result.get('attributes', {})), order])
+
+    file_basename = os.path.splitext(file.get("filename", ""))[0]
+    outfile = io.StringIO()
+    writer = csv.writer(outfile)
+    writer.writerows(rows)
+
+    return f"{file_basename}.csv", outfile.getvalue().encode("utf-8")
@@ -0,0 +1,95 @@
+from pathlib import Path
+from typing import BinaryIO, Iterable, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..config import settings
+from ..json_writer import JsonArrayWriter, JsonLinesWriter
+from ..task_config_index import TaskConfigIndex
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath("result.json")
+
+    # write every file result as soon as it is built
+    with file_full_path.open("w") as outfile:
+        with JsonArrayWriter(outfile, default=str) as writer:
+            for sample in input_data:
+                writer.write(json_result(sample))
+
+    logger.info("Export file path: {}", file_full_path)
+    return file_full_path
+
+
+def convert_lines(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath("result.jsonl")
+
+    # one file result per line
+    with file_full_path.open("w") as outfile:
+        with JsonLinesWriter(outfile, default=str) as writer:
+            for sample in input_data:
+                writer.write(json_result(sample))
+
+    logger.info("Export file path: {}", file_full_path)
+    return file_full_path
+
+
+def json_result(sample: dict) -> dict:
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # change skipped result is invalid
+    annotated_result = json_codec.loads(data.get("result"))
+    if annotated_result and sample.get("state") == "SKIPPED":
+        annotated_result["valid"] = False
+
+    # change result struct
+    if annotated_result:
+        annotations = []
+        for tool in annotated_result.copy().keys():
+            if tool.endswith("Tool"):
+                tool_results = annotated_result.pop(tool)
+                for tool_result in tool_results.get("result", []):
+                    # 视频文件的标注结果已经保存了 label 键的值，不需要再做转换
+                    if "label" not in tool_result:
+                        tool_result["label"] = tool_result.pop("attribute", "")
+
+                    tool_result.pop("sourceID", None)
+
+                    if tool == "tagTool" or tool == "textTool":
+                        tool_result.pop("label")
+
+                    if "attribute" in tool_result:
+                        tool_result.pop("attribute")
+
+                annotations.append(tool_results)
+
+        annotated_result["annotations"] = annotations
+
+    annotated_result_str = json_codec.dumps(annotated_result)
+    return {
+        "id": sample.get("id"),
+        "result": annotated_result_str,
+        "folder": settings.MEDIA_ROOT,
+        "url": file.get("url"),
+        "fileName": file.get("filename", ""),
+    }
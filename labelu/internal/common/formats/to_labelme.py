@@ -0,0 +1,199 @@
+import base64
+import os
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Tuple, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..config import settings
+from ..converter import Format, zip_file_name
+from ..converter import LABELME_IMAGE_DATA_EMBED, LABELME_IMAGE_DATA_PLACEHOLDER, LABELME_IMAGE_DIR
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from ..zip_stream import ZipStream
+from .base import zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    """LabelMe json files, with imageData embedding the image in base64,
+    or left null with image_data REFERENCE. bundle_images adds the images
+    to the archive under images/, imagePath then points to them."""
+    file_relative_path_zip = zip_file_name(Format.LABEL_ME.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+    embed_image = options.get("image_data", LABELME_IMAGE_DATA_EMBED) == LABELME_IMAGE_DATA_EMBED
+    bundle_images = options.get("bundle_images", False)
+
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        bundled = set()
+        for member in map_samples(
+            partial(
+                _labelme_sample,
+                index=index,
+                embed_image=embed_image,
+                bundle_images=bundle_images,
+            ),
+            input_data,
+        ):
+            if not member:
+                continue
+
+            arcname, content, image_path, image_arcname = member
+            image_full_path = (
+                settings.MEDIA_ROOT.joinpath(image_path.lstrip("/")) if image_path else None
+            )
+            _write_labelme(zipf, arcname, content, image_full_path if embed_image else None)
+
+            if image_arcname and image_full_path and image_arcname not in bundled:
+                zipf.write_file(image_arcname, image_full_path)
+                bundled.add(image_arcname)
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def _labelme_sample(
+    sample: dict, index: TaskConfigIndex, embed_image: bool, bundle_images: bool
+) -> Union[Tuple[str, str, str, Union[str, None]], None]:
+    """the LabelMe json of a sample, with the placeholder of its imageData when
+    the image is embedded, the stored path of the image and its name in the
+    archive when it is bundled"""
+    # does not support cuboid / spline
+    shape_dict = {
+        "polygonTool": "polygon",
+        "rectTool": "rectangle",
+        "lineTool": "linestrip",
+        "pointTool": "point",
+    }
+
+    def convert_points(points: List[dict]):
+        return [[point.get("x"), point.get("y")] for point in points]
+
+    labelme_item = {
+        "version": "5.5.0",
+        "flags": {},
+        "shapes": [],
+        "imagePath": "",
+        "imageData": "",
+        "imageHeight": 0,
+        "imageWidth": 0,
+    }
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    if sample.get("state") == "SKIPPED":
+        return None
+
+    image_arcname = f"{LABELME_IMAGE_DIR}/{file.get('filename', '')}" if bundle_images else None
+    labelme_item["imagePath"] = image_arcname or file.get("filename", "")
+    # the image is base64 encoded while the json is written to the archive
+    labelme_item["imageData"] = (
+        LABELME_IMAGE_DATA_PLACEHOLDER if embed_image and file.get("path") else None
+    )
+
+    if annotated_result:
+        labelme_item["imageWidth"] = annotated_result.get("width", 0)
+        labelme_item["imageHeight"] = annotated_result.get("height", 0)
+
+        for tool in annotated_result.copy().keys():
+            if tool.endswith("Tool") and tool in shape_dict:
+                # polygon
+                if tool == "polygonTool":
+                    tool_results = annotated_result.pop(tool)
+                    for tool_result in tool_results.get("result", []):
+                        attributes = tool_result.get("attributes", {})
+                        shape = {
+                            "label": index.label(tool, tool_result.get("label", "")),
+                            "points": convert_points(tool_result.get("points", [])),
+                            "group_id": "",
+                            # Get description from attributes
+                            "description": attributes.get("description", ""),
+                            "shape_type": shape_dict.get(tool, "polygon"),
+                            "flags": {},
+                            "mask": "",
+                        }
+                        labelme_item["shapes"].append(shape)
+
+                # rect
+                if tool == "rectTool":
+                    tool_results = annotated_result.pop(tool)
+                    for tool_result in tool_results.get("result", []):
+                        attributes = tool_result.get("attributes", {})
+                        x = tool_result.get("x", 0)
+                        y = tool_result.get("y", 0)
+                        width = tool_result.get("width", 0)
+                        height = tool_result.get("height", 0)
+                        shape = {
+                            "label": index.label(tool, tool_result.get("label", "")),
+                            "points": [[x, y], [x + width, y + height]],
+                            "group_id": "",
+                            "description": attributes.get("description", ""),
+                            "shape_type": shape_dict.get(tool, "rectangle"),
+                            "flags": {},
+                            "mask": "",
+                        }
+                        labelme_item["shapes"].append(shape)
+
+                if tool == "lineTool":
+                    tool_results = annotated_result.pop(tool)
+                    for tool_result in tool_results.get("result", []):
+                        attributes = tool_result.get("attributes", {})
+                        shape = {
+                            "label": index.label(tool, tool_result.get("label", "")),
+                            "points": convert_points(tool_result.get("points", [])),
+                            "group_id": "",
+                            "description": attributes.get("description", ""),
+                            "shape_type": shape_dict.get(tool, "linestrip"),
+                            "flags": {},
+                            "mask": "",
+                        }
+                        labelme_item["shapes"].append(shape)
+
+                if tool == "pointTool":
+                    tool_results = annotated_result.pop(tool)
+                    for tool_result in tool_results.get("result", []):
+                        attributes = tool_result.get("attributes", {})
+                        shape = {
+                            "label": index.label(tool, tool_result.get("label", "")),
+                            "points": [[tool_result.get("x", 0), tool_result.get("y", 0)]],
+                            "group_id": "",
+                            "description": attributes.get("description", ""),
+                            "shape_type": shape_dict.get(tool, "point"),
+                            "flags": {},
+                            "mask": "",
+                        }
+                        labelme_item["shapes"].append(shape)
+
+    file_basename = os.path.splitext(file.get("filename", ""))[0]
+    # 格式化json，两个空格缩进
+    content = json_codec.dumps(labelme_item, indent=True)
+
+    return f"{file_basename}.json", content, file.get("path"), image_arcname
+
+
+def _write_labelme(zipf: ZipStream, arcname: str, content: str, image_full_path: Union[Path, None]) -> None:
+    if image_full_path is None:
+        zipf.write(arcname, content)
+        return
+
+    head, tail = content.split(json_codec.dumps(LABELME_IMAGE_DATA_PLACEHOLDER), 1)
+    with zipf.open(arcname) as member:
+        member.write(head.encode("utf-8"))
+        member.write(b'"')
+        # 3 bytes make 4 base64 characters, chunks of a multiple of 3 bytes
+        # are encoded without padding and can be concatenated
+        with image_full_path.open("rb") as image_file:
+            while chunk := image_file.read(3 * 256 * 1024):
+                member.write(base64.b64encode(chunk))
+        member.write(b'"')
+        member.write(tail.encode("utf-8"))
@@ -0,0 +1,203 @@
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Tuple, Union
+from functools import partial
+
+from loguru import logger
+
+from .. import json_codec
+from ..converter import Format, MASK_MODE_SEMANTIC, zip_file_name
+from ..mask import MAX_PALETTE_CLASSES, MAX_16BIT_INSTANCES, PALETTE_IGNORE_ID
+from ..mask import color_image, instance_color, label_image, palette_image, rasterize
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from .base import png_bytes, zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    if options.get("mask_mode") == MASK_MODE_SEMANTIC:
+        return convert_semantic(
+            config=config,
+            input_data=input_data,
+            out_data_dir=out_data_dir,
+            out_data_file_name_prefix=out_data_file_name_prefix,
+            sink=sink,
+            index=index,
+        )
+
+    file_relative_path_zip = zip_file_name(Format.MASK.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+
+    color_list = []
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        for sample_files, sample_colors in map_samples(_mask_sample, input_data):
+            for arcname, content in sample_files:
+                zipf.write(arcname, content)
+            color_list.extend(sample_colors)
+
+        # color list
+        zipf.write("colors.json", json_codec.dumps(color_list, default=str))
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def convert_semantic(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    """one mask of class ids per image, numbered after the labels of the
+    task config so that they are the same in every image and export
+
+    The masks are "P" PNGs carrying the class colours as their palette,
+    the classes are listed once in classes.json.
+    """
+    file_relative_path_zip = zip_file_name(Format.MASK.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+
+    classes = _mask_classes(index)
+    ignore_id = PALETTE_IGNORE_ID if len(classes) <= MAX_PALETTE_CLASSES else MAX_16BIT_INSTANCES
+    class_ids = {c["value"]: c["id"] for c in classes}
+
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        for member in map_samples(
+            partial(_semantic_mask_sample, class_ids=class_ids, ignore_id=ignore_id),
+            input_data,
+        ):
+            if member:
+                zipf.write(*member)
+
+        zipf.write(
+            "classes.json",
+            json_codec.dumps({"background": 0, "ignore": ignore_id, "classes": classes}),
+        )
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def _mask_sample(sample: dict) -> Tuple[List[Tuple[str, bytes]], List[dict]]:
+    export_files = []
+    color_list = []
+
+    file = sample.get("file", {})
+    if sample.get("state") != "DONE":
+        return export_files, color_list
+    annotation_data = json_codec.loads(sample.get("data"))
+    filename = file.get("filename")
+    if filename and filename.split("/")[-1]:
+        file_relative_path_base_name = filename.split("/")[-1].split(".")[0]
+    else:
+        file_relative_path_base_name = "result"
+
+    # annotation result
+    annotation_result = json_codec.loads(annotation_data.get("result", {}))
+    if not annotation_result or not annotation_result.get("polygonTool", {}):
+        return export_files, color_list
+
+    # polygon tool
+    polygons = []
+    polygon_attribute = []
+    for tool_result in annotation_result.get("polygonTool", {}).get(
+        "result", []
+    ):
+        polygon = []
+        for point in tool_result.get("points", []):
+            polygon.append(point.get("x"))
+            polygon.append(point.get("y"))
+        polygons.append(polygon)
+        polygon_attribute.append(tool_result.get("label", ""))
+
+    width = annotation_result.get("width")
+    height = annotation_result.get("height")
+
+    # every polygon is drawn once in a label array, the segmentation image is
+    # a palette lookup of it, 16-bit labels above 255 polygons
+    labels = rasterize(polygons, width, height)
+
+    file_relative_path_model_l = f"{file_relative_path_base_name}-trainIds.png"
+    export_files.append((file_relative_path_model_l, png_bytes(label_image(labels))))
+
+    file_relative_path_model_rgb = (
+        f"{file_relative_path_base_name}-segmentation.png"
+    )
+    export_files.append(
+        (file_relative_path_model_rgb, png_bytes(color_image(labels, len(polygons))))
+    )
+
+    for index, attribute in enumerate(polygon_attribute):
+        rgb = instance_color(index + 1).get("rgb")
+        color_list.append(
+            {
+                "color": f'rgb({rgb.get("r")},{rgb.get("g")},{rgb.get("b")})',
+                "colorList": [rgb.get("r"), rgb.get("g"), rgb.get("b"), 255],
+                "trainIds": index + 1,
+                "attribute": attribute,
+            }
+        )
+
+    return export_files, color_list
+
+
+def _mask_classes(index: TaskConfigIndex) -> List[dict]:
+    """the polygon labels of the task config with their class id, from 1"""
+    classes = []
+    seen = set()
+    for value, key in index.tool_attributes.get("polygonTool", []) + index.common_attributes:
+        if value in seen:
+            continue
+        seen.add(value)
+        classes.append({"id": len(classes) + 1, "value": value, "name": key})
+
+    if len(classes) <= MAX_PALETTE_CLASSES:
+        for c in classes:
+            rgb = instance_color(c["id"]).get("rgb")
+            c["color"] = [rgb.get("r"), rgb.get("g"), rgb.get("b")]
+    return classes
+
+
+def _semantic_mask_sample(
+    sample: dict, class_ids: dict, ignore_id: int
+) -> Union[Tuple[str, bytes], None]:
+    file = sample.get("file", {})
+    if sample.get("state") != "DONE":
+        return None
+    annotation_result = json_codec.loads(json_codec.loads(sample.get("data")).get("result", {}))
+    if not annotation_result or not annotation_result.get("polygonTool", {}):
+        return None
+
+    filename = file.get("filename")
+    if filename and filename.split("/")[-1]:
+        file_relative_path_base_name = filename.split("/")[-1].split(".")[0]
+    else:
+        file_relative_path_base_name = "result"
+
+    polygons = []
+    ids = []
+    for tool_result in annotation_result.get("polygonTool", {}).get("result", []):
+        polygon = []
+        for point in tool_result.get("points", []):
+            polygon.append(point.get("x"))
+            polygon.append(point.get("y"))
+        polygons.append(polygon)
+        # labels removed from the config since are marked, not dropped
+        ids.append(class_ids.get(tool_result.get("label", ""), ignore_id))
+
+    labels = rasterize(
+        polygons, annotation_result.get("width"), annotation_result.get("height"), ids=ids
+    )
+    if ignore_id == PALETTE_IGNORE_ID:
+        img = palette_image(labels, len(class_ids))
+    else:
+        # the same bit depth in every image, whatever ids it holds
+        img = label_image(labels.astype("uint16"))
+    return f"{file_relative_path_base_name}-classIds.png", png_bytes(img)
@@ -0,0 +1,107 @@
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, List, Union
+
+from fastapi import status
+from loguru import logger
+
+from .. import json_codec
+from ..config import settings
+from ..error_code import ErrorCode, LabelUException
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    """every annotation object as a row of a single parquet table, written
+    in row groups as the samples are converted"""
+    try:
+        from ..parquet_writer import ParquetRowWriter
+    except ImportError:
+        logger.error("pyarrow is not installed, install labelu[parquet] to export parquet")
+        raise LabelUException(
+            code=ErrorCode.CODE_61005_EXPORT_FORMAT_UNAVAILABLE,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath(f"task-{out_data_file_name_prefix}.parquet")
+
+    with ParquetRowWriter(file_full_path, settings.EXPORT_PARQUET_ROW_GROUP_SIZE) as writer:
+        for rows in map_samples(
+            partial(_parquet_rows, index=index), input_data
+        ):
+            writer.write_rows(rows)
+    logger.info("Export file path: {}", file_full_path)
+    return file_full_path
+
+
+def _parquet_rows(sample: dict, index: TaskConfigIndex) -> List[dict]:
+    """the annotation objects of a sample as rows of the parquet SCHEMA"""
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    if sample.get("state") == "SKIPPED" or not annotated_result:
+        return []
+
+    def join(value) -> Union[str, None]:
+        if value is None:
+            return None
+        return ", ".join(map(str, value)) if isinstance(value, list) else str(value)
+
+    rows = []
+    for tool, tool_results in annotated_result.items():
+        if not tool.endswith("Tool") or not isinstance(tool_results, dict):
+            continue
+
+        for tool_result in tool_results.get("result", []):
+            label = tool_result.get("label", "")
+            row = {
+                "sample_id": sample.get("id"),
+                "file_name": file.get("filename", ""),
+                "tool": tool,
+                "label": label,
+                "label_text": index.label(tool, label),
+                "x": [],
+                "y": [],
+                "width": None,
+                "height": None,
+                "attributes": {k: join(v) for k, v in (tool_result.get("attributes") or {}).items()},
+                "order": tool_result.get("order", 0),
+            }
+
+            if tool in ("rectTool", "pointTool"):
+                points = [tool_result]
+                if tool == "rectTool":
+                    row["width"] = tool_result.get("width", 0)
+                    row["height"] = tool_result.get("height", 0)
+            elif tool in ("lineTool", "polygonTool"):
+                points = tool_result.get("points", [])
+            elif tool == "cuboidTool":
+                points = [
+                    tool_result.get(direction, {}).get(corner, {})
+                    for direction in ("front", "back")
+                    for corner in ("tl", "tr", "br", "bl")
+                ]
+            else:
+                # tag and text values, keyed like the attributes
+                points = []
+                row["attributes"].update(
+                    {k: join(v) for k, v in (tool_result.get("value") or {}).items()}
+                )
+
+            row["x"] = [point.get("x", 0) for point in points]
+            row["y"] = [point.get("y", 0) for point in points]
+            rows.append(row)
+
+    return rows
@@ -0,0 +1,56 @@
+import io
+import os
+import xml.etree.ElementTree as ET
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterable, Tuple, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..converter import Format, zip_file_name
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from ..xml_converter import XML_converter
+from .base import zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    file_relative_path_zip = zip_file_name(Format.PASCAL_VOC.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        for member in map_samples(
+            partial(_pascal_voc_sample, index=index), input_data
+        ):
+            if member:
+                zipf.write(*member)
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def _pascal_voc_sample(sample: dict, index: TaskConfigIndex) -> Union[Tuple[str, bytes], None]:
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    if sample.get("state") == "SKIPPED" or not annotated_result:
+        return None
+
+    voc_xml = XML_converter().create_pascal_voc_xml(index, file, annotated_result)
+    file_basename = os.path.splitext(file.get("filename", ""))[0]
+
+    outfile = io.BytesIO()
+    tree = ET.ElementTree(voc_xml)
+    tree.write(outfile, encoding="utf-8", xml_declaration=True)
+
+    return f"{file_basename}.xml", outfile.getvalue()
@@ -0,0 +1,52 @@
+import tempfile
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterable, Union
+
+from fastapi import status
+from loguru import logger
+
+from ..config import settings
+from ..converter import Format, zip_file_name
+from ..error_code import ErrorCode, LabelUException
+from ..task_config_index import TaskConfigIndex
+from ..tf_record_converter import TF_record_converter, TFRecordShardWriter
+from .base import zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    file_relative_path_zip = zip_file_name(Format.TF_RECORD.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+
+    examples = TF_record_converter().create_tf_examples(input_data, index)
+    # fail before an archive is started when there is nothing to export
+    first = next(examples, None)
+    if first is None:
+        raise LabelUException(
+            code=ErrorCode.CODE_61000_NO_DATA,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    # the shards are written side by side, a zip member can only be
+    # written while no other one is open
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=out_data_dir) as shard_dir:
+        with TFRecordShardWriter(
+            Path(shard_dir), f"task-{out_data_file_name_prefix}", settings.EXPORT_TF_RECORD_SHARDS
+        ) as writer:
+            for _, example in chain([first], examples):
+                writer.write(example.SerializeToString())
+
+        with zip_archive(file_full_path_zip, sink) as zipf:
+            for name, path in writer.shards:
+                zipf.write_file(name, path)
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
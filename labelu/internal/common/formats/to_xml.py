@@ -0,0 +1,69 @@
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import BinaryIO, Iterable, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..config import settings
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from ..xml_converter import XML_converter
+from ..xml_writer import XmlElementWriter
+from ..xml_writer import serialize as serialize_xml
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath("result.xml")
+
+    # every sample element is written as soon as it is built
+    with file_full_path.open("wb") as outfile:
+        with XmlElementWriter(outfile, "root") as writer:
+            for sample_xml in map_samples(_xml_sample, input_data):
+                writer.write(sample_xml)
+    logger.info("Export file path: {}", file_full_path)
+    return file_full_path
+
+
+def _xml_sample(sample: dict) -> bytes:
+    """the serialized <sample> element of a sample"""
+    xml_converter = XML_converter()
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+    sample_item = ET.Element("sample")
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    result = ET.SubElement(sample_item, "result")
+    if annotated_result and sample.get("state") == "SKIPPED":
+        ET.SubElement(result, "valid").text = "False"
+
+    ET.SubElement(sample_item, "id").text = str(sample.get("id"))
+
+    ET.SubElement(sample_item, "folder").text = str(settings.MEDIA_ROOT)
+    ET.SubElement(sample_item, "path").text = file.get("path")
+    ET.SubElement(sample_item, "fileName").text = file.get("filename", "")
+
+    ET.SubElement(result, "width").text = str(annotated_result.get("width", 0))
+    ET.SubElement(result, "height").text = str(annotated_result.get("height", 0))
+    ET.SubElement(result, "rotate").text = str(annotated_result.get("rotate", 0))
+
+    # change result struct
+    if annotated_result:
+        annotations = ET.SubElement(result, "annotations")
+        for tool in annotated_result.copy().keys():
+            tool_results = annotated_result.pop(tool)
+            if tool.endswith("Tool"):
+                for annotation in xml_converter.convert_tool_results(tool, tool_results):
+                    annotations.append(annotation)
+
+    return serialize_xml(sample_item)
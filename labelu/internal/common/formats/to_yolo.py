@@ -0,0 +1,84 @@
+import os
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Tuple, Union
+
+from loguru import logger
+
+from .. import json_codec
+from ..converter import Format, zip_file_name
+from ..image import rotated_size, stored_image_size
+from ..parallel import map_samples
+from ..task_config_index import TaskConfigIndex
+from .base import zip_archive
+
+
+def convert(
+    config: dict,
+    input_data: Iterable[dict],
+    out_data_dir: Path,
+    out_data_file_name_prefix: str,
+    sink: Union[BinaryIO, None] = None,
+    options: Union[dict, None] = None,
+    index: Union[TaskConfigIndex, None] = None,
+) -> Path:
+    # samples of the same file name append to the same label file, the
+    # label lines are small enough to be kept until every sample is read
+    labels = {}
+    for sample_label in map_samples(partial(_yolo_sample, class_ids=index.class_ids), input_data):
+        if not sample_label:
+            continue
+
+        file_basename, content = sample_label
+        labels[file_basename] = labels.get(file_basename, "") + content
+
+    file_relative_path_zip = zip_file_name(Format.YOLO.value, out_data_file_name_prefix)
+    file_full_path_zip = out_data_dir.joinpath(file_relative_path_zip)
+    with zip_archive(file_full_path_zip, sink) as zipf:
+        zipf.write("classes.txt", "".join(f"{c}\n" for c in index.classes))
+        for file_basename, content in labels.items():
+            zipf.write(f"{file_basename}.txt", content)
+    logger.info("Export file path: {}", file_full_path_zip)
+    return file_full_path_zip
+
+
+def _yolo_sample(sample: dict, class_ids: Dict[str, int]) -> Union[Tuple[str, str], None]:
+    data = json_codec.loads(sample.get("data"))
+    file = sample.get("file", {})
+
+    # skip invalid data
+    annotated_result = json_codec.loads(data.get("result"))
+    if sample.get("state") == "SKIPPED" or not annotated_result:
+        return None
+
+    file_basename = os.path.splitext(file.get("filename", ""))[0]
+    rotate = annotated_result.get("rotate", 0)
+
+    # the size is stored at upload, only older attachments are decoded
+    image_width, image_height = stored_image_size(file)
+    if rotate:
+        image_width, image_height = rotated_size(image_width, image_height, rotate)
+
+    lines = []
+    if rotate:
+        lines.append(f"# rotate: {rotate}\n")
+
+    for tool in annotated_result.copy().keys():
+        if tool == 'rectTool':
+            tool_results = annotated_result.pop(tool)
+            for tool_result in tool_results.get("result", []):
+                x = tool_result.get("x", 0)
+                y = tool_result.get("y", 0)
+                width = tool_result.get("width", 0)
+                height = tool_result.get("height", 0)
+                label = tool_result.get("label", "")
+                x_center = x + width / 2
+                y_center = y + height / 2
+                x_center /= image_width
+                y_center /= image_height
+                width /= image_width
+                height /= image_height
+
+                lines.append(f"{class_ids[label]} {x_center} {y_center} {width} {height}\n")
+
+    return file_basename, "".join(lines)
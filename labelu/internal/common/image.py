@@ -0,0 +1,70 @@
+import math
+from pathlib import Path
+from typing import Any, Dict, Tuple, Union
+
+from loguru import logger
+from PIL import Image
+
+from labelu.internal.common.config import settings
+
+# EXIF tag of the orientation
+EXIF_ORIENTATION = 0x0112
+
+
+def image_info(img: Image.Image) -> Dict[str, Any]:
+    """width, height, format and EXIF orientation of an opened image"""
+    return {
+        "width": img.width,
+        "height": img.height,
+        "format": img.format,
+        "orientation": img.getexif().get(EXIF_ORIENTATION, 1),
+    }
+
+
+def read_image_info(file_full_path: Union[str, Path]) -> Union[Dict[str, Any], None]:
+    """image_info read from the header of an image file, None if it is not an image"""
+    try:
+        # open only reads the header, the pixels are not decoded
+        with Image.open(file_full_path) as img:
+            return image_info(img)
+    except Exception as e:
+        logger.warning("cannot read image info of {}: {}", file_full_path, e)
+        return None
+
+
+def stored_image_size(file: dict) -> Tuple[int, int]:
+    """size of the image of an exported sample file, as stored at upload, or
+    read from the image header for the images uploaded before"""
+    if file.get("width") and file.get("height"):
+        return file["width"], file["height"]
+
+    image_path = settings.MEDIA_ROOT.joinpath(file.get("path").lstrip("/"))
+    with Image.open(image_path) as img:
+        return img.size
+
+
+def rotated_size(width: int, height: int, angle: float) -> Tuple[int, int]:
+    """size of an image after Image.rotate(angle, expand=True), without the image"""
+    angle = angle % 360.0
+    if angle in (0, 180):
+        return width, height
+    if angle in (90, 270):
+        return height, width
+
+    # same bounding box as PIL, rotated around the center of the image
+    radians = -math.radians(angle)
+    cos = round(math.cos(radians), 15)
+    sin = round(math.sin(radians), 15)
+    center_x, center_y = width / 2.0, height / 2.0
+    offset_x = cos * -center_x + sin * -center_y + center_x
+    offset_y = -sin * -center_x + cos * -center_y + center_y
+
+    xx = []
+    yy = []
+    for x, y in ((0, 0), (width, 0), (width, height), (0, height)):
+        xx.append(cos * x + sin * y + offset_x)
+        yy.append(-sin * x + cos * y + offset_y)
+    return (
+        math.ceil(max(xx)) - math.floor(min(xx)),
+        math.ceil(max(yy)) - math.floor(min(yy)),
+    )
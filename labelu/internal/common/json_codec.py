@@ -0,0 +1,87 @@
+"""JSON encoding and decoding of the hot paths: sample data, pre-annotation
+files, exports and API responses.
+
+orjson is used when it is installed, the standard library otherwise. Both
+backends write the same compact, UTF-8 JSON: no spaces after separators,
+non-ASCII characters kept, non-string keys converted to strings, datetimes
+handed to default like the other unsupported types.
+"""
+import json
+from typing import Any, Callable, Dict, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover, orjson is an optional dependency
+    orjson = None
+
+
+class StdlibCodec:
+    name = "json"
+
+    @staticmethod
+    def loads(data: Union[str, bytes, bytearray]) -> Any:
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, default=default, indent=2)
+        return json.dumps(obj, ensure_ascii=False, default=default, separators=(",", ":"))
+
+    @classmethod
+    def dumps_bytes(
+        cls, obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False
+    ) -> bytes:
+        return cls.dumps(obj, default=default, indent=indent).encode("utf-8")
+
+
+class OrjsonCodec:
+    name = "orjson"
+
+    @staticmethod
+    def loads(data: Union[str, bytes, bytearray]) -> Any:
+        return orjson.loads(data)
+
+    @classmethod
+    def dumps(cls, obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False) -> str:
+        return cls.dumps_bytes(obj, default=default, indent=indent).decode("utf-8")
+
+    @staticmethod
+    def dumps_bytes(
+        obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False
+    ) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+
+
+BACKENDS: Dict[str, type] = {StdlibCodec.name: StdlibCodec}
+if orjson is not None:
+    BACKENDS[OrjsonCodec.name] = OrjsonCodec
+
+_codec = BACKENDS.get(OrjsonCodec.name, StdlibCodec)
+
+
+def use(name: str) -> None:
+    """switch the backend of the module functions, json or orjson"""
+    global _codec
+    if name not in BACKENDS:
+        raise ValueError(f"unavailable json backend: {name}")
+    _codec = BACKENDS[name]
+
+
+def backend() -> str:
+    return _codec.name
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    return _codec.loads(data)
+
+
+def dumps(obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False) -> str:
+    return _codec.dumps(obj, default=default, indent=indent)
+
+
+def dumps_bytes(obj: Any, default: Union[Callable[[Any], Any], None] = None, indent: bool = False) -> bytes:
+    return _codec.dumps_bytes(obj, default=default, indent=indent)
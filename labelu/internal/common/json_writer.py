@@ -0,0 +1,59 @@
+from typing import Any, Callable, TextIO, Union
+
+from . import json_codec
+
+
+class JsonArrayWriter:
+    """Write a JSON array to a text stream one element at a time.
+
+    Only the element being serialized is held in memory, so the size of the
+    array is not bounded by the available RAM.
+
+    Usage:
+        with file_full_path.open("w") as outfile:
+            with JsonArrayWriter(outfile, default=str) as writer:
+                for item in items:
+                    writer.write(item)
+    """
+
+    def __init__(self, stream: TextIO, default: Union[Callable[[Any], Any], None] = None):
+        self.stream = stream
+        self.default = default
+        self.count = 0
+
+    def __enter__(self) -> "JsonArrayWriter":
+        self.stream.write("[")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stream.write("]")
+
+    def write(self, item: Any) -> None:
+        if self.count:
+            self.stream.write(", ")
+        self.stream.write(json_codec.dumps(item, default=self.default))
+        self.count += 1
+
+
+class JsonLinesWriter:
+    """Write JSON Lines (one JSON document per line) to a text stream.
+
+    Every line is a complete document, so the output can be appended to by
+    later exports and consumed line by line.
+    """
+
+    def __init__(self, stream: TextIO, default: Union[Callable[[Any], Any], None] = None):
+        self.stream = stream
+        self.default = default
+        self.count = 0
+
+    def __enter__(self) -> "JsonLinesWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def write(self, item: Any) -> None:
+        self.stream.write(json_codec.dumps(item, default=self.default))
+        self.stream.write("\n")
+        self.count += 1
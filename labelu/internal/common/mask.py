@@ -0,0 +1,131 @@
+from functools import lru_cache
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .color import colors
+
+# colour of every instance id, 0 is the black background and the 255
+# colours repeat for the ids above 255
+_COLOR_TABLE = np.array(
+    [[c["rgb"]["r"], c["rgb"]["g"], c["rgb"]["b"]] for c in colors], dtype=np.uint8
+)
+
+# instance ids above this one need a 16-bit label image
+MAX_8BIT_INSTANCES = 255
+MAX_16BIT_INSTANCES = 65535
+
+# a semantic mask is a palette image up to this many classes, 255 is left
+# for the labels missing from the task config
+MAX_PALETTE_CLASSES = 254
+PALETTE_IGNORE_ID = 255
+
+
+def instance_color(instance_id: int) -> dict:
+    """the colour of instance_id, 1 based, in the segmentation image"""
+    return colors[(instance_id - 1) % 255 + 1]
+
+
+def palette(count: int) -> np.ndarray:
+    """lookup table of the colours of the instance ids 0 to count"""
+    ids = np.arange(count + 1)
+    ids[1:] = (ids[1:] - 1) % 255 + 1
+    return _COLOR_TABLE[ids]
+
+
+def rasterize(
+    polygons: Sequence[Sequence[float]],
+    width: int,
+    height: int,
+    ids: Union[Sequence[int], None] = None,
+) -> np.ndarray:
+    """draw the polygons in a single label array, polygon i filled with
+    ids[i], or with i + 1 without ids
+
+    The array is uint8 up to the id 255 and uint16 above, a later polygon
+    covers the earlier ones.
+    """
+    if ids is None:
+        ids = range(1, len(polygons) + 1)
+    max_id = max(ids, default=0)
+    if max_id > MAX_16BIT_INSTANCES:
+        raise ValueError(f"cannot rasterize ids above {MAX_16BIT_INSTANCES}")
+
+    mode = "L" if max_id <= MAX_8BIT_INSTANCES else "I"
+    labels = Image.new(mode, (width, height), 0)
+    draw = ImageDraw.Draw(labels)
+    for polygon, fill in zip(polygons, ids):
+        draw.polygon(polygon, fill=fill)
+
+    dtype = np.uint8 if mode == "L" else np.uint16
+    return np.asarray(labels).astype(dtype, copy=False)
+
+
+def label_image(labels: np.ndarray) -> Image.Image:
+    """the label array as an image, 8-bit grayscale or 16-bit for uint16"""
+    if labels.dtype == np.uint16:
+        return Image.fromarray(labels, mode="I;16")
+    return Image.fromarray(labels, mode="L")
+
+
+def color_image(labels: np.ndarray, count: int) -> Image.Image:
+    """the RGB image of the label array, the palette lookup is done by PIL"""
+    if labels.dtype == np.uint8:
+        img = Image.fromarray(labels, mode="L")
+        img.putpalette(_color_palette_bytes(count))
+        return img.convert("RGB")
+
+    # 16-bit labels, one packed RGBX uint32 per id
+    height, width = labels.shape
+    return Image.frombytes("RGB", (width, height), np.take(_color_lut(count), labels), "raw", "RGBX")
+
+
+@lru_cache(maxsize=None)
+def _color_palette_bytes(count: int) -> bytes:
+    # 8-bit labels hold the ids up to 255
+    count = min(count, MAX_8BIT_INSTANCES)
+    table = np.zeros((256, 3), dtype=np.uint8)
+    table[: count + 1] = palette(count)
+    return table.tobytes()
+
+
+@lru_cache(maxsize=None)
+def _color_lut(count: int) -> np.ndarray:
+    table = palette(count).astype("<u4")
+    return table[:, 0] | table[:, 1] << 8 | table[:, 2] << 16
+
+
+@lru_cache(maxsize=None)
+def _palette_bytes(count: int) -> bytes:
+    table = np.zeros((256, 3), dtype=np.uint8)
+    table[: count + 1] = palette(count)
+    table[PALETTE_IGNORE_ID] = 255
+    return table.tobytes()
+
+
+def palette_image(labels: np.ndarray, count: int) -> Image.Image:
+    """the uint8 label array of count classes as a "P" image, the colours of
+    the classes are embedded as its palette and the ignore id is white"""
+    img = Image.fromarray(labels, mode="L")
+    img.putpalette(_palette_bytes(count))
+    return img
+
+
+def rle_encode(mask: np.ndarray) -> Dict[str, List[int]]:
+    """COCO uncompressed RLE of a binary mask: the lengths of the alternating
+    runs of 0 and 1 in column major order, starting with 0"""
+    pixels = np.asarray(mask, dtype=bool).ravel(order="F")
+    changes = np.flatnonzero(pixels[1:] != pixels[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [pixels.size]))
+    counts = np.diff(bounds)
+    if pixels.size and pixels[0]:
+        counts = np.concatenate(([0], counts))
+    return {"counts": counts.tolist(), "size": list(mask.shape)}
+
+
+def polygon_rle(polygon: Sequence[float], width: int, height: int) -> Dict[str, List[int]]:
+    """COCO RLE of a polygon [x0, y0, x1, y1, ...] in a width x height image"""
+    mask = Image.new("1", (width, height), 0)
+    ImageDraw.Draw(mask).polygon(polygon, fill=1)
+    return rle_encode(np.asarray(mask))
@@ -0,0 +1,106 @@
+import itertools
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union
+
+from labelu.internal.common.config import settings
+from labelu.internal.common.converter import formats
+
+# the settings the sample converters read, they may be changed at runtime
+WORKER_SETTINGS = ("MEDIA_ROOT",)
+
+_pool: Union[ProcessPoolExecutor, None] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(worker_settings: Dict[str, Any]) -> None:
+    for key, value in worker_settings.items():
+        setattr(settings, key, value)
+
+
+def start_process_pool() -> ProcessPoolExecutor:
+    """the process pool shared by every export, created on the first call
+
+    Exports run in the export job threads, and forking a process from a thread
+    is unsafe, so the workers are started by a fork server (spawned where there
+    is none) instead. The fork server preloads the format modules only, not
+    the main module of the server.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(sorted({spec.module for spec in formats()}))
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.EXPORT_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=({key: getattr(settings, key) for key in WORKER_SETTINGS},),
+            )
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _apply(func: Callable[[Any], Any], chunk: List[Any]) -> List[Any]:
+    return [func(item) for item in chunk]
+
+
+def map_samples(
+    func: Callable[[Any], Any],
+    samples: Iterable[Any],
+    workers: Union[int, None] = None,
+    chunk_size: Union[int, None] = None,
+) -> Iterator[Any]:
+    """Apply func to every sample in the shared process pool, results keep the
+    input order.
+
+    Samples are sent to the workers in chunks of chunk_size, and at most two
+    chunks per worker are in flight, so samples are pulled from the input
+    lazily. Inputs that fit in a single chunk run in the current process.
+
+    Args:
+        func (Callable): a picklable, module level function (or partial of one)
+        samples (Iterable): samples to convert
+        workers (int, optional): worker processes this call keeps busy, at most
+            the ones of the pool. Defaults to settings.EXPORT_WORKERS.
+        chunk_size (int, optional): samples per task. Defaults to settings.EXPORT_CHUNK_SIZE.
+    """
+    workers = workers or settings.EXPORT_WORKERS
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+
+    samples = iter(samples)
+    chunks = iter(lambda: list(itertools.islice(samples, chunk_size)), [])
+
+    first_chunk = next(chunks, [])
+    second_chunk = next(chunks, []) if workers > 1 else []
+    if not second_chunk:
+        yield from _apply(func, first_chunk)
+        for chunk in chunks:
+            yield from _apply(func, chunk)
+        return
+
+    executor = start_process_pool()
+    pending = deque()
+    try:
+        for chunk in itertools.chain([first_chunk, second_chunk], chunks):
+            pending.append(executor.submit(_apply, func, chunk))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        # an abandoned or failed export leaves the pool to the others
+        for future in pending:
+            future.cancel()
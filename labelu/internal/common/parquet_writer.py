@@ -0,0 +1,79 @@
+"""Parquet writer of the PARQUET export, pyarrow is the optional parquet extra:
+
+    pip install labelu[parquet]
+
+Only import this module when exporting to parquet.
+"""
+from pathlib import Path
+from typing import List
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# one row per annotation object
+SCHEMA = pa.schema(
+    [
+        pa.field("sample_id", pa.int64()),
+        pa.field("file_name", pa.string()),
+        pa.field("tool", pa.string()),
+        pa.field("label", pa.string()),
+        pa.field("label_text", pa.string()),
+        # the point of a point or rect, the points of a line or polygon, the
+        # front then back corners of a cuboid
+        pa.field("x", pa.list_(pa.float64())),
+        pa.field("y", pa.list_(pa.float64())),
+        pa.field("width", pa.float64()),
+        pa.field("height", pa.float64()),
+        pa.field("attributes", pa.map_(pa.string(), pa.string())),
+        pa.field("order", pa.int64()),
+    ]
+)
+
+
+class ParquetRowWriter:
+    """Write rows to a parquet file in row groups of row_group_size rows.
+
+    Rows are dicts keyed by the SCHEMA fields, they are buffered per column
+    until a row group is full, so memory is bounded by the row group size.
+
+    Usage:
+        with ParquetRowWriter(file_full_path, row_group_size=10000) as writer:
+            for row in rows:
+                writer.write(row)
+    """
+
+    def __init__(self, file_full_path: Path, row_group_size: int):
+        self.file_full_path = file_full_path
+        self.row_group_size = row_group_size
+        self.count = 0
+        self._columns = {name: [] for name in SCHEMA.names}
+        self._buffered = 0
+        self._writer = None
+
+    def __enter__(self) -> "ParquetRowWriter":
+        self._writer = pq.ParquetWriter(self.file_full_path, SCHEMA, compression="zstd")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self._flush()
+        self._writer.close()
+
+    def write(self, row: dict) -> None:
+        for name, column in self._columns.items():
+            column.append(row.get(name))
+        self._buffered += 1
+        self.count += 1
+        if self._buffered >= self.row_group_size:
+            self._flush()
+
+    def write_rows(self, rows: List[dict]) -> None:
+        for row in rows:
+            self.write(row)
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+        self._writer.write_table(pa.Table.from_pydict(self._columns, schema=SCHEMA))
+        self._columns = {name: [] for name in SCHEMA.names}
+        self._buffered = 0
@@ -0,0 +1,47 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+
+def polygon_stats(
+    polygons: Sequence[Sequence[Tuple[float, float]]]
+) -> Tuple[List[List[float]], List[float]]:
+    """COCO bbox [x, y, width, height] and shoelace area of every polygon
+
+    The points of all the polygons are concatenated and reduced per polygon
+    in a few numpy calls, whatever the number of polygons. A polygon without
+    points gets an empty bbox and a 0 area.
+    """
+    counts = np.array([len(p) for p in polygons], dtype=np.intp)
+    bboxes = [[] for _ in polygons]
+    areas = [0.0 for _ in polygons]
+    non_empty = np.flatnonzero(counts)
+    if not len(non_empty):
+        return bboxes, areas
+
+    points = np.array(
+        [point for i in non_empty for point in polygons[i]], dtype=np.float64
+    ).reshape(-1, 2)
+    x, y = points[:, 0], points[:, 1]
+    starts = np.concatenate(([0], np.cumsum(counts[non_empty])[:-1]))
+
+    min_x = np.minimum.reduceat(x, starts)
+    min_y = np.minimum.reduceat(y, starts)
+    max_x = np.maximum.reduceat(x, starts)
+    max_y = np.maximum.reduceat(y, starts)
+
+    # the next vertex of every vertex, the last one of a polygon closes it
+    following = np.arange(1, len(points) + 1)
+    following[np.cumsum(counts[non_empty]) - 1] = starts
+    cross = x * y[following] - x[following] * y
+    polygon_areas = np.abs(np.add.reduceat(cross, starts)) / 2.0
+
+    for n, i in enumerate(non_empty):
+        bboxes[i] = [
+            min_x[n].item(),
+            min_y[n].item(),
+            (max_x[n] - min_x[n]).item(),
+            (max_y[n] - min_y[n]).item(),
+        ]
+        areas[i] = polygon_areas[n].item()
+    return bboxes, areas
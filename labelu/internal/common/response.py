@@ -0,0 +1,13 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from labelu.internal.common import json_codec
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered by json_codec, with orjson when installed, the
+    default response class of the app"""
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps_bytes(content)
@@ -0,0 +1,86 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, NamedTuple, Tuple, Union
+
+from fastapi import status
+from loguru import logger
+
+from labelu.internal.common.error_code import ErrorCode, LabelUException
+from labelu.internal.domain.models.sample import SampleState
+
+# the sort keys a cursor can walk, as allowed by the sort of the sample list
+CURSOR_SORT_KEYS = ("annotated_count", "state", "inner_id", "updated_at")
+
+
+class SampleCursor(NamedTuple):
+    """a position in the (sort key, id) order of the samples of a task"""
+
+    sorting: str
+    value: Any
+    sample_id: int
+    backward: bool
+
+
+def sort_order(sorting: Union[str, None]) -> Union[Tuple[Union[str, None], bool], None]:
+    """the sort key and direction of a single key sorting, (None, True) for the
+    id order, None when a cursor cannot walk it"""
+    if not sorting:
+        return None, True
+    key, _, direction = sorting.partition(":")
+    if key not in CURSOR_SORT_KEYS or direction not in ("asc", "desc"):
+        return None
+    return key, direction == "asc"
+
+
+def encode_sample_cursor(task_id: int, sorting: Union[str, None], value: Any, sample_id: int, backward: bool) -> str:
+    content = json.dumps(
+        {
+            "t": task_id,
+            "s": sorting or "",
+            "v": value.isoformat() if isinstance(value, datetime) else value,
+            "i": sample_id,
+            "b": backward,
+        },
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(content.encode("utf-8")).decode("ascii")
+
+
+def decode_sample_cursor(cursor: str, task_id: int, sorting: Union[str, None]) -> SampleCursor:
+    """the position of a cursor, sorting must be empty or the one of the cursor"""
+    try:
+        content = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        cursor_sorting = content["s"]
+        key, _ = sort_order(cursor_sorting)
+        value = content["v"]
+        if value is not None:
+            if key == "updated_at":
+                value = datetime.fromisoformat(value)
+            elif key == "state":
+                value = SampleState(value).value
+            elif key is not None:
+                value = int(value)
+        decoded = SampleCursor(cursor_sorting, value, int(content["i"]), bool(content["b"]))
+        token_task_id = content["t"]
+    except Exception:
+        logger.error("invalid sample cursor: {}", cursor)
+        raise LabelUException(
+            code=ErrorCode.CODE_55004_SAMPLE_CURSOR_INVALID,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if token_task_id != task_id or (sorting and sorting != cursor_sorting):
+        logger.error(
+            "sample cursor of task:{} sorted by:{} used for task:{} sorted by:{}",
+            token_task_id,
+            cursor_sorting,
+            task_id,
+            sorting,
+        )
+        raise LabelUException(
+            code=ErrorCode.CODE_55004_SAMPLE_CURSOR_INVALID,
+            status_code=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return decoded
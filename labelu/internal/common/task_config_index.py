@@ -0,0 +1,101 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Union
+
+from loguru import logger
+
+
+class TaskConfigIndex:
+    """The label lookups of a task config, compiled once for every export.
+
+    A label of a result is the value of an attribute of the config, its
+    text is the key of that attribute, looked up in the attributes of the
+    tool first and in the common attributes then. Every lookup is a dict
+    access, the index is small and picklable so that it is shared with the
+    export process pool.
+    """
+
+    def __init__(self, config: Union[dict, None]):
+        config = config or {}
+
+        # (value, key) of the attributes, in config order
+        self.tool_attributes: Dict[str, List[Tuple[str, str]]] = {}
+        for tool in config.get("tools", []):
+            self.tool_attributes[tool.get("tool")] = [
+                (attr.get("value"), attr.get("key")) for attr in tool.get("config", {}).get("attributes", [])
+            ]
+        self.common_attributes: List[Tuple[str, str]] = [
+            (attr.get("value"), attr.get("key")) for attr in config.get("attributes", [])
+        ]
+
+        # label value -> label text
+        self.tool_labels: Dict[str, Dict[str, str]] = {
+            tool: dict(attributes) for tool, attributes in self.tool_attributes.items()
+        }
+        self.common_labels: Dict[str, str] = dict(self.common_attributes)
+
+        # YOLO classes, the tool labels then the common ones, a label is
+        # numbered after its first occurrence
+        self.classes: List[str] = [
+            value for attributes in self.tool_attributes.values() for value, _ in attributes
+        ] + [value for value, _ in self.common_attributes]
+        self.class_ids: Dict[str, int] = {}
+        for class_id, value in enumerate(self.classes):
+            self.class_ids.setdefault(value, class_id)
+
+        # COCO categories, the common labels then the tool ones, a label is
+        # numbered after its last occurrence
+        self.categories: List[dict] = [
+            {"id": category_id, "name": value or "", "supercategory": ""}
+            for category_id, value in enumerate(
+                [value for value, _ in self.common_attributes]
+                + [value for attributes in self.tool_attributes.values() for value, _ in attributes]
+            )
+        ]
+        self.category_ids: Dict[str, int] = {c["name"]: c["id"] for c in self.categories}
+
+    def label(self, tool: str, value: str) -> str:
+        """the text of a label of tool, empty for an unknown label"""
+        return self.tool_labels.get(tool, {}).get(value, "") or self.common_labels.get(value, "")
+
+
+def config_hash(config: Union[str, None]) -> str:
+    return hashlib.sha256((config or "").encode("utf-8")).hexdigest()
+
+
+class TaskConfigIndexCache:
+    """Compiled config indexes by task id and config hash, least recently
+    used first out.
+
+    A task holds a single entry, the one of its current config. Updating
+    the task drops it, an entry of an older config is replaced anyway since
+    its hash does not match.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[str, TaskConfigIndex]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, task_id: int, config: Union[str, None]) -> TaskConfigIndex:
+        key = config_hash(config)
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry and entry[0] == key:
+                self._entries.move_to_end(task_id)
+                return entry[1]
+
+        logger.info("compile config index of task:{}", task_id)
+        index = TaskConfigIndex(json.loads(config) if config else {})
+        with self._lock:
+            self._entries[task_id] = (key, index)
+            self._entries.move_to_end(task_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, task_id: int) -> None:
+        with self._lock:
+            self._entries.pop(task_id, None)
@@ -1,9 +1,76 @@
-import json
 import os
-from PIL import Image
-from typing import List
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Tuple
 from tfrecord import example_pb2
+from tfrecord.writer import TFRecordWriter
+from labelu.internal.common import json_codec
 from labelu.internal.common.config import settings
+from labelu.internal.common.image import stored_image_size
+from labelu.internal.common.task_config_index import TaskConfigIndex
+
+
+class TFRecordShardWriter:
+    """Write framed TFRecord records to num_shards files, balanced by size.
+
+    Every record is framed as in TensorFlow: its length as a little endian
+    uint64, the masked CRC32C of the length, the record and its masked
+    CRC32C. A record goes to the smallest shard so far, the shards end up
+    within one record of each other whatever the size of the images.
+
+    Usage:
+        with TFRecordShardWriter(shard_dir, "task-1", 4) as writer:
+            for record in records:
+                writer.write(record)
+        shards = writer.shards
+    """
+
+    def __init__(self, out_dir: Path, prefix: str, num_shards: int):
+        self.out_dir = Path(out_dir)
+        self.prefix = prefix
+        self.num_shards = max(num_shards, 1)
+        self.sizes = [0] * self.num_shards
+        self.shards: List[Tuple[str, Path]] = []
+        self._files: List[BinaryIO] = []
+
+    def __enter__(self) -> "TFRecordShardWriter":
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self._files = [
+            self.out_dir.joinpath(f"{self.prefix}.shard{i}").open("wb") for i in range(self.num_shards)
+        ]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, record: bytes) -> None:
+        shard = self.sizes.index(min(self.sizes))
+        length = struct.pack("<Q", len(record))
+        f = self._files[shard]
+        f.write(length)
+        f.write(TFRecordWriter.masked_crc(length))
+        f.write(record)
+        f.write(TFRecordWriter.masked_crc(record))
+        self.sizes[shard] += len(record) + 16
+
+    def close(self) -> None:
+        """close the shard files, the empty ones are removed and the others
+        named {prefix}.tfrecord-{index}-of-{count}"""
+        if not self._files:
+            return
+
+        paths = [Path(f.name) for f in self._files]
+        for f in self._files:
+            f.close()
+        self._files = []
+
+        written = [path for path, size in zip(paths, self.sizes) if size]
+        for path, size in zip(paths, self.sizes):
+            if not size:
+                path.unlink()
+        for index, path in enumerate(written):
+            name = f"{self.prefix}.tfrecord-{index:05d}-of-{len(written):05d}"
+            self.shards.append((name, path))
 
 class TF_record_converter:
     def __init__(self):
@@ -15,50 +82,32 @@ class TF_record_converter:
             
         return self.label_map[label]
         
-    def create_tf_examples(self, sample_results: List[dict], config: dict):
-        examples = []
-        label_text_dict = {}
-        
-        for tool in config.get("tools", []):
-            label_text_dict[tool.get("tool")] = { attr.get("value"): attr.get("key") for attr in tool.get("config", {}).get("attributes", [])}
-        
-        common_attributes = { attr.get("value"): attr.get("key") for attr in config.get("attributes", [])}
-        
-        def get_label(_tool: str, _input_label: str):
-            _label = label_text_dict.get(_tool, {}).get(_input_label, "")
-            
-            if not _label:
-                _label = common_attributes.get(_input_label, "")
-                
-            return _label
-        
-        classes_text = []
-        classes = []
-        
+    def create_tf_examples(
+        self, sample_results: Iterable[dict], index: TaskConfigIndex
+    ) -> Iterator[Tuple[dict, example_pb2.Example]]:
+        """yield (sample, example) for every annotated sample, in a single pass"""
         for sample in sample_results:
-            data = json.loads(sample.get("data"))
+            data = json_codec.loads(sample.get("data"))
             file = sample.get("file", {})
             
             # skip invalid data
-            annotated_result = json.loads(data.get("result"))
+            annotated_result = json_codec.loads(data.get("result"))
             if sample.get("state") == "SKIPPED" or not annotated_result:
                 continue
             
-            image_width = annotated_result.get("width", 0)
-            image_height = annotated_result.get("height", 0)
             rotate = annotated_result.get("rotate", 0)
             
             _, file_extension = os.path.splitext(file.get("filename", ""))
+            image_format = (file.get("format") or file_extension.lstrip(".")).lower()
             
+            # the original encoded file, not decoded pixels, consumers decode
+            # it and apply image/rotate themselves
             file_full_path = settings.MEDIA_ROOT.joinpath(file.get("path").lstrip("/"))
+            image_width, image_height = stored_image_size(file)
+            encoded_image_data = file_full_path.read_bytes()
             
-            with Image.open(file_full_path) as img:
-                if rotate:
-                    img = img.rotate(rotate)
-
-                image_width, image_height = img.size
-                encoded_image_data = img.tobytes()
-            
+            classes_text = []
+            classes = []
             xmins = []
             xmaxs = []
             ymins = []
@@ -80,14 +129,15 @@ class TF_record_converter:
                 "image/filename": self._bytes_feature(file['filename'].encode('utf8')),
                 "image/source_id": self._bytes_feature(file['filename'].encode('utf8')),
                 "image/encoded": self._bytes_feature(encoded_image_data),
-                "image/format": self._bytes_feature(file_extension.encode('utf8')),
+                "image/format": self._bytes_feature(image_format.encode('utf8')),
+                "image/rotate": self._int64_feature(int(rotate)),
             }
 
             for tool in annotated_result.copy().keys():
                 tool_results = annotated_result.pop(tool)
                 if tool == "rectTool":
                     for tool_result in tool_results.get("result", []):
-                        label_text = get_label(tool, tool_result.get("label", ""))
+                        label_text = index.label(tool, tool_result.get("label", ""))
                         classes_text.append(label_text.encode('utf8'))
                         classes.append(self._get_label_id(label_text))
                         xmins.append(tool_result.get("x", 0) / image_width)
@@ -107,8 +157,8 @@ class TF_record_converter:
                     for tool_result in tool_results.get("result", []):
                         points = tool_result.get("points", [])
                         
-                        label_text = get_label(tool, tool_result.get("label", ""))
-                        classes.append(label_text.encode('utf8'))
+                        label_text = index.label(tool, tool_result.get("label", ""))
+                        classes_text.append(label_text.encode('utf8'))
                         classes.append(self._get_label_id(label_text))
                         
                         for point in points:
@@ -210,9 +260,7 @@ class TF_record_converter:
                 }
             )
             
-            examples.append(example_pb2.Example(features=example_pb2.Features(feature=base_info)))
-        
-        return examples            
+            yield sample, example_pb2.Example(features=example_pb2.Features(feature=base_info))
         
     
     def _bytes_feature(self, value: bytes | List[bytes]):
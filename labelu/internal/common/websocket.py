@@ -17,6 +17,7 @@ class MessageType(str, Enum):
     PING = "ping"
     PONG = "pong"
     UPDATE = "update"
+    EXPORT = "export"
 
 class Message(BaseModel):
     type: MessageType
@@ -0,0 +1,32 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Union
+
+
+class BoundedWorkerPool:
+    """A thread pool with a bounded backlog.
+
+    At most max_workers jobs run at the same time and at most max_queue jobs
+    wait for a free worker, submit returns None instead of queueing more.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, thread_name_prefix: str = ""):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=thread_name_prefix
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Union[Future, None]:
+        if not self._slots.acquire(blocking=False):
+            return None
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
@@ -1,8 +1,9 @@
 import xml.etree.ElementTree as ET
 from labelu.internal.common.config import settings
+from labelu.internal.common.task_config_index import TaskConfigIndex
 
 class XML_converter:
-    def create_pascal_voc_xml(self, config: dict, file: dict, sample_result: dict):
+    def create_pascal_voc_xml(self, index: TaskConfigIndex, file: dict, sample_result: dict):
         annotation = ET.Element("annotation")
         
         folder = ET.SubElement(annotation, "folder")
@@ -27,21 +28,6 @@ class XML_converter:
         rotate = ET.SubElement(size_elem, "rotate")
         rotate.text = str(sample_result.get("rotate", 0))
         
-        label_text_dict = {}
-        
-        for tool in config.get("tools", []):
-            label_text_dict[tool.get("tool")] = { attr.get("value"): attr.get("key") for attr in tool.get("config", {}).get("attributes", [])}
-        
-        common_attributes = { attr.get("value"): attr.get("key") for attr in config.get("attributes", [])}
-        
-        def get_label(_tool: str, _input_label: str):
-            _label = label_text_dict.get(_tool, {}).get(_input_label, "")
-            
-            if not _label:
-                _label = common_attributes.get(_input_label, "")
-                
-            return _label
-        
         for tool in sample_result.copy().keys():
             tool_results = sample_result.pop(tool)
             
@@ -50,7 +36,7 @@ class XML_converter:
                     
                     obj_elem = ET.SubElement(annotation, "object")
                     name = ET.SubElement(obj_elem, "name")
-                    name.text = get_label(tool, tool_result.get("label", ""))
+                    name.text = index.label(tool, tool_result.get("label", ""))
                     # get value from attributes
                     truncated = ET.SubElement(obj_elem, "truncated")
                     truncated_value = tool_result.get("attributes", {}).get("truncated", [0])
@@ -0,0 +1,38 @@
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Union
+
+
+class XmlElementWriter:
+    """Write the children of an XML root element to a binary stream one at a time.
+
+    The document is the same as ElementTree.write of the whole tree, with a
+    utf-8 declaration, but only the element being written is held in memory.
+
+    Usage:
+        with file_full_path.open("wb") as outfile:
+            with XmlElementWriter(outfile, "root") as writer:
+                for element in elements:
+                    writer.write(element)
+    """
+
+    def __init__(self, stream: BinaryIO, root_tag: str):
+        self.stream = stream
+        self.root_tag = root_tag
+        self.count = 0
+
+    def __enter__(self) -> "XmlElementWriter":
+        self.stream.write(b"<?xml version='1.0' encoding='utf-8'?>\n")
+        self.stream.write(f"<{self.root_tag}>".encode("utf-8"))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stream.write(f"</{self.root_tag}>".encode("utf-8"))
+
+    def write(self, element: Union[ET.Element, bytes]) -> None:
+        """write an element, or an element already serialized by serialize"""
+        self.stream.write(element if isinstance(element, bytes) else serialize(element))
+        self.count += 1
+
+
+def serialize(element: ET.Element) -> bytes:
+    return ET.tostring(element, encoding="utf-8", xml_declaration=False)
@@ -0,0 +1,139 @@
+import io
+import queue
+import shutil
+import threading
+from pathlib import Path
+from typing import BinaryIO, Iterator, Union
+from zipfile import ZIP_STORED, ZipFile, ZipInfo
+
+
+class ZipStream:
+    """Write a zip archive member by member to a binary stream.
+
+    Members are serialized straight into the archive, nothing is staged on
+    disk. The stream does not need to be seekable: zipfile then writes a
+    data descriptor after every member. ZIP64 records are used once the
+    archive outgrows the classic 4GB / 65535 members limits.
+
+    Usage:
+        with file_full_path_zip.open("wb") as outfile:
+            with ZipStream(outfile) as zipf:
+                zipf.write("result.json", content)
+    """
+
+    def __init__(self, stream: BinaryIO, compression: int = ZIP_STORED):
+        self._zipf = ZipFile(stream, "w", compression=compression, allowZip64=True)
+
+    def __enter__(self) -> "ZipStream":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def write(self, arcname: str, data: Union[bytes, str]) -> None:
+        self._zipf.writestr(arcname, data)
+
+    def open(self, arcname: str) -> BinaryIO:
+        """a writable member, for content written in parts"""
+        return self._zipf.open(arcname, "w", force_zip64=True)
+
+    def write_file(self, arcname: str, path: Union[str, Path]) -> None:
+        """copy a file into the archive without reading it in memory"""
+        zinfo = ZipInfo.from_file(path, arcname=arcname)
+        zinfo.compress_type = self._zipf.compression
+        with open(path, "rb") as src, self._zipf.open(zinfo, "w", force_zip64=True) as dest:
+            shutil.copyfileobj(src, dest, 1024 * 1024)
+
+    def close(self) -> None:
+        self._zipf.close()
+
+
+class StreamCancelled(Exception):
+    """the reader of a ChunkStream went away"""
+
+
+class ChunkStream(io.RawIOBase):
+    """A write-only stream read back as an iterator of chunks by another thread.
+
+    The writer blocks once max_chunks chunks are waiting, so a slow reader
+    bounds the memory used. If the reader stops iterating, the next write
+    raises StreamCancelled.
+    """
+
+    _END = object()
+
+    def __init__(self, chunk_size: int = 64 * 1024, max_chunks: int = 16):
+        super().__init__()
+        self._chunk_size = chunk_size
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._buffer = bytearray()
+        self._cancelled = threading.Event()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buffer += b
+        if len(self._buffer) >= self._chunk_size:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(b)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            if self._buffer:
+                self._put(bytes(self._buffer))
+                self._buffer.clear()
+            self._put(self._END)
+        except StreamCancelled:
+            pass
+        finally:
+            super().close()
+
+    def fail(self, exc: BaseException) -> None:
+        """hand the error of the writer to the reader"""
+        if not self._cancelled.is_set():
+            self._put(exc)
+
+    def _put(self, item) -> None:
+        while True:
+            if self._cancelled.is_set():
+                raise StreamCancelled()
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while True:
+                item = self._queue.get()
+                if item is self._END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self._cancelled.set()
+
+
+class TeeStream(io.RawIOBase):
+    """A write-only stream copying every write to a second stream.
+
+    Neither stream is closed with it, they belong to the caller.
+    """
+
+    def __init__(self, stream: BinaryIO, copy: BinaryIO):
+        super().__init__()
+        self._stream = stream
+        self._copy = copy
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._copy.write(b)
+        return self._stream.write(b)
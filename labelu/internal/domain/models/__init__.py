@@ -5,4 +5,7 @@ from .user import User
 from .task_collaborator import TaskCollaborator
 from .task_sample_updater import TaskSampleUpdater
 from .pre_annotation import TaskPreAnnotation
-from .points import UserPoints, PointsHistory
\ No newline at end of file
+from .points import UserPoints, PointsHistory
+from .export_job import ExportJob
+from .annotation import TaskAnnotation
+from .task_stats import TaskStats
\ No newline at end of file
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from sqlalchemy.schema import Index
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
+
+from labelu.internal.common.db import Base
+
+
+class TaskAnnotation(Base):
+    __tablename__ = "task_annotation"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    task_id = Column(Integer, ForeignKey("task.id"), comment="task of the sample")
+    sample_id = Column(Integer, ForeignKey("task_sample.id"), index=True)
+    object_id = Column(String(64), comment="id of the object in the sample result")
+    tool = Column(String(32), comment="rectTool, polygonTool etc.")
+    label = Column(String(256), comment="label value of the object")
+    order = Column(Integer, comment="order of the object in the sample")
+    x = Column(Float, comment="bounding box left, none for tags and texts")
+    y = Column(Float, comment="bounding box top")
+    width = Column(Float, comment="bounding box width")
+    height = Column(Float, comment="bounding box height")
+    area = Column(Float, comment="area of a rect or polygon")
+    geometry = Column(Text, comment="the object of the sample result, json")
+    created_at = Column(
+        DateTime(timezone=True), default=datetime.now, comment="Time the object was saved"
+    )
+
+    Index("idx_annotation_task_id_label", task_id, label)
+    Index("idx_annotation_task_id_tool", task_id, tool)
@@ -13,6 +13,10 @@ class TaskAttachment(Base):
     filename = Column(String(256), comment="file name")
     url = Column(String(256), comment="file url")
     path = Column(String(256), comment="file storage path")
+    width = Column(Integer, comment="image width in pixels, as stored")
+    height = Column(Integer, comment="image height in pixels, as stored")
+    format = Column(String(16), comment="image format, JPEG, PNG etc.")
+    orientation = Column(Integer, comment="image EXIF orientation, 1 is upright")
     task_id = Column(Integer, ForeignKey("task.id"), index=True)
     created_by = Column(Integer, ForeignKey("user.id"), index=True)
     updated_by = Column(Integer, ForeignKey("user.id"), index=True)
@@ -0,0 +1,55 @@
+from enum import Enum
+from datetime import datetime
+
+from sqlalchemy.schema import Index
+from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+
+from labelu.internal.common.db import Base
+
+
+class ExportJobStatus(str, Enum):
+    """
+    export job status
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    SUCCESS = "SUCCESS"
+    FAILED = "FAILED"
+
+
+class ExportJob(Base):
+    __tablename__ = "export_job"
+
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
+    task_id = Column(Integer, ForeignKey("task.id"), index=True)
+    export_type = Column(String(32), comment="export file type, JSON, COCO, MASK etc.")
+    sample_ids = Column(Text, comment="json list of the exported sample ids")
+    since = Column(String(256), comment="export token of a previous export, only changes after it are exported")
+    token = Column(String(256), comment="export token to pass as since to the next delta export")
+    options = Column(Text, comment="json format options of the export")
+    status = Column(
+        String(32),
+        default=ExportJobStatus.PENDING.value,
+        comment="PENDING is waiting for a worker, RUNNING, SUCCESS or FAILED",
+    )
+    progress = Column(Integer, default=0, comment="export progress in percent")
+    file_path = Column(String(512), comment="full path of the exported file")
+    error = Column(Text, comment="error message of a failed export")
+    worker = Column(String(128), comment="host:pid of the process running the job")
+    created_by = Column(Integer, ForeignKey("user.id"), index=True)
+    created_at = Column(
+        DateTime(timezone=True), default=datetime.now, comment="Time an export job was created"
+    )
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=datetime.now,
+        onupdate=datetime.now,
+        comment="Last time an export job was updated",
+    )
+    finished_at = Column(DateTime(timezone=True), comment="Time an export job finished")
+
+    owner = relationship("User", foreign_keys=[created_by])
+
+    Index("idx_export_job_task_id_status", task_id, status)
@@ -48,6 +48,20 @@ class TaskSample(Base):
         comment="NEW is has not start yet, DONE is completed, SKIPPED is skipped",
     )
     deleted_at = Column(DateTime(timezone=True), index=True, comment="Task delete time")
+    version = Column(
+        Integer,
+        nullable=False,
+        default=1,
+        server_default="1",
+        comment="incremented on every update, the ETag of the sample",
+    )
+    change_seq = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="change sequence number of the last create, update or delete in the task",
+    )
 
     # 由旧的data里的fileNames和urls中的唯一一个，迁移到media中
     file = relationship("TaskAttachment", foreign_keys=[file_id])
@@ -55,4 +69,14 @@ class TaskSample(Base):
     owner = relationship("User", foreign_keys=[created_by])
     updaters = relationship("User", secondary="task_sample_updater")
 
+    # an update of a sample only applies to the version it was read at
+    __mapper_args__ = {"version_id_col": version}
+
     Index("idx_sample_id_deleted_at", id, deleted_at)
+    Index("idx_sample_task_id_updated_at_id", task_id, updated_at, id)
+    # changed samples are looked up by task and change sequence number
+    Index("idx_sample_task_id_change_seq", task_id, change_seq)
+    # keyset pagination, one per sort key of the sample list
+    Index("idx_sample_task_id_inner_id_id", task_id, inner_id, id)
+    Index("idx_sample_task_id_state_id", task_id, state, id)
+    Index("idx_sample_task_id_annotated_count_id", task_id, annotated_count, id)
@@ -41,6 +41,13 @@ class Task(Base):
     last_sample_inner_id = Column(
         Integer, default=0, comment="The last inner id of sample in a task"
     )
+    last_change_seq = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default="0",
+        comment="The last change sequence number of the samples in a task",
+    )
     config = Column(Text, comment="task config yaml")
     media_type = Column(
         String(32),
@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from labelu.internal.common.db import Base
+
+
+class TaskStats(Base):
+    __tablename__ = "task_stats"
+    """Sample counters of a task, kept in step with its samples.
+    """
+
+    task_id = Column(Integer, ForeignKey("task.id"), primary_key=True)
+    new = Column(Integer, default=0, comment="count of the NEW samples")
+    done = Column(Integer, default=0, comment="count of the DONE samples")
+    skipped = Column(Integer, default=0, comment="count of the SKIPPED samples")
+    total = Column(Integer, default=0, comment="count of the samples, deleted excluded")
+    annotated_count = Column(Integer, default=0, comment="sum of the annotated count of the samples")
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=datetime.now,
+        onupdate=datetime.now,
+        comment="Last time the counters were updated",
+    )
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, List, Optional
 from loguru import logger
 import uvicorn
 from typer import Typer
@@ -9,11 +9,15 @@ from labelu.internal.adapter.routers import add_router
 from labelu.internal.adapter.ws import add_ws_router
 from labelu.internal.middleware import add_middleware
 from labelu.internal.common.logger import init_logging
-from labelu.internal.common.db import init_tables
+from labelu.internal.common.db import init_tables, SessionLocal
 from labelu.internal.common.config import settings
 from labelu.internal.common.error_code import add_exception_handler
+from labelu.internal.common.parallel import start_process_pool, shutdown_process_pool
+from labelu.internal.common.response import CodecJSONResponse
 from labelu.alembic_labelu.run_migrate import run_db_migrations
 from labelu.scripts.migrate_to_mysql import migrate_to_mysql
+from labelu.scripts.reconcile_task_stats import reconcile_task_stats
+from labelu.internal.application.service import export_job as export_job_service
 
 from .version import version as labelu_version
 
@@ -51,6 +55,7 @@ You will be able to:
 * **get sample**
 * **update sample**
 * **export sample**
+* **export sample in background**
 """
 
 
@@ -88,22 +93,36 @@ app = FastAPI(
         "url": "https://www.apache.org/licenses/LICENSE-2.0.html",
     },
     openapi_tags=tags_metadata,
+    default_response_class=CodecJSONResponse,
 )
 
 init_logging()
-init_tables()
-run_db_migrations()
 add_exception_handler(app=app)
 add_router(app=app)
 add_ws_router(app=app)
 add_middleware(app=app)
 
+def init_database():
+    # not at import, the export worker processes import this module as well
+    init_tables()
+    run_db_migrations()
+
 def startup():
+    init_database()
     if settings.need_migration_to_mysql:
         logger.info("Migrating database to MySQL")
         migrate_to_mysql()
 
+    db = SessionLocal()
+    try:
+        export_job_service.recover(db=db)
+    finally:
+        db.close()
+
+    start_process_pool()
+
 app.add_event_handler("startup", startup)
+app.add_event_handler("shutdown", shutdown_process_pool)
 
 class NoCacheStaticFiles(StaticFiles):
     def __init__(self, *args: Any, **kwargs: Any):
@@ -130,8 +149,15 @@ cli = Typer()
 @cli.command('migrate_to_mysql')
 def to_mysql():
     """Migrate database to MySQL"""
+    init_database()
     migrate_to_mysql()
 
+@cli.command('reconcile_task_stats')
+def reconcile_stats(task_id: Optional[List[int]] = None):
+    """Count the sample counters of the tasks again, all of them without --task-id"""
+    init_database()
+    reconcile_task_stats(task_ids=task_id or None)
+
 @cli.callback(invoke_without_command=True)
 def main(
     host: str = "localhost", port: int = 8000, media_host: str = "http://localhost:8000"
@@ -0,0 +1,233 @@
+"""Export benchmark: converts synthetic tasks to every export format and
+reports samples/sec, peak RSS and output size, compared to a baseline.
+
+    python -m labelu.scripts.benchmark_export --sizes 1000,10000,100000
+    python -m labelu.scripts.benchmark_export --sizes 1000 --save-baseline
+    python -m labelu.scripts.benchmark_export --sizes 1000 --formats COCO,MASK
+
+Every case runs in a fresh process, so that its peak RSS is its own. The
+process exits with 1 when a case regressed beyond the threshold.
+"""
+import json
+import multiprocessing
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+import typer
+from loguru import logger
+from PIL import Image
+
+BASELINE_PATH = Path(__file__).parent.joinpath("benchmark_export_baseline.json")
+
+IMAGE_COUNT = 16
+IMAGE_SIZE = (640, 480)
+LABELS = ["car", "person", "tree", "sign"]
+TOOLS = ["rectTool", "polygonTool", "lineTool", "pointTool", "cuboidTool"]
+
+
+def task_config() -> dict:
+    attributes = [{"key": label.title(), "value": label} for label in LABELS]
+    return {
+        "tools": [{"tool": tool, "config": {"attributes": attributes}} for tool in TOOLS]
+        + [{"tool": "tagTool", "config": {}}, {"tool": "textTool", "config": {}}],
+        "attributes": attributes,
+    }
+
+
+def make_images(media_root: Path) -> List[dict]:
+    """IMAGE_COUNT small images shared by the samples, as the file of a sample"""
+    upload_dir = media_root.joinpath("upload", "benchmark")
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    width, height = IMAGE_SIZE
+    files = []
+    for i in range(IMAGE_COUNT):
+        filename = f"image-{i}.jpg"
+        Image.new("RGB", IMAGE_SIZE, (i * 16 % 256, 128, 64)).save(upload_dir.joinpath(filename), "JPEG")
+        files.append(
+            {
+                "filename": filename,
+                "path": f"upload/benchmark/{filename}",
+                "url": f"/api/v1/tasks/attachment/upload/benchmark/{filename}",
+                "width": width,
+                "height": height,
+                "format": "JPEG",
+                "orientation": 1,
+            }
+        )
+    return files
+
+
+def _point(rng: random.Random) -> dict:
+    width, height = IMAGE_SIZE
+    return {"x": round(rng.uniform(0, width), 2), "y": round(rng.uniform(0, height), 2)}
+
+
+def make_result(rng: random.Random, objects: int = 8) -> dict:
+    """an annotation result mixing every tool"""
+    width, height = IMAGE_SIZE
+    result = {"width": width, "height": height, "rotate": 0, "valid": True}
+    for tool in TOOLS:
+        result[tool] = {"toolName": tool, "result": []}
+    for order in range(objects):
+        tool = TOOLS[order % len(TOOLS)]
+        item = {"id": f"o{order}", "label": rng.choice(LABELS), "order": order, "attributes": {}}
+        if tool == "rectTool":
+            item.update(x=rng.uniform(0, width / 2), y=rng.uniform(0, height / 2), width=50, height=40)
+        elif tool in ("polygonTool", "lineTool"):
+            item["points"] = [_point(rng) for _ in range(rng.randint(3, 12))]
+        elif tool == "pointTool":
+            item.update(_point(rng))
+        else:
+            item["front"] = {corner: _point(rng) for corner in ("tl", "tr", "br", "bl")}
+            item["back"] = {corner: _point(rng) for corner in ("tl", "tr", "br", "bl")}
+        result[tool]["result"].append(item)
+    result["tagTool"] = {"toolName": "tagTool", "result": [{"id": "t", "value": {"weather": ["sunny"]}}]}
+    result["textTool"] = {"toolName": "textTool", "result": [{"id": "x", "value": {"note": "synthetic"}}]}
+    return result
+
+
+def make_samples(count: int, files: List[dict], seed: int = 0) -> Iterator[dict]:
+    """samples shaped like crud_sample.iter_for_export, generated lazily"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": i + 1,
+            # a few skipped samples, as in real tasks
+            "state": "SKIPPED" if i % 50 == 49 else "DONE",
+            "data": json.dumps({"result": json.dumps(make_result(rng))}),
+            # the images are shared, the file names are not: archives hold a member per sample
+            "file": {**files[i % len(files)], "filename": f"sample-{i + 1}.jpg"},
+        }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KB on linux, the workers of the export pool are children
+    usage = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return round(usage / 1024 if sys.platform != "darwin" else usage / 1024 / 1024, 1)
+
+
+def _output_bytes(path: Path) -> int:
+    path = Path(path)
+    if path.is_dir():
+        return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return path.stat().st_size
+
+
+def run_case(export_format: str, size: int) -> Dict[str, Union[str, int, float]]:
+    """convert a synthetic task of size samples to export_format, in this process"""
+    from labelu.internal.common.config import settings
+    from labelu.internal.common.converter import converter
+
+    work_dir = Path(tempfile.mkdtemp(prefix="labelu-benchmark-"))
+    try:
+        settings.MEDIA_ROOT = work_dir.joinpath("media")
+        files = make_images(settings.MEDIA_ROOT)
+
+        start = time.perf_counter()
+        file_full_path = converter.convert(
+            config=task_config(),
+            input_data=make_samples(size, files),
+            out_data_dir=work_dir.joinpath("export"),
+            out_data_file_name_prefix="benchmark",
+            format=export_format,
+        )
+        seconds = time.perf_counter() - start
+
+        return {
+            "format": export_format,
+            "samples": size,
+            "seconds": round(seconds, 3),
+            "samples_per_sec": round(size / seconds, 1) if seconds else 0.0,
+            "peak_rss_mb": _peak_rss_mb(),
+            "output_bytes": _output_bytes(file_full_path),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def run_isolated(export_format: str, size: int) -> Dict[str, Union[str, int, float]]:
+    """run_case in a fresh process, so that the peak RSS is the one of the case"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_case, export_format, size).result()
+
+
+def case_key(case: dict) -> str:
+    return f"{case['format']}:{case['samples']}"
+
+
+def compare(cases: List[dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """the regressions of cases beyond threshold, a fraction of the baseline"""
+    regressions = []
+    for case in cases:
+        base = baseline.get(case_key(case))
+        if not base:
+            continue
+        if case["samples_per_sec"] < base["samples_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{case_key(case)} samples/sec {case['samples_per_sec']} < baseline {base['samples_per_sec']}"
+            )
+        for metric in ("peak_rss_mb", "output_bytes"):
+            if case[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{case_key(case)} {metric} {case[metric]} > baseline {base[metric]}")
+    return regressions
+
+
+def print_table(cases: List[dict]) -> None:
+    header = f"{'format':<12}{'samples':>9}{'seconds':>10}{'samples/s':>12}{'peak MB':>10}{'output KB':>12}"
+    typer.echo(header)
+    typer.echo("-" * len(header))
+    for case in cases:
+        typer.echo(
+            f"{case['format']:<12}{case['samples']:>9}{case['seconds']:>10}"
+            f"{case['samples_per_sec']:>12}{case['peak_rss_mb']:>10}{case['output_bytes'] // 1024:>12}"
+        )
+
+
+def main(
+    sizes: str = typer.Option("1000,10000,100000", help="comma separated task sizes"),
+    formats: str = typer.Option("", help="comma separated formats, every registered format by default"),
+    baseline: Path = typer.Option(BASELINE_PATH, help="baseline json to compare to"),
+    threshold: float = typer.Option(0.2, help="tolerated regression, a fraction of the baseline"),
+    save_baseline: bool = typer.Option(False, "--save-baseline", help="write the results as the new baseline"),
+):
+    from labelu.internal.common.converter import formats as registered_formats
+
+    export_formats = [f for f in formats.split(",") if f] or [spec.name for spec in registered_formats()]
+    cases = []
+    for size in [int(s) for s in sizes.split(",") if s]:
+        for export_format in export_formats:
+            try:
+                cases.append(run_isolated(export_format, size))
+            except Exception as e:
+                logger.warning("skip {} with {} samples: {}", export_format, size, e)
+    print_table(cases)
+
+    if save_baseline:
+        baseline.write_text(json.dumps({case_key(c): c for c in cases}, indent=2))
+        typer.echo(f"baseline saved to {baseline}")
+        return
+
+    if not baseline.exists():
+        typer.echo(f"no baseline at {baseline}, run with --save-baseline to create it")
+        return
+
+    regressions = compare(cases, json.loads(baseline.read_text()), threshold)
+    for regression in regressions:
+        typer.echo(f"REGRESSION {regression}", err=True)
+    if regressions:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
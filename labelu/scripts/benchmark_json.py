@@ -0,0 +1,66 @@
+"""JSON codec micro-benchmark: times the json_codec backends on the payloads
+of the hot paths, a sample data as stored, with its result encoded in it,
+and a page of samples as returned by the API.
+
+    python -m labelu.scripts.benchmark_json --objects 8,64,512
+"""
+import random
+import timeit
+from typing import Dict, List
+
+import typer
+
+from labelu.internal.common import json_codec
+from labelu.scripts.benchmark_export import make_result
+
+
+def payloads(objects: int) -> Dict[str, object]:
+    rng = random.Random(0)
+    result = make_result(rng, objects=objects)
+    data = {"result": json_codec.BACKENDS["json"].dumps(result)}
+    return {
+        "sample data": data,
+        "sample page": [{"id": i, "state": "DONE", "data": data} for i in range(100)],
+    }
+
+
+def run(objects: int, number: int) -> List[dict]:
+    """microseconds per loads and dumps of every payload, for every backend"""
+    cases = []
+    for payload_name, payload in payloads(objects).items():
+        for name, codec in json_codec.BACKENDS.items():
+            encoded = codec.dumps(payload)
+            cases.append(
+                {
+                    "payload": payload_name,
+                    "objects": objects,
+                    "backend": name,
+                    "bytes": len(encoded.encode("utf-8")),
+                    "loads_us": round(timeit.timeit(lambda: codec.loads(encoded), number=number) / number * 1e6, 1),
+                    "dumps_us": round(timeit.timeit(lambda: codec.dumps(payload), number=number) / number * 1e6, 1),
+                }
+            )
+    return cases
+
+
+def main(
+    objects: str = typer.Option("8,64,512", "--objects", help="comma separated annotation objects per sample"),
+    number: int = typer.Option(200, "--number", help="runs per measure"),
+):
+    header = f"{'payload':<14}{'objects':>8}{'backend':>9}{'bytes':>10}{'loads us':>11}{'dumps us':>11}{'speedup':>9}"
+    typer.echo(header)
+    typer.echo("-" * len(header))
+    for count in [int(o) for o in objects.split(",") if o]:
+        cases = run(count, number)
+        stdlib = {c["payload"]: c for c in cases if c["backend"] == "json"}
+        for case in cases:
+            base = stdlib[case["payload"]]
+            speedup = (base["loads_us"] + base["dumps_us"]) / max(case["loads_us"] + case["dumps_us"], 0.1)
+            typer.echo(
+                f"{case['payload']:<14}{case['objects']:>8}{case['backend']:>9}{case['bytes']:>10}"
+                f"{case['loads_us']:>11}{case['dumps_us']:>11}{speedup:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,23 @@
+from typing import List, Union
+
+from loguru import logger
+
+from labelu.internal.common.db import SessionLocal
+from labelu.internal.adapter.persistence import crud_task_stats
+
+
+def reconcile_task_stats(task_ids: Union[List[int], None] = None) -> List[int]:
+    """count the sample counters of the tasks again, all of them by default,
+    and fix the stored ones that drifted"""
+    db = SessionLocal()
+    try:
+        with db.begin():
+            drifted = crud_task_stats.reconcile(db=db, task_ids=task_ids)
+    finally:
+        db.close()
+
+    if drifted:
+        logger.warning("fixed the sample counters of {} tasks: {}", len(drifted), drifted)
+    else:
+        logger.info("the sample counters of the tasks are up to date")
+    return drifted
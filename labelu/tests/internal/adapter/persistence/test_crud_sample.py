@@ -0,0 +1,147 @@
+from sqlalchemy.orm import Session
+
+from labelu.internal.adapter.persistence import crud_user
+from labelu.internal.adapter.persistence import crud_task
+from labelu.internal.adapter.persistence import crud_sample
+from labelu.internal.adapter.persistence import crud_attachment
+from labelu.internal.domain.models.task import Task
+from labelu.internal.domain.models.sample import TaskSample
+from labelu.internal.domain.models.attachment import TaskAttachment
+
+
+def _prepare_samples(db: Session, count: int):
+    current_user = crud_user.get_user_by_username(db=db, username="test@example.com")
+    with db.begin():
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                config="{}",
+                created_by=current_user.id,
+                updated_by=current_user.id,
+            ),
+        )
+        attachment = crud_attachment.create(
+            db=db,
+            attachment=TaskAttachment(
+                filename="a.png",
+                url="/api/v1/tasks/attachment/upload/a.png",
+                path="upload/a.png",
+                width=10,
+                height=20,
+                format="PNG",
+                orientation=1,
+                task_id=task.id,
+                created_by=current_user.id,
+                updated_by=current_user.id,
+            ),
+        )
+        samples = crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    task_id=task.id,
+                    file_id=attachment.id if i % 2 == 0 else None,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data='{"result": "{}"}',
+                    state="DONE",
+                )
+                for i in range(count)
+            ],
+        )
+    return task, samples
+
+
+def test_iter_for_export_whole_task(db: Session) -> None:
+    task, samples = _prepare_samples(db, 7)
+
+    rows = list(
+        crud_sample.iter_for_export(db=db, task_id=task.id, sample_ids=None, batch_size=3)
+    )
+
+    assert [row["id"] for row in rows] == [sample.id for sample in samples]
+    assert rows[0] == {
+        "id": samples[0].id,
+        "state": "DONE",
+        "data": '{"result": "{}"}',
+        "file": {
+            "filename": "a.png",
+            "path": "upload/a.png",
+            "url": "/api/v1/tasks/attachment/upload/a.png",
+            "width": 10,
+            "height": 20,
+            "format": "PNG",
+            "orientation": 1,
+        },
+    }
+    assert rows[1]["file"] == {}
+    assert crud_sample.count_for_export(db=db, task_id=task.id, sample_ids=None) == 7
+
+
+def test_iter_for_export_by_ids(db: Session) -> None:
+    task, samples = _prepare_samples(db, 7)
+    with db.begin():
+        crud_sample.delete(db=db, sample_ids=[samples[1].id])
+    sample_ids = [samples[5].id, samples[1].id, samples[0].id, samples[3].id]
+
+    rows = list(
+        crud_sample.iter_for_export(
+            db=db, task_id=task.id, sample_ids=sample_ids, batch_size=2
+        )
+    )
+
+    assert [row["id"] for row in rows] == [samples[0].id, samples[3].id, samples[5].id]
+    assert crud_sample.count_for_export(db=db, task_id=task.id, sample_ids=sample_ids) == 3
+
+
+def test_list_by_cursor_walks_every_sort(db: Session) -> None:
+    task, _ = _prepare_samples(db, 0)
+    current_user = crud_user.get_user_by_username(db=db, username="test@example.com")
+    states = ["NEW", "DONE", "SKIPPED", "DONE", "NEW", "NEW", "DONE"]
+    annotated_counts = [3, None, 1, 3, 0, None, 3]
+    with db.begin():
+        crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    inner_id=7 - i,
+                    task_id=task.id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                    state=state,
+                    annotated_count=annotated_count,
+                )
+                for i, (state, annotated_count) in enumerate(zip(states, annotated_counts))
+            ],
+        )
+    with db.begin():
+        samples = crud_sample.list_by_cursor(db=db, task_id=task.id, sort_key=None, ascending=True, position=None, size=100)
+
+    state_order = {"NEW": 0, "SKIPPED": 1, "DONE": 2}
+    for sort_key in (None, "inner_id", "annotated_count", "state"):
+        for ascending in (True, False):
+            def key(sample):
+                value = getattr(sample, sort_key) if sort_key else 0
+                if sort_key == "state":
+                    value = state_order[value]
+                # nulls first when ascending
+                return (value is not None, value or 0, sample.id) if ascending else (value is None, -(value or 0), -sample.id)
+            expected = [s.id for s in sorted(samples, key=key)]
+
+            # walk pages of 3 from the last sample of each page
+            walked, position = [], None
+            while True:
+                with db.begin():
+                    page = crud_sample.list_by_cursor(
+                        db=db, task_id=task.id, sort_key=sort_key, ascending=ascending, position=position, size=3
+                    )
+                walked.extend(s.id for s in page)
+                if len(page) < 3:
+                    break
+                position = (getattr(page[-1], sort_key) if sort_key else None, page[-1].id)
+
+            assert walked == expected, (sort_key, ascending)
@@ -0,0 +1,99 @@
+from sqlalchemy.orm import Session
+
+from labelu.internal.adapter.persistence import crud_user
+from labelu.internal.adapter.persistence import crud_task
+from labelu.internal.adapter.persistence import crud_sample
+from labelu.internal.adapter.persistence import crud_task_stats
+from labelu.internal.domain.models.task import Task
+from labelu.internal.domain.models.sample import TaskSample
+from labelu.internal.domain.models.task_stats import TaskStats
+
+
+def _prepare_task(db: Session, states: list) -> Task:
+    current_user = crud_user.get_user_by_username(db=db, username="test@example.com")
+    with db.begin():
+        task = crud_task.create(
+            db=db,
+            task=Task(name="name", created_by=current_user.id, updated_by=current_user.id),
+        )
+        crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    task_id=task.id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                    state=state,
+                    annotated_count=2,
+                )
+                for state in states
+            ],
+        )
+    return task
+
+
+def test_get_counts_a_task_without_counters(db: Session) -> None:
+    task = _prepare_task(db, ["NEW", "NEW", "DONE"])
+
+    stats = crud_task_stats.get(db=db, task_id=task.id)
+
+    assert (stats.new, stats.done, stats.skipped, stats.total, stats.annotated_count) == (2, 1, 0, 3, 6)
+    assert db.query(TaskStats).filter(TaskStats.task_id == task.id).first() is None
+
+
+def test_apply(db: Session) -> None:
+    task = _prepare_task(db, ["NEW", "NEW"])
+
+    # the first change stores the counted ones, the next add to them
+    with db.begin():
+        crud_task_stats.apply(db=db, task_id=task.id, states={})
+        crud_task_stats.apply(db=db, task_id=task.id, states={"NEW": -1, "DONE": 1}, annotated_count=3)
+        crud_task_stats.apply(db=db, task_id=task.id, states={"SKIPPED": -1}, annotated_count=-2)
+
+    with db.begin():
+        stats = db.query(TaskStats).filter(TaskStats.task_id == task.id).one()
+        db.refresh(stats)
+    assert (stats.new, stats.done, stats.skipped, stats.total, stats.annotated_count) == (1, 1, -1, 1, 5)
+
+
+def test_reconcile(db: Session) -> None:
+    task = _prepare_task(db, ["NEW", "SKIPPED"])
+    other_task = _prepare_task(db, ["DONE"])
+    with db.begin():
+        crud_task_stats.apply(db=db, task_id=task.id, states={})
+        crud_task_stats.apply(db=db, task_id=task.id, states={"NEW": 5})
+
+    with db.begin():
+        drifted = crud_task_stats.reconcile(db=db)
+    with db.begin():
+        again = crud_task_stats.reconcile(db=db)
+
+    assert sorted(drifted) == [task.id, other_task.id]
+    assert again == []
+    stats = crud_task_stats.list_by_task_ids(db=db, task_ids=[task.id, other_task.id])
+    assert (stats[task.id].new, stats[task.id].skipped, stats[task.id].total) == (1, 1, 2)
+    assert (stats[other_task.id].done, stats[other_task.id].total) == (1, 1)
+
+
+def test_apply_after_a_concurrent_first_change(db: Session, monkeypatch) -> None:
+    task = _prepare_task(db, ["NEW", "NEW"])
+    count_from_samples = crud_task_stats.count_from_samples
+
+    def stored_concurrently(db: Session, task_ids: list):
+        # another change stores the row of the task, counted without this one
+        db.execute(
+            TaskStats.__table__.insert().values(
+                task_id=task.id, new=1, done=0, skipped=0, total=1, annotated_count=2
+            )
+        )
+        return count_from_samples(db=db, task_ids=task_ids)
+
+    monkeypatch.setattr(crud_task_stats, "count_from_samples", stored_concurrently)
+    with db.begin():
+        crud_task_stats.apply(db=db, task_id=task.id, states={"NEW": 1}, annotated_count=2)
+
+    with db.begin():
+        stats = db.query(TaskStats).filter(TaskStats.task_id == task.id).one()
+        db.refresh(stats)
+    assert (stats.new, stats.total, stats.annotated_count) == (2, 2, 4)
@@ -1,6 +1,8 @@
 from pathlib import Path
 import re
 
+from PIL import Image
+
 from sqlalchemy.orm import Session
 from fastapi.testclient import TestClient
 
@@ -46,6 +48,12 @@ class TestClassTaskAttachmentRouter:
         assert Path(f"{settings.MEDIA_ROOT}").joinpath("/".join(parts)).exists()
         parts[-1] = "test-thumbnail.png"
         assert Path(f"{settings.MEDIA_ROOT}").joinpath("/".join(parts)).exists()
+
+        # the image size is kept for the exports
+        with Image.open("labelu/tests/data/test.png") as img:
+            width, height = img.size
+        attachment = crud_attachment.get(db=db, attachment_id=json["data"]["id"])
+        assert (attachment.width, attachment.height, attachment.format) == (width, height, "PNG")
         
         empty_task_upload(task_id, "test.jsonl")
     
@@ -1,12 +1,35 @@
-from sqlalchemy.orm import Session
+import io
+import os
+import json
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from zipfile import ZipFile
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
 from fastapi.testclient import TestClient
 
 from labelu.internal.common.config import settings
 from labelu.internal.adapter.persistence import crud_user
 from labelu.internal.adapter.persistence import crud_task
 from labelu.internal.adapter.persistence import crud_sample
+from labelu.internal.adapter.persistence import crud_attachment
+from labelu.internal.adapter.persistence import crud_annotation
+from labelu.internal.adapter.persistence import crud_pre_annotation
+from labelu.internal.adapter.persistence import crud_task_stats
+from labelu.internal.adapter.persistence import crud_export_job
 from labelu.internal.domain.models.task import Task
 from labelu.internal.domain.models.sample import TaskSample
+from labelu.internal.domain.models.attachment import TaskAttachment
+from labelu.internal.domain.models.annotation import TaskAnnotation
+from labelu.internal.domain.models.pre_annotation import TaskPreAnnotation
+from labelu.internal.domain.models.task_stats import TaskStats
+from labelu.internal.domain.models.export_job import ExportJob
+from labelu.internal.application.service import export_job as export_job_service
+from labelu.internal.clients.export import exportCache
 
 
 class TestClassTaskSampleRouter:
@@ -285,6 +308,272 @@ class TestClassTaskSampleRouter:
         assert json["data"][0]["id"] == 14
         assert json["meta_data"]["total"] == 14
 
+    def test_sample_list_query_count(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=current_user.id,
+                updated_by=current_user.id,
+            ),
+        )
+        samples = []
+        for i in range(12):
+            attachment = crud_attachment.create(
+                db=db,
+                attachment=TaskAttachment(
+                    filename=f"abcdefgh-{i}.png",
+                    path=f"upload/abcdefgh-{i}.png",
+                    task_id=task.id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+            samples.append(
+                TaskSample(
+                    task_id=task.id,
+                    file_id=attachment.id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                )
+            )
+        crud_sample.batch(db=db, samples=samples)
+        # pre-annotations named with and without the upload prefix
+        crud_pre_annotation.batch(
+            db=db,
+            pre_annotations=[
+                TaskPreAnnotation(task_id=task.id, sample_name=name, created_by=current_user.id)
+                for name in ("abcdefgh-0.png", "1.png")
+            ],
+        )
+
+        task_id = task.id
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        def list_samples(size: int) -> list:
+            statements.clear()
+            event.listen(db.get_bind(), "before_cursor_execute", count_statement)
+            try:
+                r = client.get(
+                    f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+                    headers=testuser_token_headers,
+                    params={"page": 0, "size": size, "sort": "inner_id:asc"},
+                )
+            finally:
+                event.remove(db.get_bind(), "before_cursor_execute", count_statement)
+            assert r.status_code == 200
+            return r.json()["data"]
+
+        # run
+        small_page = list_samples(2)
+        small_page_queries = len(statements)
+        page = list_samples(12)
+
+        # check, the queries do not grow with the page
+        assert len(page) == 12
+        assert len(statements) == small_page_queries
+        assert [s["is_pre_annotated"] for s in small_page] == [True, True]
+        assert [s["is_pre_annotated"] for s in page] == [True, True] + [False] * 10
+        assert page[0]["file"]["filename"] == "abcdefgh-0.png"
+        assert page[0]["created_by"]["username"] == "test@example.com"
+
+    def test_sample_list_summary_view(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=0,
+                updated_by=0,
+            ),
+        )
+        task_id = task.id
+        crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    inner_id=i + 1,
+                    task_id=task_id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data='{"result": "{}"}',
+                    annotated_count=4,
+                )
+                for i in range(3)
+            ],
+        )
+        statements = []
+
+        def count_statement(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        # run
+        event.listen(db.get_bind(), "before_cursor_execute", count_statement)
+        try:
+            r = client.get(
+                f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+                headers=testuser_token_headers,
+                params={"page": 0, "view": "summary"},
+            )
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", count_statement)
+        full = client.get(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+            headers=testuser_token_headers,
+            params={"page": 0},
+        )
+
+        # check, the data column is not even selected
+        json = r.json()
+        assert r.status_code == 200
+        assert [(s["inner_id"], s["annotated_count"], s["data"]) for s in json["data"]] == [
+            (1, 4, None),
+            (2, 4, None),
+            (3, 4, None),
+        ]
+        assert json["meta_data"]["total"] == 3
+        assert not any("task_sample.data" in statement for statement in statements)
+        assert full.json()["data"][0]["data"] == {"result": "{}"}
+
+    def test_sample_list_by_cursor(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=0,
+                updated_by=0,
+            ),
+        )
+        task_id = task.id
+        samples = crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    inner_id=i + 1,
+                    task_id=task_id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                )
+                for i in range(7)
+            ],
+        )
+        ids = [sample.id for sample in samples]
+
+        def list_samples(**params) -> dict:
+            r = client.get(
+                f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+                headers=testuser_token_headers,
+                params={"size": 3, **params},
+            )
+            assert r.status_code == 200
+            return r.json()
+
+        # run, the first page by page then the next ones by cursor
+        pages = [list_samples(page=0, sort="inner_id:desc")]
+        while pages[-1]["meta_data"]["next"]:
+            pages.append(list_samples(cursor=pages[-1]["meta_data"]["next"]))
+        back = list_samples(cursor=pages[-1]["meta_data"]["prev"])
+
+        # check
+        assert [[s["id"] for s in p["data"]] for p in pages] == [ids[6:3:-1], ids[3:0:-1], ids[:1]]
+        assert pages[0]["meta_data"]["prev"] is None
+        assert pages[1]["meta_data"]["total"] == 7
+        assert [s["id"] for s in back["data"]] == ids[3:0:-1]
+
+        r = client.get(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+            headers=testuser_token_headers,
+            params={"cursor": pages[0]["meta_data"]["next"], "sort": "state:asc"},
+        )
+        assert r.status_code == 400
+        assert r.json()["err_code"] == 55004
+
+    def test_sample_list_by_cursor_tied_sort_keys(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data, every sample has the same annotated count
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=0,
+                updated_by=0,
+            ),
+        )
+        task_id = task.id
+        samples = crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    inner_id=i + 1,
+                    task_id=task_id,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                    annotated_count=3,
+                )
+                for i in range(5)
+            ],
+        )
+        ids = [sample.id for sample in samples]
+
+        def list_samples(**params) -> dict:
+            r = client.get(
+                f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+                headers=testuser_token_headers,
+                params={"size": 2, **params},
+            )
+            assert r.status_code == 200
+            return r.json()
+
+        for sort, expected in (("annotated_count:desc", ids[::-1]), ("annotated_count:asc", ids)):
+            # run, the first page by page then the next ones by cursor
+            pages = [list_samples(page=0, sort=sort)]
+            while pages[-1]["meta_data"]["next"]:
+                pages.append(list_samples(cursor=pages[-1]["meta_data"]["next"]))
+            second_page = list_samples(page=1, sort=sort)
+
+            # check, the cursors follow on from the page, ties by id
+            assert [s["id"] for p in pages for s in p["data"]] == expected
+            assert [s["id"] for s in second_page["data"]] == expected[2:4]
+
     def test_sample_list_by_params_error(
         self, client: TestClient, testuser_token_headers: dict, db: Session
     ) -> None:
@@ -449,6 +738,178 @@ class TestClassTaskSampleRouter:
         assert r.status_code == 200
         assert json["data"]["state"] == "DONE"
 
+    def test_sample_patch_annotations(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=current_user.id,
+                updated_by=current_user.id,
+            ),
+        )
+        samples = crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    task_id=task.id,
+                    file_id=1,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                )
+            ],
+        )
+        url = f"{settings.API_V1_STR}/tasks/{task.id}/samples/{samples[0].id}"
+        result = {
+            "rectTool": {
+                "toolName": "rectTool",
+                "result": [{"id": "r1", "label": "car", "order": 1, "x": 1, "y": 2, "width": 3, "height": 4}],
+            },
+            "polygonTool": {
+                "toolName": "polygonTool",
+                "result": [
+                    {
+                        "id": "p1",
+                        "label": "road",
+                        "order": 2,
+                        "points": [{"x": 0, "y": 0}, {"x": 4, "y": 0}, {"x": 4, "y": 4}],
+                    }
+                ],
+            },
+        }
+
+        # run
+        r = client.patch(
+            url,
+            headers=testuser_token_headers,
+            json={"data": {"result": json.dumps(result)}, "annotated_count": 2},
+        )
+
+        # check
+        assert r.status_code == 200
+        annotations = (
+            db.query(TaskAnnotation)
+            .filter(TaskAnnotation.sample_id == samples[0].id)
+            .order_by(TaskAnnotation.order)
+            .all()
+        )
+        assert [(a.object_id, a.tool, a.label) for a in annotations] == [
+            ("r1", "rectTool", "car"),
+            ("p1", "polygonTool", "road"),
+        ]
+        assert [a.area for a in annotations] == [12.0, 8.0]
+        assert (annotations[1].x, annotations[1].width) == (0.0, 4.0)
+        assert crud_annotation.count_by_label(db=db, task_id=task.id) == {"car": 1, "road": 1}
+        r = client.get(f"{settings.API_V1_STR}/tasks/{task.id}", headers=testuser_token_headers)
+        assert r.json()["data"]["stats"]["labels"] == {"car": 1, "road": 1}
+
+        # a new result replaces the objects of the sample
+        result.pop("polygonTool")
+        r = client.patch(
+            url,
+            headers=testuser_token_headers,
+            json={"data": {"result": json.dumps(result)}, "annotated_count": 1},
+        )
+        assert r.status_code == 200
+        assert crud_annotation.count_by_label(db=db, task_id=task.id) == {"car": 1}
+
+    def test_sample_patch_objects(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=0,
+                updated_by=0,
+            ),
+        )
+        samples = crud_sample.batch(
+            db=db,
+            samples=[
+                TaskSample(
+                    task_id=task.id,
+                    file_id=1,
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                    data="{}",
+                )
+            ],
+        )
+        url = f"{settings.API_V1_STR}/tasks/{task.id}/samples/{samples[0].id}"
+        result = {
+            "rectTool": {
+                "toolName": "rectTool",
+                "result": [
+                    {"id": "r1", "label": "car", "x": 1, "y": 2, "width": 3, "height": 4},
+                    {"id": "r2", "label": "bus", "x": 0, "y": 0, "width": 1, "height": 1},
+                ],
+            },
+        }
+        r = client.patch(
+            url,
+            headers={**testuser_token_headers, "If-Match": '"1"'},
+            json={"data": {"result": json.dumps(result)}, "annotated_count": 2},
+        )
+        assert r.status_code == 200
+        assert r.headers["ETag"] == '"2"'
+        assert r.json()["data"]["version"] == 2
+
+        # run, move r1 and remove r2 at the version read
+        r = client.patch(
+            f"{url}/objects",
+            headers={**testuser_token_headers, "If-Match": client.get(url, headers=testuser_token_headers).headers["ETag"]},
+            json={
+                "upserts": {"rectTool": [{"id": "r1", "label": "truck", "x": 5, "y": 5, "width": 2, "height": 2}]},
+                "deletes": ["r2"],
+            },
+        )
+        stale = client.patch(
+            f"{url}/objects",
+            headers={**testuser_token_headers, "If-Match": '"2"'},
+            json={"deletes": ["r1"]},
+        )
+        stale_full = client.patch(
+            url,
+            headers={**testuser_token_headers, "If-Match": 'W/"2"'},
+            json={"state": "SKIPPED"},
+        )
+
+        # check
+        assert r.status_code == 200
+        assert r.json()["data"] == {"id": samples[0].id, "version": 3}
+        assert r.headers["ETag"] == '"3"'
+        for conflict in (stale, stale_full):
+            assert conflict.status_code == 412
+            assert conflict.json()["err_code"] == 55005
+
+        sample = client.get(url, headers=testuser_token_headers).json()["data"]
+        assert sample["version"] == 3
+        assert sample["annotated_count"] == 1
+        assert json.loads(sample["data"]["result"])["rectTool"]["result"] == [
+            {"id": "r1", "label": "truck", "x": 5, "y": 5, "width": 2, "height": 2}
+        ]
+        annotations = db.query(TaskAnnotation).filter(TaskAnnotation.sample_id == samples[0].id).all()
+        assert [(a.object_id, a.label, a.area) for a in annotations] == [("r1", "truck", 4.0)]
+        with db.begin():
+            assert crud_task_stats.get(db=db, task_id=task.id).annotated_count == 1
+
     def test_sample_patch_skip(
         self, client: TestClient, testuser_token_headers: dict, db: Session
     ) -> None:
@@ -581,6 +1042,62 @@ class TestClassTaskSampleRouter:
         # check
         assert r.status_code == 200
 
+    def test_sample_changes_update_task_stats(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        task = crud_task.create(
+            db=db,
+            task=Task(
+                name="name",
+                description="description",
+                tips="tips",
+                created_by=0,
+                updated_by=0,
+            ),
+        )
+        task_id = task.id
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+            headers=testuser_token_headers,
+            json=[{"file_id": 1, "data": {}} for i in range(3)],
+        )
+        ids = r.json()["data"]["ids"]
+
+        # run
+        client.patch(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples/{ids[0]}",
+            headers=testuser_token_headers,
+            json={"data": {"result": "{}"}, "annotated_count": 2, "state": "DONE"},
+        )
+        client.patch(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples/{ids[1]}",
+            headers=testuser_token_headers,
+            json={"state": "SKIPPED"},
+        )
+        client.request(
+            "delete",
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+            headers=testuser_token_headers,
+            json={"sample_ids": [ids[2]]},
+        )
+
+        # check
+        with db.begin():
+            stats = db.query(TaskStats).filter(TaskStats.task_id == task_id).one()
+            db.refresh(stats)
+            drifted = crud_task_stats.reconcile(db=db, task_ids=[task_id])
+        assert (stats.new, stats.done, stats.skipped) == (0, 1, 1)
+        assert (stats.total, stats.annotated_count) == (2, 2)
+        assert drifted == []
+        r = client.get(
+            f"{settings.API_V1_STR}/tasks/{task_id}/samples",
+            headers=testuser_token_headers,
+            params={"page": 0},
+        )
+        assert r.json()["meta_data"]["total"] == 2
+
     def test_sample_delete_not_found(
         self, client: TestClient, testuser_token_headers: dict, db: Session
     ) -> None:
@@ -651,3 +1168,408 @@ class TestClassTaskSampleRouter:
 
         # check
         assert r.status_code == 200
+
+    def test_export_job(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(
+                    name="name",
+                    description="description",
+                    tips="tips",
+                    config='{"tools":[{"tool":"rectTool","config":{"attributes":[{"key":"rectTool","value":"rectTool"}]}}]}',
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+            samples = crud_sample.batch(
+                db=db,
+                samples=[
+                    TaskSample(
+                        task_id=task.id,
+                        file_id=1,
+                        created_by=current_user.id,
+                        updated_by=current_user.id,
+                        data='{"result": "{\\"width\\":10,\\"height\\":10,\\"rotate\\":0}"}',
+                        annotated_count=0,
+                        state="DONE",
+                    )
+                    for _ in range(3)
+                ],
+            )
+
+        # run
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export_jobs?export_type=JSON",
+            headers=testuser_token_headers,
+            json={"sample_ids": [sample.id for sample in samples]},
+        )
+
+        # check
+        assert r.status_code == 202
+        job_id = r.json()["data"]["id"]
+
+        json = {}
+        for _ in range(100):
+            r = client.get(
+                f"{settings.API_V1_STR}/tasks/{task.id}/samples/export_jobs/{job_id}",
+                headers=testuser_token_headers,
+            )
+            json = r.json()["data"]
+            if json["status"] in ("SUCCESS", "FAILED"):
+                break
+            time.sleep(0.1)
+        assert json["status"] == "SUCCESS"
+        assert json["progress"] == 100
+
+        r = client.get(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export_jobs/{job_id}/download",
+            headers=testuser_token_headers,
+        )
+        assert r.status_code == 200
+        assert len(r.json()) == 3
+
+    def test_export_job_not_found(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # run
+        r = client.get(
+            f"{settings.API_V1_STR}/tasks/1/samples/export_jobs/0",
+            headers=testuser_token_headers,
+        )
+
+        # check
+        assert r.status_code == 404
+        assert r.json()["err_code"] == 61001
+
+    def test_export_job_download_expired(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(name="name", created_by=current_user.id, updated_by=current_user.id),
+            )
+            job = crud_export_job.create(
+                db=db,
+                export_job=ExportJob(
+                    task_id=task.id,
+                    export_type="JSON",
+                    sample_ids="[]",
+                    status="SUCCESS",
+                    progress=100,
+                    file_path=str(settings.MEDIA_ROOT.joinpath("evicted.json")),
+                    token="",
+                    created_by=current_user.id,
+                ),
+            )
+
+        # run
+        r = client.get(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export_jobs/{job.id}/download",
+            headers=testuser_token_headers,
+        )
+
+        # check
+        assert r.status_code == 410
+        assert r.json()["err_code"] == 61006
+
+    def test_export_job_recover(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        host = socket.gethostname()
+        workers = {
+            None: "FAILED",
+            f"{host}:{os.getpid()}": "FAILED",
+            f"{host}:{exited.pid}": "FAILED",
+            # alive on this host
+            f"{host}:1": "RUNNING",
+            "other-host:1": "RUNNING",
+        }
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(name="name", created_by=current_user.id, updated_by=current_user.id),
+            )
+            jobs = [
+                crud_export_job.create(
+                    db=db,
+                    export_job=ExportJob(
+                        task_id=task.id,
+                        export_type="JSON",
+                        sample_ids="[]",
+                        status="RUNNING",
+                        progress=50,
+                        worker=worker,
+                        created_by=current_user.id,
+                    ),
+                )
+                for worker in workers
+            ]
+
+        # run
+        export_job_service.recover(db=db)
+
+        # check
+        for job, status in zip(jobs, workers.values()):
+            with db.begin():
+                db.refresh(job)
+            assert job.status == status
+
+    def test_export_sample_since_token(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(
+                    name="name",
+                    description="description",
+                    tips="tips",
+                    config='{"tools":[{"tool":"rectTool","config":{"attributes":[{"key":"rectTool","value":"rectTool"}]}}]}',
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+            samples = crud_sample.batch(
+                db=db,
+                samples=[
+                    TaskSample(
+                        task_id=task.id,
+                        created_by=current_user.id,
+                        updated_by=current_user.id,
+                        data='{"result": "{}"}',
+                        state="NEW",
+                    )
+                    for _ in range(3)
+                ],
+            )
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=JSON",
+            headers=testuser_token_headers,
+            json={},
+        )
+        assert r.status_code == 200
+        assert len(r.json()) == 3
+        token = r.headers["X-Export-Token"]
+
+        # one sample updated and one deleted after the export
+        with db.begin():
+            sample = crud_sample.get(db=db, sample_id=samples[0].id)
+            crud_sample.update(db=db, db_obj=sample, obj_in={"state": "DONE"})
+            crud_sample.delete(db=db, sample_ids=[samples[2].id])
+
+        # run
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=JSON&since={token}",
+            headers=testuser_token_headers,
+            json={},
+        )
+
+        # check
+        assert r.status_code == 200
+        with ZipFile(io.BytesIO(r.content)) as zipf:
+            result = json.loads(zipf.read("result.json"))
+            delta = json.loads(zipf.read("deleted.json"))
+        assert [item["id"] for item in result] == [samples[0].id]
+        assert delta["since"] == token
+        assert delta["deleted"] == [samples[2].id]
+        assert delta["token"] == r.headers["X-Export-Token"]
+        assert delta["token"] != token
+
+    def test_export_sample_since_token_with_uncommitted_change(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(
+                    name="name",
+                    config="{}",
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+            samples = crud_sample.batch(
+                db=db,
+                samples=[
+                    TaskSample(
+                        task_id=task.id,
+                        created_by=current_user.id,
+                        updated_by=current_user.id,
+                        data='{"result": "{}"}',
+                        state="NEW",
+                        # written by a server whose clock runs ahead
+                        updated_at=datetime.now() + timedelta(minutes=i),
+                    )
+                    for i in range(2)
+                ],
+            )
+
+        # a change flushed before an export and committed after it
+        other_db = sessionmaker(autocommit=True, autoflush=False, bind=db.get_bind())()
+        try:
+            with other_db.begin():
+                sample = crud_sample.get(db=other_db, sample_id=samples[0].id)
+                crud_sample.update(db=other_db, db_obj=sample, obj_in={"state": "DONE"})
+
+                r = client.post(
+                    f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=JSON",
+                    headers=testuser_token_headers,
+                    json={},
+                )
+                assert r.status_code == 200
+                assert [item["id"] for item in r.json()] == [sample.id for sample in samples]
+                token = r.headers["X-Export-Token"]
+        finally:
+            other_db.close()
+
+        # run
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=JSON&since={token}",
+            headers=testuser_token_headers,
+            json={},
+        )
+
+        # check
+        assert r.status_code == 200
+        with ZipFile(io.BytesIO(r.content)) as zipf:
+            result = json.loads(zipf.read("result.json"))
+        assert [item["id"] for item in result] == [samples[0].id]
+
+    def test_export_sample_since_token_invalid(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(
+                    name="name",
+                    description="description",
+                    tips="tips",
+                    config="{}",
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+
+        # run
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=JSON&since=invalid",
+            headers=testuser_token_headers,
+            json={},
+        )
+
+        # check
+        assert r.status_code == 400
+        assert r.json()["err_code"] == 61004
+
+    def test_export_sample_stream(
+        self, client: TestClient, testuser_token_headers: dict, db: Session
+    ) -> None:
+
+        # prepare data
+        current_user = crud_user.get_user_by_username(
+            db=db, username="test@example.com"
+        )
+        with db.begin():
+            task = crud_task.create(
+                db=db,
+                task=Task(
+                    name="name",
+                    description="description",
+                    tips="tips",
+                    config='{"tools":[{"tool":"rectTool","config":{"attributes":[{"key":"rectTool","value":"rectTool"}]}}]}',
+                    created_by=current_user.id,
+                    updated_by=current_user.id,
+                ),
+            )
+            attachments = [
+                crud_attachment.create(
+                    db=db,
+                    attachment=TaskAttachment(
+                        filename=f"{i}.png",
+                        path=f"upload/{i}.png",
+                        task_id=task.id,
+                        created_by=current_user.id,
+                        updated_by=current_user.id,
+                    ),
+                )
+                for i in range(3)
+            ]
+            crud_sample.batch(
+                db=db,
+                samples=[
+                    TaskSample(
+                        task_id=task.id,
+                        file_id=attachment.id,
+                        created_by=current_user.id,
+                        updated_by=current_user.id,
+                        data='{"result": "{\\"rectTool\\":{\\"toolName\\":\\"rectTool\\",\\"result\\":[{\\"x\\":1,\\"y\\":2,\\"width\\":3,\\"height\\":4,\\"label\\":\\"rectTool\\"}]}}"}',
+                        state="DONE",
+                    )
+                    for attachment in attachments
+                ],
+            )
+
+        # run
+        r = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=CSV&stream=true",
+            headers=testuser_token_headers,
+            json={},
+        )
+
+        # check
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/zip"
+        assert f"task-{task.id}-csv.zip" in r.headers["content-disposition"]
+        assert r.headers["X-Export-Token"]
+        with ZipFile(io.BytesIO(r.content)) as zipf:
+            assert zipf.namelist() == ["0.csv", "1.csv", "2.csv"]
+            assert "rectTool" in zipf.read("0.csv").decode("utf-8")
+
+        # the streamed archive was copied to the export cache
+        hits = exportCache.stats()["hits"]
+        r_again = client.post(
+            f"{settings.API_V1_STR}/tasks/{task.id}/samples/export?export_type=CSV&stream=true",
+            headers=testuser_token_headers,
+            json={},
+        )
+        assert r_again.status_code == 200
+        assert exportCache.stats()["hits"] == hits + 1
+        assert r_again.content == r.content
@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 
 from labelu.internal.common.config import settings
 from labelu.internal.domain.models.task import Task
+from labelu.internal.domain.models.task_stats import TaskStats
 from labelu.internal.domain.models.user import User
 from labelu.internal.adapter.persistence import crud_user
 from labelu.internal.adapter.persistence import crud_task
@@ -31,6 +32,8 @@ class TestClassTaskRouter:
         assert json["data"]["id"] > 0
         assert json["data"]["created_by"]["id"] > 0
         assert json["data"]["status"] == "DRAFT"
+        stats = db.query(TaskStats).filter(TaskStats.task_id == json["data"]["id"]).one()
+        assert (stats.new, stats.total, stats.annotated_count) == (0, 0, 0)
 
     def test_create_task_no_authentication(
         self, client: TestClient, testuser_token_headers: dict, db: Session
@@ -0,0 +1,77 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from labelu.internal.common.annotation import annotation_rows, apply_object_changes, count_objects, sample_result
+
+
+def test_sample_result_is_parsed_once():
+    result = {"rectTool": {"result": []}}
+
+    assert sample_result(json.dumps({"result": json.dumps(result)})) == result
+    assert sample_result({"result": result}) == result
+    assert sample_result({"result": ""}) == {} and sample_result(None) == {}
+    with pytest.raises(ValueError):
+        sample_result("not json")
+
+
+def test_annotation_rows():
+    result = {
+        "width": 10,
+        "rectTool": {"result": [{"id": "r", "label": "car", "order": 1, "x": 1, "y": 2, "width": 3, "height": 4}]},
+        "lineTool": {"result": [{"id": "l", "label": "lane", "points": [{"x": 1, "y": 5}, {"x": 3, "y": 1}]}]},
+        "pointTool": {"result": [{"id": 7, "label": "p", "x": 2, "y": 3}]},
+        "cuboidTool": {
+            "result": [
+                {
+                    "label": "box",
+                    "front": {"tl": {"x": 0, "y": 0}, "br": {"x": 2, "y": 2}},
+                    "back": {"tl": {"x": 1, "y": 1}, "br": {"x": 4, "y": 3}},
+                }
+            ]
+        },
+        "tagTool": {"result": [{"id": "t", "value": {"weather": ["sunny"]}}]},
+    }
+
+    rows = {row["tool"]: row for row in annotation_rows(result)}
+
+    assert set(rows) == {"rectTool", "lineTool", "pointTool", "cuboidTool", "tagTool"}
+    rect = rows["rectTool"]
+    assert (rect["object_id"], rect["label"], rect["order"]) == ("r", "car", 1)
+    assert (rect["x"], rect["y"], rect["width"], rect["height"], rect["area"]) == (1, 2, 3, 4, 12)
+    assert json.loads(rect["geometry"])["width"] == 3
+    assert (rows["lineTool"]["x"], rows["lineTool"]["y"], rows["lineTool"]["width"]) == (1, 1, 2)
+    assert rows["lineTool"]["area"] is None
+    assert (rows["pointTool"]["object_id"], rows["pointTool"]["width"]) == ("7", 0)
+    assert (rows["cuboidTool"]["width"], rows["cuboidTool"]["height"]) == (4, 3)
+    assert rows["tagTool"]["x"] is None and rows["tagTool"]["label"] is None
+
+
+def test_sample_service_does_not_import_numpy():
+    code = "import sys; import labelu.internal.application.service.sample; print('numpy' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+
+def test_apply_object_changes():
+    result = {
+        "width": 10,
+        "rectTool": {"toolName": "rectTool", "result": [{"id": "r1", "x": 1}, {"id": "r2", "x": 2}, {"id": "r3"}]},
+        "polygonTool": {"toolName": "polygonTool", "result": [{"id": "p1"}]},
+    }
+
+    changed = apply_object_changes(
+        result,
+        upserts={"rectTool": [{"id": "r1", "x": 5}, {"id": "r4"}], "pointTool": [{"id": "p1"}]},
+        deletes=["r2"],
+    )
+
+    # replaced in place, added at the end, moved across tools, deleted
+    assert [item["id"] for item in changed["rectTool"]["result"]] == ["r1", "r3", "r4"]
+    assert changed["rectTool"]["result"][0]["x"] == 5
+    assert changed["polygonTool"]["result"] == []
+    assert changed["pointTool"] == {"toolName": "pointTool", "result": [{"id": "p1"}]}
+    assert changed["width"] == 10
+    assert count_objects(changed) == 4
@@ -1,7 +1,20 @@
+import base64
+import json
+import struct
+import subprocess
+import sys
 from pathlib import Path
 from tempfile import gettempdir
+from xml.etree import ElementTree
+from zipfile import ZipFile
 
-from labelu.internal.common.converter import converter
+import pytest
+from tfrecord import example_pb2
+from tfrecord.writer import TFRecordWriter
+
+from labelu.internal.common.config import settings
+from labelu.internal.common import converter as converter_module
+from labelu.internal.common.converter import FormatSpec, converter, get_format, register_format
 
 
 def test_convert_to_json():
@@ -143,3 +156,415 @@ def test_convert_to_json():
 
     # check
     assert file_full_path
+
+
+def _streaming_samples(count: int):
+    for i in range(count):
+        yield {
+            "id": i + 1,
+            "state": "SKIPPED" if i % 2 else "DONE",
+            "data": json.dumps(
+                {
+                    "result": json.dumps(
+                        {
+                            "width": 100,
+                            "height": 100,
+                            "rotate": 0,
+                            "rectTool": {
+                                "toolName": "rectTool",
+                                "result": [
+                                    {"x": 1, "y": 2, "width": 3, "height": 4, "label": "RT", "order": 1}
+                                ],
+                            },
+                        }
+                    )
+                }
+            ),
+            "file": {"filename": f"{i}.png", "url": f"/attachment/{i}.png"},
+        }
+
+
+def test_convert_to_json_streams_generator():
+    out_data_dir = Path(gettempdir()).joinpath("labelu-test-json")
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=_streaming_samples(3),
+        out_data_dir=out_data_dir,
+        out_data_file_name_prefix="task",
+        format="JSON",
+    )
+
+    results = json.loads(file_full_path.read_text())
+    assert [r["id"] for r in results] == [1, 2, 3]
+    assert results[0]["fileName"] == "0.png"
+    assert json.loads(results[1]["result"])["valid"] is False
+    assert json.loads(results[0]["result"])["annotations"][0]["result"][0]["label"] == "RT"
+
+
+def test_convert_to_jsonl():
+    out_data_dir = Path(gettempdir()).joinpath("labelu-test-jsonl")
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=_streaming_samples(3),
+        out_data_dir=out_data_dir,
+        out_data_file_name_prefix="task",
+        format="JSONL",
+    )
+
+    lines = file_full_path.read_text().splitlines()
+    assert file_full_path.suffix == ".jsonl"
+    assert [json.loads(line)["id"] for line in lines] == [1, 2, 3]
+
+
+def test_convert_to_csv_with_process_pool(monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_WORKERS", 2)
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_SIZE", 1)
+    out_data_dir = Path(gettempdir()).joinpath("labelu-test-csv")
+
+    file_full_path = converter.convert(
+        config={"attributes": [{"key": "RT", "value": "RT"}]},
+        input_data=_streaming_samples(6),
+        out_data_dir=out_data_dir,
+        out_data_file_name_prefix="task",
+        format="CSV",
+    )
+
+    # skipped samples are not exported, the others keep the input order
+    with ZipFile(file_full_path) as zipf:
+        assert zipf.namelist() == ["0.csv", "2.csv", "4.csv"]
+
+
+def test_convert_to_yolo_with_stored_image_size():
+    out_data_dir = Path(gettempdir()).joinpath("labelu-test-yolo")
+    result = {
+        "rotate": 90,
+        "rectTool": {
+            "toolName": "rectTool",
+            "result": [{"x": 10, "y": 10, "width": 20, "height": 10, "label": "RT"}],
+        },
+    }
+    sample = {
+        "id": 1,
+        "state": "DONE",
+        "data": json.dumps({"result": json.dumps(result)}),
+        # the image file does not exist, its stored size is used
+        "file": {"filename": "a.png", "path": "missing/a.png", "width": 100, "height": 50},
+    }
+
+    file_full_path = converter.convert(
+        config={"attributes": [{"key": "RT", "value": "RT"}]},
+        input_data=[sample],
+        out_data_dir=out_data_dir,
+        out_data_file_name_prefix="task",
+        format="YOLO",
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        assert zipf.read("a.txt").decode() == "# rotate: 90\n0 0.4 0.15 0.4 0.1\n"
+
+
+def _labelme_sample(tmp_path: Path) -> dict:
+    image = Path(__file__).parents[2].joinpath("data", "test.png")
+    tmp_path.joinpath("upload").mkdir()
+    tmp_path.joinpath("upload", "test.png").write_bytes(image.read_bytes())
+    return {
+        "id": 1,
+        "state": "DONE",
+        "data": json.dumps({"result": json.dumps({"width": 10, "height": 10, "rotate": 0})}),
+        "file": {"filename": "test.png", "path": "upload/test.png"},
+    }
+
+
+def test_convert_to_labelme_embeds_image(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", tmp_path)
+    sample = _labelme_sample(tmp_path)
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=[sample],
+        out_data_dir=tmp_path.joinpath("export"),
+        out_data_file_name_prefix="task",
+        format="LABEL_ME",
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        labelme = json.loads(zipf.read("test.json"))
+    image = tmp_path.joinpath("upload", "test.png").read_bytes()
+    assert labelme["imagePath"] == "test.png"
+    assert base64.b64decode(labelme["imageData"]) == image
+
+
+def test_convert_to_labelme_references_bundled_image(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", tmp_path)
+    sample = _labelme_sample(tmp_path)
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=[sample],
+        out_data_dir=tmp_path.joinpath("export"),
+        out_data_file_name_prefix="task",
+        format="LABEL_ME",
+        options={"image_data": "REFERENCE", "bundle_images": True},
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        labelme = json.loads(zipf.read("test.json"))
+        assert zipf.read("images/test.png") == tmp_path.joinpath("upload", "test.png").read_bytes()
+    assert labelme["imagePath"] == "images/test.png"
+    assert labelme["imageData"] is None
+
+
+def _read_tf_records(data: bytes):
+    records = []
+    offset = 0
+    while offset < len(data):
+        length_bytes = data[offset : offset + 8]
+        (length,) = struct.unpack("<Q", length_bytes)
+        assert data[offset + 8 : offset + 12] == TFRecordWriter.masked_crc(length_bytes)
+        record = data[offset + 12 : offset + 12 + length]
+        assert data[offset + 12 + length : offset + 16 + length] == TFRecordWriter.masked_crc(record)
+        records.append(example_pb2.Example.FromString(record))
+        offset += length + 16
+    return records
+
+
+def test_convert_to_tf_record_shards(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", tmp_path)
+    monkeypatch.setattr(settings, "EXPORT_TF_RECORD_SHARDS", 2)
+    samples = []
+    for i in range(3):
+        sample = _labelme_sample(tmp_path) if i == 0 else dict(samples[0], id=i + 1)
+        sample["data"] = json.dumps(
+            {
+                "result": json.dumps(
+                    {
+                        "rotate": 90,
+                        "rectTool": {"result": [{"x": 1, "y": 2, "width": 3, "height": 4, "label": "RT"}]},
+                    }
+                )
+            }
+        )
+        samples.append(sample)
+
+    file_full_path = converter.convert(
+        config={"attributes": [{"key": "RT", "value": "RT"}]},
+        input_data=samples,
+        out_data_dir=tmp_path.joinpath("export"),
+        out_data_file_name_prefix="task",
+        format="TF_RECORD",
+    )
+
+    image = tmp_path.joinpath("upload", "test.png").read_bytes()
+    with ZipFile(file_full_path) as zipf:
+        assert zipf.namelist() == [
+            "task-task.tfrecord-00000-of-00002",
+            "task-task.tfrecord-00001-of-00002",
+        ]
+        records = [r for name in zipf.namelist() for r in _read_tf_records(zipf.read(name))]
+
+    assert len(records) == 3
+    feature = records[0].features.feature
+    # the original file, not decoded pixels
+    assert feature["image/encoded"].bytes_list.value == [image]
+    assert feature["image/format"].bytes_list.value == [b"png"]
+    assert feature["image/rotate"].int64_list.value == [90]
+    # every record holds the classes of its own sample only
+    for record in records:
+        feature = record.features.feature
+        assert feature["image/object/class/text"].bytes_list.value == [b"RT"]
+        assert feature["image/object/class/label"].int64_list.value == [1]
+
+
+def test_convert_to_tf_record_line_classes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", tmp_path)
+    sample = _labelme_sample(tmp_path)
+    sample["data"] = json.dumps(
+        {
+            "result": json.dumps(
+                {"lineTool": {"result": [{"label": "LT", "points": [{"x": 1, "y": 1}, {"x": 2, "y": 2}]}]}}
+            )
+        }
+    )
+
+    file_full_path = converter.convert(
+        config={"attributes": [{"key": "LT", "value": "LT"}]},
+        input_data=[sample],
+        out_data_dir=tmp_path.joinpath("export"),
+        out_data_file_name_prefix="task",
+        format="TF_RECORD",
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        records = [r for name in zipf.namelist() for r in _read_tf_records(zipf.read(name))]
+    feature = records[0].features.feature
+    assert feature["image/object/class/text"].bytes_list.value == [b"LT"]
+    assert feature["image/object/class/label"].int64_list.value == [1]
+
+
+def _coco_sample(sample_id: int) -> dict:
+    result = {
+        "width": 6,
+        "height": 4,
+        "polygonTool": {
+            "toolName": "polygonTool",
+            "result": [
+                {"label": "a", "points": [{"x": 1, "y": 1}, {"x": 5, "y": 1}, {"x": 5, "y": 3}, {"x": 1, "y": 3}]}
+            ],
+        },
+        "rectTool": {
+            "toolName": "rectTool",
+            "result": [{"label": "b", "x": 0, "y": 0, "width": 2, "height": 3}],
+        },
+    }
+    return {
+        "id": sample_id,
+        "state": "DONE",
+        "data": json.dumps({"result": json.dumps(result)}),
+        "file": {"filename": f"{sample_id}.png"},
+    }
+
+
+def test_convert_to_coco_streams_images_and_annotations(tmp_path):
+    config = {"attributes": [{"key": "a", "value": "a"}, {"key": "b", "value": "b"}]}
+
+    file_full_path = converter.convert(
+        config=config,
+        input_data=(_coco_sample(i) for i in (1, 2)),
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="COCO",
+    )
+
+    result = json.loads(file_full_path.read_text())
+    assert list(result) == ["images", "annotations", "categories"]
+    assert [image["id"] for image in result["images"]] == [1, 2]
+    assert [a["id"] for a in result["annotations"]] == [0, 1, 2, 3]
+    polygon, rect = result["annotations"][:2]
+    assert polygon["bbox"] == [1, 1, 4, 2]
+    assert polygon["area"] == 8
+    assert polygon["segmentation"] == [1, 1, 5, 1, 5, 3, 1, 3]
+    assert polygon["category_id"] == 0
+    assert rect["bbox"] == [0, 0, 2, 3] and rect["area"] == 6 and rect["category_id"] == 1
+
+
+def test_convert_to_coco_rle(tmp_path):
+    file_full_path = converter.convert(
+        config={},
+        input_data=[_coco_sample(1)],
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="COCO",
+        options={"coco_segmentation": "RLE"},
+    )
+
+    segmentation = json.loads(file_full_path.read_text())["annotations"][0]["segmentation"]
+    assert segmentation["size"] == [4, 6]
+    # columns 1 to 5 of rows 1 to 3, column major
+    assert segmentation["counts"] == [5] + [3, 1] * 4 + [3]
+    assert sum(segmentation["counts"]) == 24
+
+
+def test_convert_to_xml_writes_every_sample(tmp_path):
+    file_full_path = converter.convert(
+        config={},
+        input_data=_streaming_samples(3),
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="XML",
+    )
+
+    content = file_full_path.read_bytes()
+    assert content.startswith(b"<?xml version='1.0' encoding='utf-8'?>\n<root><sample>")
+    root = ElementTree.fromstring(content)
+    assert [s.findtext("id") for s in root.findall("sample")] == ["1", "2", "3"]
+    assert root.find("sample/result/annotations/object/toolName").text == "rectTool"
+    assert root.findall("sample")[1].findtext("result/valid") == "False"
+
+
+def test_convert_to_parquet(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(settings, "EXPORT_PARQUET_ROW_GROUP_SIZE", 4)
+    result = {
+        "width": 10,
+        "height": 10,
+        "rectTool": {"result": [{"x": 1, "y": 2, "width": 3, "height": 4, "label": "RT", "order": 1}]},
+        "polygonTool": {
+            "result": [
+                {
+                    "label": "PG",
+                    "points": [{"x": 0, "y": 0}, {"x": 2, "y": 0}, {"x": 2, "y": 2}],
+                    "attributes": {"color": ["red", "blue"], "size": [1, 2], "shape": None},
+                    "order": 2,
+                }
+            ]
+        },
+        "tagTool": {"result": [{"value": {"weather": ["sunny"]}, "order": 3}]},
+    }
+    samples = [
+        {
+            "id": i,
+            "state": "DONE",
+            "data": json.dumps({"result": json.dumps(result)}),
+            "file": {"filename": f"{i}.png"},
+        }
+        for i in (1, 2, 3)
+    ]
+    config = {"attributes": [{"key": "Rect", "value": "RT"}]}
+
+    file_full_path = converter.convert(
+        config=config,
+        input_data=samples,
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="PARQUET",
+    )
+
+    # 3 objects per sample, in row groups of 4
+    parquet_file = pq.ParquetFile(file_full_path)
+    assert parquet_file.metadata.num_row_groups == 3
+    rows = parquet_file.read().to_pylist()
+    assert [row["sample_id"] for row in rows] == [1, 1, 1, 2, 2, 2, 3, 3, 3]
+    rect, polygon, tag = rows[:3]
+    assert (rect["tool"], rect["label_text"], rect["x"], rect["y"]) == ("rectTool", "Rect", [1.0], [2.0])
+    assert (rect["width"], rect["height"], rect["order"]) == (3.0, 4.0, 1)
+    assert polygon["x"] == [0.0, 2.0, 2.0] and polygon["width"] is None
+    assert polygon["attributes"] == [("color", "red, blue"), ("size", "1, 2"), ("shape", None)]
+    assert tag["attributes"] == [("weather", "sunny")]
+
+
+def _convert_to_ids(config, input_data, out_data_dir, out_data_file_name_prefix, sink, options, index):
+    out_data_dir.mkdir(parents=True, exist_ok=True)
+    file_full_path = out_data_dir.joinpath(f"{out_data_file_name_prefix}{options['suffix']}")
+    file_full_path.write_text(",".join(str(sample["id"]) for sample in input_data))
+    return file_full_path
+
+
+def test_register_format(tmp_path, monkeypatch):
+    monkeypatch.setattr(converter_module, "_formats", dict(converter_module._formats))
+    register_format(FormatSpec(name="IDS", module=__name__, function="_convert_to_ids"))
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=_streaming_samples(3),
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="IDS",
+        options={"suffix": ".txt"},
+    )
+
+    assert file_full_path.read_text() == "1,2,3"
+    assert not get_format("JSON").streaming and get_format("CSV").streaming
+    with pytest.raises(ValueError):
+        get_format("UNKNOWN")
+
+
+def test_formats_are_imported_lazily():
+    code = (
+        "import sys; import labelu.internal.common.converter; "
+        "print(sorted(m for m in sys.modules if m.startswith('labelu.internal.common.formats') "
+        "or m in ('tfrecord', 'PIL', 'numpy')))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
@@ -0,0 +1,61 @@
+import os
+import time
+from datetime import datetime
+
+from labelu.internal.common.export_cache import ExportCache, export_cache_key
+
+
+def _export_file(tmp_path, name: str, size: int):
+    out_dir = tmp_path.joinpath("out")
+    out_dir.mkdir(exist_ok=True)
+    file_path = out_dir.joinpath(name)
+    file_path.write_bytes(b"0" * size)
+    return file_path
+
+
+def test_export_cache_key():
+    updated_at = datetime(2024, 1, 1)
+    key = export_cache_key(1, "JSON", "{}", [2, 1], 2, updated_at)
+
+    assert key == export_cache_key(1, "JSON", "{}", [1, 2, 2], 2, updated_at)
+    assert key != export_cache_key(1, "COCO", "{}", [1, 2], 2, updated_at)
+    assert key != export_cache_key(1, "JSON", '{"tools": []}', [1, 2], 2, updated_at)
+    assert key != export_cache_key(1, "JSON", "{}", [1, 2], 1, updated_at)
+    assert key != export_cache_key(1, "JSON", "{}", [1, 2], 2, datetime(2024, 1, 2))
+    assert key != export_cache_key(1, "JSON", "{}", None, 2, updated_at)
+
+
+def test_export_cache_hit_and_miss(tmp_path):
+    cache = ExportCache(root=tmp_path.joinpath("cache"), max_bytes=1000, max_age=3600)
+
+    assert cache.get("a") is None
+    cached = cache.put("a", _export_file(tmp_path, "result.json", 10))
+
+    assert cache.get("a") == cached
+    assert cached.read_bytes() == b"0" * 10
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+
+def test_export_cache_evict_by_size(tmp_path):
+    cache = ExportCache(root=tmp_path.joinpath("cache"), max_bytes=25, max_age=3600)
+    for key in ["a", "b"]:
+        cache.put(key, _export_file(tmp_path, f"{key}.zip", 10))
+    # a is used more recently than b
+    os.utime(cache.root.joinpath("b"), (time.time() - 10, time.time() - 10))
+    cache.get("a")
+
+    cache.put("c", _export_file(tmp_path, "c.zip", 10))
+
+    assert cache.get("a")
+    assert cache.get("b") is None
+    assert cache.get("c")
+
+
+def test_export_cache_evict_by_age(tmp_path):
+    cache = ExportCache(root=tmp_path.joinpath("cache"), max_bytes=1000, max_age=60)
+    cache.put("a", _export_file(tmp_path, "a.zip", 10))
+    os.utime(cache.root.joinpath("a"), (time.time() - 120, time.time() - 120))
+
+    cache.evict()
+
+    assert cache.get("a") is None
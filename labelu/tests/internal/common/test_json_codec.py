@@ -0,0 +1,53 @@
+import json
+import subprocess
+import sys
+from datetime import datetime
+
+import pytest
+
+from labelu.internal.common import json_codec
+from labelu.internal.common.response import CodecJSONResponse
+
+
+VALUE = {"label": "标签", 1: [1.5, None, True], "at": datetime(2024, 1, 2, 3, 4, 5)}
+
+
+@pytest.mark.parametrize("name", list(json_codec.BACKENDS))
+def test_json_codec_backends_write_the_same_json(name):
+    codec = json_codec.BACKENDS[name]
+
+    assert codec.dumps(VALUE, default=str) == '{"label":"标签","1":[1.5,null,true],"at":"2024-01-02 03:04:05"}'
+    assert codec.dumps_bytes({"a": [1]}, indent=True) == json.dumps({"a": [1]}, indent=2).encode()
+    assert codec.loads(codec.dumps_bytes({"a": "标签"})) == {"a": "标签"}
+    with pytest.raises(ValueError):
+        codec.loads("not json")
+
+
+def test_json_codec_use():
+    default = json_codec.backend()
+    try:
+        json_codec.use("json")
+        assert json_codec.backend() == "json"
+        assert json_codec.loads(json_codec.dumps([1, "a"])) == [1, "a"]
+    finally:
+        json_codec.use(default)
+
+    with pytest.raises(ValueError):
+        json_codec.use("unknown")
+
+
+def test_json_codec_without_orjson():
+    code = (
+        "import sys; sys.modules['orjson'] = None; "
+        "from labelu.internal.common import json_codec; "
+        "assert json_codec.backend() == 'json'; "
+        "assert json_codec.loads(json_codec.dumps({'a': 1})) == {'a': 1}"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_codec_json_response():
+    response = CodecJSONResponse({"msg": "标签", "data": [1]})
+
+    assert response.body == '{"msg":"标签","data":[1]}'.encode()
+    assert response.headers["content-type"] == "application/json"
@@ -0,0 +1,148 @@
+import io
+import json
+from zipfile import ZipFile
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from labelu.internal.common.color import colors
+from labelu.internal.common.converter import converter
+from labelu.internal.common.mask import color_image, label_image, palette, rasterize
+
+
+def _squares(count: int, size: int = 4):
+    # one row of squares, left to right
+    return [
+        [i * size, 0, i * size + size - 1, 0, i * size + size - 1, size - 1, i * size, size - 1]
+        for i in range(count)
+    ]
+
+
+def test_rasterize_8bit():
+    labels = rasterize(_squares(3), width=12, height=4)
+
+    assert labels.dtype == np.uint8
+    assert labels[0].tolist() == [1] * 4 + [2] * 4 + [3] * 4
+
+
+def test_rasterize_16bit_above_255_polygons():
+    labels = rasterize(_squares(300, size=2), width=600, height=2)
+
+    assert labels.dtype == np.uint16
+    assert labels[0, 0] == 1 and labels[0, -1] == 300
+
+    img = Image.open(io.BytesIO(_png(label_image(labels))))
+    assert np.array_equal(np.asarray(img), labels)
+
+
+def test_color_image_matches_drawn_polygons():
+    polygons = _squares(3) + [[0, 0, 11, 0, 11, 1, 0, 1]]
+    labels = rasterize(polygons, width=12, height=4)
+
+    expected = Image.new("RGB", (12, 4), 0)
+    for index, polygon in enumerate(polygons):
+        ImageDraw.Draw(expected).polygon(polygon, fill=colors[index % 255 + 1]["hexString"])
+
+    assert np.array_equal(np.asarray(color_image(labels, len(polygons))), np.asarray(expected))
+
+
+def test_color_image_16bit():
+    labels = rasterize(_squares(300, size=2), width=600, height=2)
+
+    assert np.array_equal(np.asarray(color_image(labels, 300)), palette(300)[labels])
+
+
+def test_convert_to_mask(tmp_path):
+    result = {
+        "width": 12,
+        "height": 4,
+        "polygonTool": {
+            "result": [
+                {"label": "a", "points": [{"x": x, "y": y} for x, y in zip(p[::2], p[1::2])]}
+                for p in _squares(3)
+            ]
+        },
+    }
+    sample = {
+        "id": 1,
+        "state": "DONE",
+        "data": json.dumps({"result": json.dumps(result)}),
+        "file": {"filename": "a.png"},
+    }
+
+    file_full_path = converter.convert(
+        config={},
+        input_data=[sample],
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="MASK",
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        assert zipf.namelist() == ["a-trainIds.png", "a-segmentation.png", "colors.json"]
+        train_ids = np.asarray(Image.open(io.BytesIO(zipf.read("a-trainIds.png"))))
+        color_list = json.loads(zipf.read("colors.json"))
+    assert train_ids[0].tolist() == [1] * 4 + [2] * 4 + [3] * 4
+    assert [c["trainIds"] for c in color_list] == [1, 2, 3]
+
+
+def _png(img: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_convert_to_semantic_mask(tmp_path):
+    config = {
+        "tools": [
+            {
+                "tool": "polygonTool",
+                "config": {"attributes": [{"key": "Cat", "value": "cat"}, {"key": "Dog", "value": "dog"}]},
+            }
+        ],
+        "attributes": [{"key": "Dog", "value": "dog"}],
+    }
+    points = [
+        [{"x": x, "y": y} for x, y in zip(p[::2], p[1::2])] for p in _squares(3)
+    ]
+    result = {
+        "width": 12,
+        "height": 4,
+        "polygonTool": {
+            "result": [
+                {"label": "dog", "points": points[0]},
+                {"label": "cat", "points": points[1]},
+                {"label": "removed", "points": points[2]},
+            ]
+        },
+    }
+    sample = {
+        "id": 1,
+        "state": "DONE",
+        "data": json.dumps({"result": json.dumps(result)}),
+        "file": {"filename": "a.png"},
+    }
+
+    file_full_path = converter.convert(
+        config=config,
+        input_data=[sample],
+        out_data_dir=tmp_path,
+        out_data_file_name_prefix="task",
+        format="MASK",
+        options={"mask_mode": "SEMANTIC"},
+    )
+
+    with ZipFile(file_full_path) as zipf:
+        assert zipf.namelist() == ["a-classIds.png", "classes.json"]
+        img = Image.open(io.BytesIO(zipf.read("a-classIds.png")))
+        classes = json.loads(zipf.read("classes.json"))
+
+    # ids follow the config, not the polygon order
+    assert img.mode == "P"
+    assert np.asarray(img)[0].tolist() == [2] * 4 + [1] * 4 + [255] * 4
+    assert img.convert("RGB").getpixel((0, 0)) == tuple(classes["classes"][1]["color"])
+    assert classes["ignore"] == 255
+    assert [(c["id"], c["value"], c["name"]) for c in classes["classes"]] == [
+        (1, "cat", "Cat"),
+        (2, "dog", "Dog"),
+    ]
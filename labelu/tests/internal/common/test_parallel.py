@@ -0,0 +1,40 @@
+from labelu.internal.common.config import settings
+from labelu.internal.common.parallel import map_samples, shutdown_process_pool, start_process_pool
+
+
+def _square(x: int) -> int:
+    return x * x
+
+
+def _media_root(_) -> str:
+    return str(settings.MEDIA_ROOT)
+
+
+def test_map_samples_in_process():
+    assert list(map_samples(_square, range(5), workers=1, chunk_size=2)) == [0, 1, 4, 9, 16]
+
+
+def test_map_samples_process_pool_keeps_order():
+    assert list(map_samples(_square, iter(range(50)), workers=2, chunk_size=3)) == [
+        x * x for x in range(50)
+    ]
+
+
+def test_map_samples_empty_input():
+    assert list(map_samples(_square, [], workers=2, chunk_size=3)) == []
+
+
+def test_map_samples_shares_one_process_pool():
+    list(map_samples(_square, range(10), workers=2, chunk_size=3))
+    pool = start_process_pool()
+    assert list(map_samples(_square, range(10), workers=2, chunk_size=3)) == [x * x for x in range(10)]
+    assert start_process_pool() is pool
+
+
+def test_process_pool_workers_see_runtime_settings(monkeypatch, tmp_path):
+    shutdown_process_pool()
+    monkeypatch.setattr(settings, "MEDIA_ROOT", tmp_path)
+    try:
+        assert set(map_samples(_media_root, range(4), workers=2, chunk_size=1)) == {str(tmp_path)}
+    finally:
+        shutdown_process_pool()
@@ -0,0 +1,59 @@
+import json
+
+from labelu.internal.common.task_config_index import TaskConfigIndex, TaskConfigIndexCache
+
+
+CONFIG = {
+    "tools": [
+        {"tool": "rectTool", "config": {"attributes": [{"key": "Car", "value": "car"}]}},
+        {
+            "tool": "polygonTool",
+            "config": {"attributes": [{"key": "Road", "value": "road"}, {"key": "Vehicle", "value": "car"}]},
+        },
+        {"tool": "tagTool"},
+    ],
+    "attributes": [{"key": "Person", "value": "person"}],
+}
+
+
+def test_task_config_index_labels():
+    index = TaskConfigIndex(CONFIG)
+
+    assert index.label("rectTool", "car") == "Car"
+    assert index.label("polygonTool", "car") == "Vehicle"
+    assert index.label("rectTool", "person") == "Person"
+    assert index.label("lineTool", "road") == ""
+    assert index.label("tagTool", "unknown") == ""
+
+
+def test_task_config_index_classes_and_categories():
+    index = TaskConfigIndex(CONFIG)
+
+    # tool labels then common ones, numbered after the first occurrence
+    assert index.classes == ["car", "road", "car", "person"]
+    assert index.class_ids == {"car": 0, "road": 1, "person": 3}
+    # common labels then tool ones, numbered after the last occurrence
+    assert [c["name"] for c in index.categories] == ["person", "car", "road", "car"]
+    assert index.category_ids == {"person": 0, "car": 3, "road": 2}
+    assert TaskConfigIndex(None).classes == []
+
+
+def test_task_config_index_cache():
+    cache = TaskConfigIndexCache(max_entries=2)
+    config = json.dumps(CONFIG)
+
+    index = cache.get(1, config)
+    assert cache.get(1, config) is index
+
+    # a new config of the task is compiled again
+    updated = cache.get(1, json.dumps({"attributes": []}))
+    assert updated is not index and updated.classes == []
+
+    cache.invalidate(1)
+    assert cache.get(1, config) is not index
+
+    # least recently used first out
+    task_2 = cache.get(2, config)
+    cache.get(1, config)
+    cache.get(3, config)
+    assert cache.get(2, config) is not task_2
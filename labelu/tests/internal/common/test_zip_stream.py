@@ -0,0 +1,76 @@
+import io
+import threading
+from zipfile import ZipFile
+
+import pytest
+
+from labelu.internal.common.zip_stream import ChunkStream, StreamCancelled, TeeStream, ZipStream
+
+
+def test_zip_stream_to_file(tmp_path):
+    source = tmp_path.joinpath("source.bin")
+    source.write_bytes(b"1" * 1000)
+    file_full_path_zip = tmp_path.joinpath("result.zip")
+
+    with file_full_path_zip.open("wb") as outfile:
+        with ZipStream(outfile) as zipf:
+            zipf.write("a.txt", "a")
+            zipf.write_file("b.bin", source)
+
+    with ZipFile(file_full_path_zip) as zipf:
+        assert zipf.namelist() == ["a.txt", "b.bin"]
+        assert zipf.read("b.bin") == b"1" * 1000
+
+
+def test_zip_stream_to_chunk_stream():
+    sink = ChunkStream(chunk_size=16, max_chunks=2)
+
+    def produce():
+        with ZipStream(sink) as zipf:
+            for i in range(100):
+                zipf.write(f"{i}.txt", str(i) * 10)
+        sink.close()
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    content = b"".join(sink)
+    thread.join()
+
+    with ZipFile(io.BytesIO(content)) as zipf:
+        assert len(zipf.namelist()) == 100
+        assert zipf.read("42.txt") == b"42" * 10
+
+
+def test_tee_stream_copies_the_archive(tmp_path):
+    copy = tmp_path.joinpath("copy.zip")
+    sink = io.BytesIO()
+
+    with copy.open("wb") as copy_file:
+        with ZipStream(TeeStream(sink, copy_file)) as zipf:
+            zipf.write("a.txt", "a")
+
+    assert copy.read_bytes() == sink.getvalue()
+    with ZipFile(copy) as zipf:
+        assert zipf.read("a.txt") == b"a"
+
+
+def test_chunk_stream_error_reaches_reader():
+    sink = ChunkStream()
+    sink.write(b"abc")
+    sink.fail(ValueError("failed"))
+    sink.close()
+
+    with pytest.raises(ValueError):
+        list(sink)
+
+
+def test_chunk_stream_cancelled_by_reader():
+    sink = ChunkStream(chunk_size=1, max_chunks=1)
+    sink.write(b"a")
+    chunks = iter(sink)
+    next(chunks)
+    chunks.close()
+
+    with pytest.raises(StreamCancelled):
+        for _ in range(3):
+            sink.write(b"b")